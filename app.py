@@ -12,7 +12,8 @@ A Flask application that:
 8. Provides semantic search across all content.
 """
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for, send_file
+from flask import Flask, Response, render_template, jsonify, request, redirect, url_for, send_file
+from flask.json.provider import DefaultJSONProvider
 from enex_parser import get_all_events_from_directory, extract_diagnostic_journey
 import improved_phb_details as phb_details
 import patient_info
@@ -22,8 +23,33 @@ import os
 import json
 import webbrowser
 import subprocess
+import threading
+import hashlib
+from collections import defaultdict
+from functools import lru_cache
+
+# orjson encodes the large event payloads much faster than the json module
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider that serializes with orjson, so jsonify() responses
+    skip the pure-Python json encoder.
+    """
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+if ORJSON_AVAILABLE:
+    app.json = OrjsonProvider(app)
 
 # Directory containing Evernote export files
 ENEX_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -31,19 +57,240 @@ ENEX_DIR = os.path.dirname(os.path.abspath(__file__))
 # Directory for attachments
 ATTACHMENTS_DIR = os.path.join(ENEX_DIR, "attachments")
 
+# How long browsers may cache attachments before revalidating (seconds)
+ATTACHMENT_MAX_AGE = 86400
+
 # Cache for events to avoid re-parsing on every request
 cached_events = None
 cached_diagnostic_journey = None
 
+# Locks so concurrent first requests parse the ENEX files only once
+events_lock = threading.Lock()
+diagnostic_journey_lock = threading.Lock()
+
+# Bumped whenever cached_events is rebuilt, so derived caches can be invalidated
+events_version = 0
+
+# Rendered HTML for the read-only views, keyed by view and its arguments
+MAX_RENDER_CACHE_ENTRIES = 256
+render_cache = {}
+
+# Serialized JSON for the read-only API endpoints, keyed by endpoint and its arguments
+MAX_JSON_CACHE_ENTRIES = 256
+json_cache = {}
+
+# Inverted indexes over the cached events, rebuilt alongside cached_events
+events_by_id = {}
+events_by_category = {}
+events_by_support = {}
+events_by_specialty = {}
+events_by_personnel = {}
+events_by_facility = {}
+event_titles = []
+
+# Shortest query matched against event titles before falling back to semantic search
+MIN_TITLE_QUERY_LENGTH = 3
+
+def build_event_indexes(events):
+    """
+    Build the ID, category, support, specialty, personnel and facility
+    indexes in a single pass over the events.
+    
+    Parameters:
+        events (list): List of events, in timeline order.
+    """
+    global events_by_id, events_by_category, events_by_support, events_by_specialty
+    global events_by_personnel, events_by_facility, event_titles
+    
+    by_id = {}
+    # Every known PHB category and support gets an entry, even with no events
+    by_category = defaultdict(list, ((category, []) for category in phb_details.PHB_CATEGORIES))
+    by_support = defaultdict(list, ((support, []) for support in phb_details.PHB_SUPPORTS))
+    by_specialty = defaultdict(list)
+    by_personnel = defaultdict(list)
+    by_facility = defaultdict(list)
+    
+    for event in events:
+        by_id.setdefault(event["id"], event)
+        by_specialty[event["specialty"]].append(event)
+        # Collect each event's keys into sets so repeated entries index it once
+        for category in {cat["category"] for cat in event.get("phb_categories", ())}:
+            by_category[category].append(event)
+        for support in {sup["support"] for sup in event.get("phb_supports", ())}:
+            by_support[support].append(event)
+        for name in {person["name"] for person in event.get("personnel", ())}:
+            by_personnel[name].append(event)
+        for name in {fac["name"] for fac in event.get("facilities", ())}:
+            by_facility[name].append(event)
+    
+    events_by_id = by_id
+    events_by_category = dict(by_category)
+    events_by_support = dict(by_support)
+    events_by_specialty = dict(by_specialty)
+    events_by_personnel = dict(by_personnel)
+    events_by_facility = dict(by_facility)
+    event_titles = [(event["title"].lower(), event) for event in events]
+
 def get_events():
     """
     Get all events, using cache if available.
     """
-    global cached_events
+    global cached_events, events_version
     if cached_events is None:
-        cached_events = get_all_events_from_directory(ENEX_DIR)
+        with events_lock:
+            if cached_events is None:
+                events = get_all_events_from_directory(ENEX_DIR)
+                build_event_indexes(events)
+                events_version += 1
+                render_cache.clear()
+                json_cache.clear()
+                prime_phb_json_cache()
+                # The vector store is rebuilt along with the events
+                cached_semantic_search.cache_clear()
+                # Publish the events last so other threads never see them without indexes
+                cached_events = events
     return cached_events
 
+def get_event(event_id):
+    """
+    Get a single event by its ID.
+    
+    Parameters:
+        event_id (str): Event ID.
+        
+    Returns:
+        dict: The event, or None if no event has this ID.
+    """
+    get_events()
+    return events_by_id.get(event_id)
+
+def render_cached(key, template, **context):
+    """
+    Render a template, reusing the HTML from an earlier request with the same key.
+    
+    Parameters:
+        key (tuple): View name and arguments identifying the rendered page.
+        template (str): Template name.
+        **context: Template context, only used when the page is not cached.
+        
+    Returns:
+        str: Rendered HTML.
+    """
+    cache_key = (events_version, template, key)
+    html = render_cache.get(cache_key)
+    if html is None:
+        html = render_template(template, **context)
+        # Bound the cache, since filter values come straight from the URL
+        if len(render_cache) < MAX_RENDER_CACHE_ENTRIES:
+            render_cache[cache_key] = html
+    return html
+
+def dumps_json(obj):
+    """
+    Serialize an object to JSON bytes, using orjson when available.
+    
+    Parameters:
+        obj: JSON-serializable object.
+        
+    Returns:
+        bytes: UTF-8 encoded JSON.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode("utf-8")
+
+def encode_json_entry(obj):
+    """
+    Serialize a payload for the JSON cache.
+    
+    Parameters:
+        obj: JSON-serializable object.
+        
+    Returns:
+        tuple: (body, etag), where the ETag is a hash of the body.
+    """
+    body = dumps_json(obj)
+    return body, hashlib.md5(body).hexdigest()
+
+def json_cached(key, obj):
+    """
+    Build a JSON response, reusing the bytes serialized for an earlier request
+    with the same key.
+    
+    Responses carry an ETag and must be revalidated, so clients that already
+    hold the current payload get a 304 Not Modified instead of the body.
+    
+    Parameters:
+        key (tuple): Endpoint name and arguments identifying the payload.
+        obj: Payload, only serialized when it is not cached.
+        
+    Returns:
+        Response: JSON response.
+    """
+    cache_key = (events_version, key)
+    entry = json_cache.get(cache_key)
+    if entry is None:
+        entry = encode_json_entry(obj)
+        # Bound the cache, since filter values come straight from the URL
+        if len(json_cache) < MAX_JSON_CACHE_ENTRIES:
+            json_cache[cache_key] = entry
+    
+    body, etag = entry
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def prime_phb_json_cache():
+    """
+    Serialize the events for every PHB category and support ahead of the
+    first API request for them.
+    """
+    for category, events in events_by_category.items():
+        json_cache[(events_version, ("by_phb_category", category))] = encode_json_entry(events)
+    for support, events in events_by_support.items():
+        json_cache[(events_version, ("by_phb_support", support))] = encode_json_entry(events)
+
+@lru_cache(maxsize=512)
+def cached_semantic_search(query, k=10):
+    """
+    Perform a semantic search, reusing the results of repeated queries.
+    
+    Parameters:
+        query (str): Search query.
+        k (int): Number of results to return.
+        
+    Returns:
+        tuple: Search results.
+    """
+    return tuple(attachment_processor.semantic_search(query, k=k))
+
+def find_direct_matches(query, k=10):
+    """
+    Find events that a search query names directly, by ID or by title.
+    
+    Parameters:
+        query (str): Search query. An "id:" prefix forces an ID lookup.
+        k (int): Maximum number of title matches to return.
+        
+    Returns:
+        list: Matching events, empty if the query needs a semantic search.
+    """
+    query = query.strip()
+    if query.lower().startswith("id:"):
+        event = get_event(query[3:].strip())
+        return [event] if event else []
+    
+    event = get_event(query)
+    if event:
+        return [event]
+    
+    if len(query) < MIN_TITLE_QUERY_LENGTH:
+        return []
+    
+    query_lower = query.lower()
+    return [event for title, event in event_titles if query_lower in title][:k]
+
 def get_diagnostic_journey():
     """
     Get the diagnostic journey, using cache if available.
@@ -51,21 +298,66 @@ def get_diagnostic_journey():
     global cached_diagnostic_journey
     if cached_diagnostic_journey is None:
         events = get_events()
-        cached_diagnostic_journey = extract_diagnostic_journey(events)
+        with diagnostic_journey_lock:
+            if cached_diagnostic_journey is None:
+                cached_diagnostic_journey = extract_diagnostic_journey(events)
     return cached_diagnostic_journey
 
+def warm_caches():
+    """
+    Parse the events and build the diagnostic journey ahead of the first request.
+    """
+    get_events()
+    get_diagnostic_journey()
+
+@app.context_processor
+def inject_globals():
+    """
+    Make patient information and the PHB framework available to every template.
+    """
+    return {
+        "patient_info": patient_info.PATIENT_INFO,
+        "phb_categories": phb_details.PHB_CATEGORIES,
+        "phb_supports": phb_details.PHB_SUPPORTS
+    }
+
+def get_search_result_attachment(event, metadata):
+    """
+    Get the attachment a search result refers to.
+    
+    Attachment details are stored in the vector store metadata when it is
+    built; vector stores built without them fall back to the attachment index.
+    
+    Parameters:
+        event (dict): Event the search result belongs to.
+        metadata (dict): Metadata of the search result.
+        
+    Returns:
+        dict: Attachment information, or None if it cannot be found.
+    """
+    if "file_path" in metadata:
+        return {
+            "file_name": metadata["file_name"],
+            "file_path": metadata["file_path"],
+            "mime_type": metadata["mime_type"]
+        }
+    
+    attachment_index = metadata.get("attachment_index", 0)
+    attachments = event.get("attachments", [])
+    if attachment_index < len(attachments):
+        return attachments[attachment_index]
+    return None
+
 @app.route('/')
 def index():
     """
     Main route that renders the PHB-centric timeline.
     """
     events = get_events()
-    return render_template(
+    return render_cached(
+        ("index",),
         "phb_timeline.html", 
-        events=events,
-        phb_categories=phb_details.PHB_CATEGORIES,
-        phb_supports=phb_details.PHB_SUPPORTS,
-        patient_info=patient_info.PATIENT_INFO
+        events=events
     )
 
 @app.route('/diagnostic')
@@ -74,10 +366,10 @@ def diagnostic_journey():
     Route that renders the diagnostic journey timeline.
     """
     journey = get_diagnostic_journey()
-    return render_template(
+    return render_cached(
+        ("diagnostic",),
         "diagnostic_journey.html",
-        journey=journey,
-        patient_info=patient_info.PATIENT_INFO
+        journey=journey
     )
 
 @app.route('/phb/<category>')
@@ -85,23 +377,16 @@ def phb_category(category):
     """
     Route to show events for a specific PHB category.
     """
-    events = get_events()
+    get_events()
     
-    # Filter events by PHB category
-    filtered_events = []
-    for event in events:
-        for cat in event.get("phb_categories", []):
-            if cat["category"] == category:
-                filtered_events.append(event)
-                break
+    # Look up events by PHB category
+    filtered_events = events_by_category.get(category, [])
     
-    return render_template(
+    return render_cached(
+        ("phb", category),
         "phb_timeline.html", 
         events=filtered_events,
-        phb_categories=phb_details.PHB_CATEGORIES,
-        phb_supports=phb_details.PHB_SUPPORTS,
-        active_category=category,
-        patient_info=patient_info.PATIENT_INFO
+        active_category=category
     )
 
 @app.route('/support/<support>')
@@ -109,23 +394,16 @@ def phb_support(support):
     """
     Route to show events for a specific PHB support.
     """
-    events = get_events()
+    get_events()
     
-    # Filter events by PHB support
-    filtered_events = []
-    for event in events:
-        for sup in event.get("phb_supports", []):
-            if sup["support"] == support:
-                filtered_events.append(event)
-                break
+    # Look up events by PHB support
+    filtered_events = events_by_support.get(support, [])
     
-    return render_template(
+    return render_cached(
+        ("support", support),
         "phb_timeline.html", 
         events=filtered_events,
-        phb_categories=phb_details.PHB_CATEGORIES,
-        phb_supports=phb_details.PHB_SUPPORTS,
-        active_support=support,
-        patient_info=patient_info.PATIENT_INFO
+        active_support=support
     )
 
 @app.route('/specialty/<specialty>')
@@ -133,18 +411,16 @@ def specialty(specialty):
     """
     Route to show events for a specific medical specialty.
     """
-    events = get_events()
+    get_events()
     
-    # Filter events by specialty
-    filtered_events = [event for event in events if event["specialty"] == specialty]
+    # Look up events by specialty
+    filtered_events = events_by_specialty.get(specialty, [])
     
-    return render_template(
+    return render_cached(
+        ("specialty", specialty),
         "phb_timeline.html", 
         events=filtered_events,
-        phb_categories=phb_details.PHB_CATEGORIES,
-        phb_supports=phb_details.PHB_SUPPORTS,
-        active_specialty=specialty,
-        patient_info=patient_info.PATIENT_INFO
+        active_specialty=specialty
     )
 
 @app.route('/personnel/<personnel_name>')
@@ -152,23 +428,16 @@ def personnel(personnel_name):
     """
     Route to show events for a specific medical personnel.
     """
-    events = get_events()
+    get_events()
     
-    # Filter events by personnel name
-    filtered_events = []
-    for event in events:
-        for person in event.get("personnel", []):
-            if person["name"] == personnel_name:
-                filtered_events.append(event)
-                break
+    # Look up events by personnel name
+    filtered_events = events_by_personnel.get(personnel_name, [])
     
-    return render_template(
+    return render_cached(
+        ("personnel", personnel_name),
         "phb_timeline.html", 
         events=filtered_events,
-        phb_categories=phb_details.PHB_CATEGORIES,
-        phb_supports=phb_details.PHB_SUPPORTS,
-        active_personnel=personnel_name,
-        patient_info=patient_info.PATIENT_INFO
+        active_personnel=personnel_name
     )
 
 @app.route('/facility/<facility_name>')
@@ -176,23 +445,16 @@ def facility(facility_name):
     """
     Route to show events for a specific medical facility.
     """
-    events = get_events()
+    get_events()
     
-    # Filter events by facility name
-    filtered_events = []
-    for event in events:
-        for fac in event.get("facilities", []):
-            if fac["name"] == facility_name:
-                filtered_events.append(event)
-                break
+    # Look up events by facility name
+    filtered_events = events_by_facility.get(facility_name, [])
     
-    return render_template(
+    return render_cached(
+        ("facility", facility_name),
         "phb_timeline.html", 
         events=filtered_events,
-        phb_categories=phb_details.PHB_CATEGORIES,
-        phb_supports=phb_details.PHB_SUPPORTS,
-        active_facility=facility_name,
-        patient_info=patient_info.PATIENT_INFO
+        active_facility=facility_name
     )
 
 @app.route('/event/<event_id>')
@@ -200,20 +462,14 @@ def event_detail(event_id):
     """
     Route to show details for a specific event.
     """
-    events = get_events()
-    
-    # Find the event with the given ID
-    event = next((e for e in events if e["id"] == event_id), None)
+    event = get_event(event_id)
     
     if event is None:
         return redirect(url_for('index'))
     
     return render_template(
         "event_detail.html", 
-        event=event,
-        phb_categories=phb_details.PHB_CATEGORIES,
-        phb_supports=phb_details.PHB_SUPPORTS,
-        patient_info=patient_info.PATIENT_INFO
+        event=event
     )
 
 @app.route('/open_evernote/<event_id>')
@@ -221,10 +477,7 @@ def open_evernote(event_id):
     """
     Route to open an event in Evernote.
     """
-    events = get_events()
-    
-    # Find the event with the given ID
-    event = next((e for e in events if e["id"] == event_id), None)
+    event = get_event(event_id)
     
     if event is None:
         return jsonify({"success": False, "message": "Event not found"}), 404
@@ -247,10 +500,7 @@ def get_attachment(event_id, filename):
     """
     Route to get an attachment for a specific event.
     """
-    events = get_events()
-    
-    # Find the event with the given ID
-    event = next((e for e in events if e["id"] == event_id), None)
+    event = get_event(event_id)
     
     if event is None:
         return jsonify({"error": "Event not found"}), 404
@@ -261,18 +511,21 @@ def get_attachment(event_id, filename):
     if attachment is None:
         return jsonify({"error": "Attachment not found"}), 404
     
-    # Return the attachment
-    return send_file(attachment["file_path"], mimetype=attachment["mime_type"])
+    # Return the attachment, letting browsers revalidate with ETag/Last-Modified
+    return send_file(
+        attachment["file_path"],
+        mimetype=attachment["mime_type"],
+        conditional=True,
+        etag=True,
+        max_age=ATTACHMENT_MAX_AGE
+    )
 
 @app.route('/attachments/<event_id>')
 def list_attachments(event_id):
     """
     Route to list all attachments for a specific event.
     """
-    events = get_events()
-    
-    # Find the event with the given ID
-    event = next((e for e in events if e["id"] == event_id), None)
+    event = get_event(event_id)
     
     if event is None:
         return jsonify({"error": "Event not found"}), 404
@@ -285,9 +538,9 @@ def patient():
     """
     Route to show patient information.
     """
-    return render_template(
-        "patient_info.html",
-        patient_info=patient_info.PATIENT_INFO
+    return render_cached(
+        ("patient",),
+        "patient_info.html"
     )
 
 @app.route('/search')
@@ -300,49 +553,54 @@ def search():
         return render_template(
             "search.html",
             query='',
-            results=[],
-            patient_info=patient_info.PATIENT_INFO
+            results=[]
         )
     
-    # Perform semantic search
-    results = attachment_processor.semantic_search(query, k=10)
-    
-    # Get events for the search results
-    events = get_events()
+    # Event IDs and title matches are answered without a semantic search
+    direct_matches = find_direct_matches(query, k=10)
     search_results = []
     
-    for result in results:
-        metadata = result.metadata
-        event_id = metadata.get("id")
-        event = next((e for e in events if e["id"] == event_id), None)
+    if direct_matches:
+        for event in direct_matches:
+            search_results.append({
+                "type": "event",
+                "event": event,
+                "content": event["content"],
+                "score": 1.0  # Placeholder for score
+            })
+    else:
+        # Perform semantic search
+        results = cached_semantic_search(query, k=10)
         
-        if event:
-            result_type = metadata.get("type", "unknown")
+        for result in results:
+            metadata = result.metadata
+            event = get_event(metadata.get("id"))
             
-            if result_type == "event":
-                search_results.append({
-                    "type": "event",
-                    "event": event,
-                    "content": result.page_content,
-                    "score": 1.0  # Placeholder for score
-                })
-            elif result_type == "attachment":
-                attachment_index = metadata.get("attachment_index", 0)
-                if attachment_index < len(event.get("attachments", [])):
-                    attachment = event["attachments"][attachment_index]
+            if event:
+                result_type = metadata.get("type", "unknown")
+                
+                if result_type == "event":
                     search_results.append({
-                        "type": "attachment",
+                        "type": "event",
                         "event": event,
-                        "attachment": attachment,
                         "content": result.page_content,
                         "score": 1.0  # Placeholder for score
                     })
+                elif result_type == "attachment":
+                    attachment = get_search_result_attachment(event, metadata)
+                    if attachment is not None:
+                        search_results.append({
+                            "type": "attachment",
+                            "event": event,
+                            "attachment": attachment,
+                            "content": result.page_content,
+                            "score": 1.0  # Placeholder for score
+                        })
     
     return render_template(
         "search.html",
         query=query,
-        results=search_results,
-        patient_info=patient_info.PATIENT_INFO
+        results=search_results
     )
 
 @app.route('/api/events')
@@ -351,7 +609,7 @@ def api_events():
     API endpoint that returns all events as JSON.
     """
     events = get_events()
-    return jsonify(events)
+    return json_cached(("events",), events)
 
 @app.route('/api/diagnostic_journey')
 def api_diagnostic_journey():
@@ -359,118 +617,95 @@ def api_diagnostic_journey():
     API endpoint that returns the diagnostic journey as JSON.
     """
     journey = get_diagnostic_journey()
-    return jsonify(journey)
+    return json_cached(("diagnostic_journey",), journey)
 
 @app.route('/api/patient_info')
 def api_patient_info():
     """
     API endpoint that returns patient information as JSON.
     """
-    return jsonify(patient_info.PATIENT_INFO)
+    return json_cached(("patient_info",), patient_info.PATIENT_INFO)
 
 @app.route('/api/phb_categories')
 def api_phb_categories():
     """
     API endpoint that returns PHB categories as JSON.
     """
-    return jsonify(phb_details.PHB_CATEGORIES)
+    return json_cached(("phb_categories",), phb_details.PHB_CATEGORIES)
 
 @app.route('/api/phb_supports')
 def api_phb_supports():
     """
     API endpoint that returns PHB supports as JSON.
     """
-    return jsonify(phb_details.PHB_SUPPORTS)
+    return json_cached(("phb_supports",), phb_details.PHB_SUPPORTS)
 
 @app.route('/api/events/by_phb_category/<category>')
 def api_events_by_phb_category(category):
     """
     API endpoint that returns events for a specific PHB category.
     """
-    events = get_events()
+    get_events()
     
-    # Filter events by PHB category
-    filtered_events = []
-    for event in events:
-        for cat in event.get("phb_categories", []):
-            if cat["category"] == category:
-                filtered_events.append(event)
-                break
+    # Look up events by PHB category
+    filtered_events = events_by_category.get(category, [])
     
-    return jsonify(filtered_events)
+    return json_cached(("by_phb_category", category), filtered_events)
 
 @app.route('/api/events/by_phb_support/<support>')
 def api_events_by_phb_support(support):
     """
     API endpoint that returns events for a specific PHB support.
     """
-    events = get_events()
+    get_events()
     
-    # Filter events by PHB support
-    filtered_events = []
-    for event in events:
-        for sup in event.get("phb_supports", []):
-            if sup["support"] == support:
-                filtered_events.append(event)
-                break
+    # Look up events by PHB support
+    filtered_events = events_by_support.get(support, [])
     
-    return jsonify(filtered_events)
+    return json_cached(("by_phb_support", support), filtered_events)
 
 @app.route('/api/events/by_specialty/<specialty>')
 def api_events_by_specialty(specialty):
     """
     API endpoint that returns events for a specific medical specialty.
     """
-    events = get_events()
+    get_events()
     
-    # Filter events by specialty
-    filtered_events = [event for event in events if event["specialty"] == specialty]
+    # Look up events by specialty
+    filtered_events = events_by_specialty.get(specialty, [])
     
-    return jsonify(filtered_events)
+    return json_cached(("by_specialty", specialty), filtered_events)
 
 @app.route('/api/events/by_personnel/<personnel_name>')
 def api_events_by_personnel(personnel_name):
     """
     API endpoint that returns events for a specific medical personnel.
     """
-    events = get_events()
+    get_events()
     
-    # Filter events by personnel name
-    filtered_events = []
-    for event in events:
-        for person in event.get("personnel", []):
-            if person["name"] == personnel_name:
-                filtered_events.append(event)
-                break
+    # Look up events by personnel name
+    filtered_events = events_by_personnel.get(personnel_name, [])
     
-    return jsonify(filtered_events)
+    return json_cached(("by_personnel", personnel_name), filtered_events)
 
 @app.route('/api/events/by_facility/<facility_name>')
 def api_events_by_facility(facility_name):
     """
     API endpoint that returns events for a specific medical facility.
     """
-    events = get_events()
+    get_events()
     
-    # Filter events by facility name
-    filtered_events = []
-    for event in events:
-        for fac in event.get("facilities", []):
-            if fac["name"] == facility_name:
-                filtered_events.append(event)
-                break
+    # Look up events by facility name
+    filtered_events = events_by_facility.get(facility_name, [])
     
-    return jsonify(filtered_events)
+    return json_cached(("by_facility", facility_name), filtered_events)
 
 @app.route('/api/event/<event_id>')
 def api_event_detail(event_id):
     """
     API endpoint that returns details for a specific event.
     """
-    events = get_events()
-    
-    # Find the event with the given ID
-    event = next((e for e in events if e["id"] == event_id), None)
+    event = get_event(event_id)
     
     if event is None:
         return jsonify({"error": "Event not found"}), 404
@@ -486,45 +721,57 @@ def api_search():
     if not query:
         return jsonify([])
     
-    # Perform semantic search
-    results = attachment_processor.semantic_search(query, k=10)
-    
-    # Get events for the search results
-    events = get_events()
+    # Event IDs and title matches are answered without a semantic search
+    direct_matches = find_direct_matches(query, k=10)
     search_results = []
     
-    for result in results:
-        metadata = result.metadata
-        event_id = metadata.get("id")
-        event = next((e for e in events if e["id"] == event_id), None)
+    if direct_matches:
+        for event in direct_matches:
+            search_results.append({
+                "type": "event",
+                "event_id": event["id"],
+                "title": event["title"],
+                "date": event["date"],
+                "content": event["content"],
+                "score": 1.0  # Placeholder for score
+            })
+    else:
+        # Perform semantic search
+        results = cached_semantic_search(query, k=10)
         
-        if event:
-            result_type = metadata.get("type", "unknown")
+        for result in results:
+            metadata = result.metadata
+            event = get_event(metadata.get("id"))
             
-            if result_type == "event":
-                search_results.append({
-                    "type": "event",
-                    "event_id": event["id"],
-                    "title": event["title"],
-                    "date": event["date"],
-                    "content": result.page_content,
-                    "score": 1.0  # Placeholder for score
-                })
-            elif result_type == "attachment":
-                attachment_index = metadata.get("attachment_index", 0)
-                if attachment_index < len(event.get("attachments", [])):
-                    attachment = event["attachments"][attachment_index]
+            if event:
+                result_type = metadata.get("type", "unknown")
+                
+                if result_type == "event":
                     search_results.append({
-                        "type": "attachment",
+                        "type": "event",
                         "event_id": event["id"],
                         "title": event["title"],
                         "date": event["date"],
-                        "attachment_name": attachment["file_name"],
                         "content": result.page_content,
                         "score": 1.0  # Placeholder for score
                     })
+                elif result_type == "attachment":
+                    attachment = get_search_result_attachment(event, metadata)
+                    if attachment is not None:
+                        search_results.append({
+                            "type": "attachment",
+                            "event_id": event["id"],
+                            "title": event["title"],
+                            "date": event["date"],
+                            "attachment_name": attachment["file_name"],
+                            "content": result.page_content,
+                            "score": 1.0  # Placeholder for score
+                        })
     
     return jsonify(search_results)
 
 if __name__ == '__main__':
+    # Only the reloader child serves requests, so only it needs warm caches
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        warm_caches()
     app.run(debug=True)
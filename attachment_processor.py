@@ -7,29 +7,82 @@ and vector storage for enhanced search capabilities.
 """
 
 import os
+
+# Keep OpenMP-based libraries (Tesseract in particular) single-threaded; pages
+# and attachments are already OCR'd in parallel, and Tesseract's own OpenMP
+# threading oversubscribes the cores. Must be set before those libraries load.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
 import re
 import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
 from PIL import Image
 import json
 import hashlib
+import sqlite3
+import tempfile
+from bisect import bisect_right
+from functools import lru_cache
 from datetime import datetime
 import improved_phb_details as phb_details
 import patient_info
 
+# The same few hundred names, facilities and event texts recur across every
+# attachment, so memoize the keyword classifiers. Callers copy the returned
+# dicts before storing them so the cached values are never shared.
+_is_family = lru_cache(maxsize=2048)(patient_info.is_family_member)
+_categorize_personnel = lru_cache(maxsize=4096)(phb_details.categorize_personnel)
+_categorize_facility = lru_cache(maxsize=4096)(phb_details.categorize_facility)
+_phb_categories_for_event = lru_cache(maxsize=4096)(phb_details.get_phb_category_for_event)
+_phb_supports_for_event = lru_cache(maxsize=4096)(phb_details.get_phb_support_for_event)
+
 # Check for OCR-related libraries
 TESSERACT_AVAILABLE = False
+TESSEROCR_AVAILABLE = False
+EASYOCR_AVAILABLE = False
 PDF_IMAGE_AVAILABLE = False
 CV2_AVAILABLE = False
 DOCX_AVAILABLE = False
 PDF_AVAILABLE = False
+PDFIUM_AVAILABLE = False
 VECTOR_DB_AVAILABLE = False
+AHOCORASICK_AVAILABLE = False
+XXHASH_AVAILABLE = False
+ORJSON_AVAILABLE = False
+CHONKIE_AVAILABLE = False
+
+# Prefer tesserocr, which keeps Tesseract and its language data loaded in-process
+# instead of starting a tesseract subprocess for every image
+try:
+    from tesserocr import PyTessBaseAPI, PSM
+    TESSEROCR_AVAILABLE = True
+    TESSERACT_AVAILABLE = True
+except ImportError:
+    pass
 
 try:
     import pytesseract
     TESSERACT_AVAILABLE = True
 except ImportError:
-    print("Warning: pytesseract not available. OCR functionality will be limited.")
+    if not TESSEROCR_AVAILABLE:
+        print("Warning: pytesseract not available. OCR functionality will be limited.")
+
+# OCR engine: "tesseract" (default) or "easyocr", which recognizes all pages
+# of a PDF in batched, optionally GPU-accelerated, inference
+OCR_ENGINE = os.environ.get("OCR_ENGINE", "tesseract").lower()
+
+if OCR_ENGINE == "easyocr":
+    try:
+        import easyocr
+        EASYOCR_AVAILABLE = True
+    except ImportError:
+        print("Warning: easyocr not available. Falling back to Tesseract for OCR.")
+
+USE_EASYOCR = OCR_ENGINE == "easyocr" and EASYOCR_AVAILABLE
+OCR_AVAILABLE = TESSERACT_AVAILABLE or USE_EASYOCR
 
 try:
     import pdf2image
@@ -39,6 +92,7 @@ except ImportError:
 
 try:
     import cv2
+    cv2.setNumThreads(1)
     CV2_AVAILABLE = True
 except ImportError:
     print("Warning: OpenCV not available. Image processing will be limited.")
@@ -49,15 +103,54 @@ try:
 except ImportError:
     print("Warning: docx2txt not available. DOCX processing will be limited.")
 
+# Prefer pypdfium2, which extracts text and renders pages with PDFium in-process
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    pass
+
 try:
     from pypdf import PdfReader
     PDF_AVAILABLE = True
 except ImportError:
-    print("Warning: pypdf not available. PDF processing will be limited.")
+    if not PDFIUM_AVAILABLE:
+        print("Warning: pypdf not available. PDF processing will be limited.")
+
+# Aho-Corasick automaton for matching many keywords in one pass
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    pass
+
+# Fast non-cryptographic hash for processed attachment cache keys
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    pass
+
+# Faster JSON for the processed attachment cache
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    pass
+
+# SIMD byte-based chunker for splitting documents before embedding
+try:
+    from chonkie import FastChunker
+    CHONKIE_AVAILABLE = True
+except ImportError:
+    pass
 
 # Set up vector database
 try:
+    import faiss
     from langchain_community.vectorstores import FAISS
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_core.documents import Document
     from langchain_huggingface import HuggingFaceEmbeddings
     from langchain.text_splitter import RecursiveCharacterTextSplitter
     VECTOR_DB_AVAILABLE = True
@@ -68,26 +161,284 @@ except ImportError:
 PROCESSED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "processed_attachments")
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 
+# Processed attachment data is cached in one SQLite database (WAL mode, so
+# attachment worker processes can read while another writes)
+CACHE_DB_PATH = os.path.join(PROCESSED_DIR, "cache.sqlite3")
+
 # Vector DB path
 VECTOR_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vector_db")
 os.makedirs(VECTOR_DB_PATH, exist_ok=True)
 
+# Attachment worker processes (see process_all_attachments) only extract text,
+# so they skip loading the embeddings model; the pool sets this variable for them
+ATTACHMENT_WORKER_ENV = "GWEN_ATTACHMENT_WORKER"
+if os.environ.get(ATTACHMENT_WORKER_ENV) == "1":
+    VECTOR_DB_AVAILABLE = False
+
+# Sentence-transformers model used to embed document chunks
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Number of chunks encoded per embedding model call
+EMBEDDING_BATCH_SIZE = 128
+
+# Vector stores with more chunks than this use an approximate HNSW index
+# instead of exact brute-force search
+HNSW_MIN_VECTORS = 10000
+HNSW_M = 32
+HNSW_EF_SEARCH = 64
+
+def get_torch_device():
+    """
+    Get the device to run torch models on, using a GPU when one is available.
+    """
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return "cuda"
+    except ImportError:
+        pass
+    
+    return "cpu"
+
 # Initialize embeddings model if available
 embeddings = None
 text_splitter = None
 if VECTOR_DB_AVAILABLE:
     try:
-        embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-        # Text splitter for chunking documents
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
+        embeddings = HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME,
+            model_kwargs={"device": get_torch_device()},
+            encode_kwargs={"batch_size": EMBEDDING_BATCH_SIZE, "normalize_embeddings": True},
         )
+        # Text splitter for chunking documents
+        if CHONKIE_AVAILABLE:
+            text_splitter = FastChunker(chunk_size=1000)
+        else:
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=1000,
+                chunk_overlap=200,
+                length_function=len,
+            )
     except Exception as e:
         print(f"Warning: Could not initialize embeddings model: {e}")
         VECTOR_DB_AVAILABLE = False
 
+# Number of processes used to process attachments in parallel. EasyOCR
+# batches pages itself and each process would load its own copy of the models,
+# so it processes attachments in a single process.
+ATTACHMENT_WORKERS = 1 if USE_EASYOCR else os.cpu_count() or 1
+
+# Resolution scanned PDF pages are rendered at for OCR
+PDF_RENDER_DPI = 200
+
+# Number of PDF pages OCR'd concurrently
+OCR_CONCURRENCY = int(os.environ.get("OCR_CONCURRENCY", os.cpu_count() or 1))
+
+# Per-thread tesserocr APIs, created on first use and recycled periodically to bound their memory
+OCR_API_RECYCLE_INTERVAL = 500
+_tess_local = threading.local()
+
+def _get_tess_api():
+    """
+    Get the calling thread's tesserocr API, creating or recycling it as needed.
+    """
+    api = getattr(_tess_local, "api", None)
+    if api is None or _tess_local.uses >= OCR_API_RECYCLE_INTERVAL:
+        if api is not None:
+            api.End()
+        api = PyTessBaseAPI(lang="eng", psm=PSM.AUTO)
+        _tess_local.api = api
+        _tess_local.uses = 0
+    
+    _tess_local.uses += 1
+    return api
+
+# Thread pool PDF pages are OCR'd on, shared by every call so its long-lived threads
+# keep their tesserocr APIs instead of loading new ones for each PDF
+_ocr_executor = None
+_ocr_executor_pid = None
+_ocr_executor_lock = threading.Lock()
+
+def _get_ocr_executor():
+    """
+    Get the page OCR thread pool, creating it on first use (and again in a forked
+    process, which inherits the pool object but not its threads).
+    """
+    global _ocr_executor, _ocr_executor_pid
+    with _ocr_executor_lock:
+        if _ocr_executor is None or _ocr_executor_pid != os.getpid():
+            _ocr_executor = ThreadPoolExecutor(max_workers=OCR_CONCURRENCY, thread_name_prefix="ocr")
+            _ocr_executor_pid = os.getpid()
+        return _ocr_executor
+
+# EasyOCR batches pages resized to a common size; 1240x1754 is A4 at 150 dpi
+EASYOCR_PAGE_WIDTH = 1240
+EASYOCR_PAGE_HEIGHT = 1754
+EASYOCR_BATCH_SIZE = 8
+
+easyocr_reader = None
+easyocr_lock = threading.Lock()
+
+def get_easyocr_reader():
+    """
+    Get the shared EasyOCR reader, loading and warming up its models on first use.
+    """
+    global easyocr_reader
+    
+    with easyocr_lock:
+        if easyocr_reader is None:
+            reader = easyocr.Reader(["en"], gpu=get_torch_device() == "cuda", cudnn_benchmark=True)
+            
+            # The first batches select kernels and allocate buffers, so run one
+            # full-size batch before timing-sensitive work
+            reader.readtext_batched(
+                [np.zeros((EASYOCR_PAGE_HEIGHT, EASYOCR_PAGE_WIDTH), np.uint8)] * EASYOCR_BATCH_SIZE,
+                n_width=EASYOCR_PAGE_WIDTH, n_height=EASYOCR_PAGE_HEIGHT,
+                batch_size=EASYOCR_BATCH_SIZE, detail=0
+            )
+            easyocr_reader = reader
+    
+    return easyocr_reader
+
+def ocr_pdf_pages_easyocr(images):
+    """
+    Run OCR on rendered PDF pages with EasyOCR, batching all pages together.
+    
+    Parameters:
+        images (list): Rendered pages as PIL Images.
+        
+    Returns:
+        list: Recognized text for each page, in page order.
+    """
+    pages = [np.asarray(img.convert("L")) for img in images]
+    results = get_easyocr_reader().readtext_batched(
+        pages, n_width=EASYOCR_PAGE_WIDTH, n_height=EASYOCR_PAGE_HEIGHT,
+        batch_size=EASYOCR_BATCH_SIZE, detail=0, paragraph=True
+    )
+    return ["\n".join(page_result) for page_result in results]
+
+def ocr_image_array(image):
+    """
+    Run OCR on a preprocessed image array.
+    
+    Uses EasyOCR when selected with OCR_ENGINE, otherwise an in-process
+    tesserocr API when available, falling back to pytesseract.
+    
+    Parameters:
+        image (numpy.ndarray): Grayscale or thresholded image.
+        
+    Returns:
+        str: Recognized text.
+    """
+    if USE_EASYOCR:
+        return "\n".join(get_easyocr_reader().readtext(image, detail=0, paragraph=True))
+    
+    if not TESSEROCR_AVAILABLE:
+        return pytesseract.image_to_string(image)
+    
+    api = _get_tess_api()
+    api.SetImage(Image.fromarray(image))
+    return api.GetUTF8Text()
+
+def preprocess_pdf_page(img):
+    """
+    Convert a rendered PDF page to a thresholded grayscale array for OCR.
+    
+    Parameters:
+        img (PIL.Image): Rendered page, ideally already grayscale.
+        
+    Returns:
+        numpy.ndarray: Thresholded image.
+    """
+    # View the PIL Image as a numpy array without copying
+    gray = np.asarray(img)
+    
+    # Convert to grayscale (pages are normally rendered as grayscale already)
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)
+    
+    # Apply thresholding, in place when the buffer is our own
+    _, threshold = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU,
+                                 dst=gray if gray.flags.writeable else None)
+    
+    return threshold
+
+def ocr_pdf_page(img):
+    """
+    Preprocess a rendered PDF page and run OCR on it.
+    
+    Parameters:
+        img (PIL.Image): Rendered page.
+        
+    Returns:
+        str: Recognized text.
+    """
+    return ocr_image_array(preprocess_pdf_page(img))
+
+def ocr_pdf_pages_batched(images):
+    """
+    Run OCR on rendered PDF pages with a single tesseract invocation.
+    
+    The pages are written to a temporary directory and passed to tesseract
+    as an image list file, so tesseract starts and loads its language data
+    once per PDF rather than once per page.
+    
+    Parameters:
+        images (list): Rendered pages as PIL Images.
+        
+    Returns:
+        list: Recognized text for each page, in page order.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_paths = []
+        for i, img in enumerate(images):
+            image_path = os.path.join(temp_dir, f"page_{i}.png")
+            cv2.imwrite(image_path, preprocess_pdf_page(img))
+            image_paths.append(image_path)
+        
+        list_path = os.path.join(temp_dir, "images.txt")
+        with open(list_path, 'w') as f:
+            f.write("\n".join(image_paths) + "\n")
+        
+        output = pytesseract.image_to_string(list_path)
+    
+    # Tesseract ends each page's text with a form feed
+    pages = output.split("\x0c")
+    if len(pages) < len(images):
+        raise ValueError(f"Expected OCR text for {len(images)} pages, got {len(pages)}")
+    
+    return pages[:len(images)]
+
+def ocr_pdf_pages(images):
+    """
+    Run OCR on rendered PDF pages.
+    
+    With EasyOCR, all pages are recognized in batches. With tesserocr, up to
+    OCR_CONCURRENCY pages are OCR'd at a time; Tesseract and OpenCV release
+    the GIL, so pages on separate threads run in parallel. With pytesseract,
+    all pages go through a single tesseract invocation.
+    
+    Parameters:
+        images (list): Rendered pages as PIL Images.
+        
+    Returns:
+        list: Recognized text for each page, in page order.
+    """
+    if USE_EASYOCR:
+        return ocr_pdf_pages_easyocr(images)
+    
+    if not TESSEROCR_AVAILABLE and len(images) > 1:
+        try:
+            return ocr_pdf_pages_batched(images)
+        except Exception as e:
+            print(f"Error running batched OCR, processing pages individually: {e}")
+    
+    workers = min(OCR_CONCURRENCY, len(images))
+    if workers <= 1:
+        return [ocr_pdf_page(img) for img in images]
+    
+    return list(_get_ocr_executor().map(ocr_pdf_page, images))
+
 def extract_text_from_image_basic(image_path):
     """
     Extract text from an image using basic PIL functionality.
@@ -117,28 +468,21 @@ def process_image(image_path):
     Returns:
         str: Extracted text from the image.
     """
-    if not TESSERACT_AVAILABLE or not CV2_AVAILABLE:
+    if not OCR_AVAILABLE or not CV2_AVAILABLE:
         return extract_text_from_image_basic(image_path)
     
     try:
-        # Read the image
-        img = cv2.imread(image_path)
-        if img is None:
+        # Read the image, decoding straight to grayscale
+        gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
             # Try with PIL if OpenCV fails
-            img = Image.open(image_path)
-            img = np.array(img)
+            gray = np.array(Image.open(image_path).convert("L"))
             
-        # Convert to grayscale
-        if len(img.shape) == 3:
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = img
-            
-        # Apply thresholding to preprocess the image
-        _, threshold = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Apply thresholding in place to preprocess the image
+        _, threshold = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=gray)
         
         # Perform OCR
-        text = pytesseract.image_to_string(threshold)
+        text = ocr_image_array(threshold)
         
         return text
     except Exception as e:
@@ -163,6 +507,52 @@ def extract_text_from_pdf_basic(pdf_path):
     except Exception as e:
         return f"Error accessing PDF: {str(e)}"
 
+def read_pdf_page_texts(pdf_path):
+    """
+    Extract the text layer of each page of a PDF.
+    
+    Uses pypdfium2 when available, otherwise pypdf.
+    
+    Parameters:
+        pdf_path (str): Path to the PDF file.
+        
+    Returns:
+        list: Text of each page, in page order.
+    """
+    if not PDFIUM_AVAILABLE:
+        return [page.extract_text() for page in PdfReader(pdf_path).pages]
+    
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        return [pdf[i].get_textpage().get_text_range() for i in range(len(pdf))]
+    finally:
+        pdf.close()
+
+def render_pdf_pages(pdf_path):
+    """
+    Render each page of a PDF as a grayscale image for OCR.
+    
+    Uses pypdfium2 when available, otherwise pdf2image.
+    
+    Parameters:
+        pdf_path (str): Path to the PDF file.
+        
+    Returns:
+        list: Rendered pages as PIL Images, in page order.
+    """
+    if not PDFIUM_AVAILABLE:
+        # Render pages in parallel with poppler
+        return pdf2image.convert_from_path(pdf_path, dpi=PDF_RENDER_DPI, grayscale=True, thread_count=OCR_CONCURRENCY)
+    
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        return [
+            pdf[i].render(scale=PDF_RENDER_DPI / 72, grayscale=True).to_pil()
+            for i in range(len(pdf))
+        ]
+    finally:
+        pdf.close()
+
 def process_pdf(pdf_path):
     """
     Process a PDF file to extract text, using OCR if needed.
@@ -173,38 +563,27 @@ def process_pdf(pdf_path):
     Returns:
         str: Extracted text from the PDF.
     """
-    if not PDF_AVAILABLE:
+    if not PDF_AVAILABLE and not PDFIUM_AVAILABLE:
         return extract_text_from_pdf_basic(pdf_path)
     
     try:
         # First try to extract text directly
-        pdf = PdfReader(pdf_path)
+        page_texts = read_pdf_page_texts(pdf_path)
         text = ""
         
-        for page in pdf.pages:
-            page_text = page.extract_text()
+        for page_text in page_texts:
             if page_text:
                 text += page_text + "\n\n"
         
         # If no text was extracted and OCR is available, use OCR
-        if not text.strip() and TESSERACT_AVAILABLE and PDF_IMAGE_AVAILABLE and CV2_AVAILABLE:
+        if (not text.strip() and OCR_AVAILABLE and CV2_AVAILABLE
+                and (PDFIUM_AVAILABLE or PDF_IMAGE_AVAILABLE)):
             try:
-                # Convert PDF to images
-                images = pdf2image.convert_from_path(pdf_path)
+                # Convert PDF to grayscale images
+                images = render_pdf_pages(pdf_path)
                 
-                # Process each image with OCR
-                for i, img in enumerate(images):
-                    # Convert PIL Image to numpy array
-                    img_np = np.array(img)
-                    
-                    # Convert to grayscale
-                    gray = cv2.cvtColor(img_np, cv2.COLOR_RGB2GRAY)
-                    
-                    # Apply thresholding
-                    _, threshold = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-                    
-                    # Perform OCR
-                    page_text = pytesseract.image_to_string(threshold)
+                # Process the images with OCR
+                for i, page_text in enumerate(ocr_pdf_pages(images)):
                     text += f"Page {i+1}:\n{page_text}\n\n"
             except Exception as e:
                 # If PDF to image conversion fails, add a note
@@ -212,7 +591,7 @@ def process_pdf(pdf_path):
         
         # If still no text, provide a message
         if not text.strip():
-            num_pages = len(pdf.pages)
+            num_pages = len(page_texts)
             text = f"[PDF: {num_pages} pages] No extractable text found. Install poppler and tesseract for OCR functionality."
         
         return text
@@ -258,6 +637,115 @@ def process_docx(docx_path):
         print(f"Error processing DOCX {docx_path}: {e}")
         return f"Error processing DOCX: {str(e)}"
 
+# Per-thread cache database connections, reopened in forked worker processes
+_cache_local = threading.local()
+
+def _get_cache_db():
+    """
+    Get the calling thread's connection to the processed attachment cache, opening it on first use.
+    """
+    conn = getattr(_cache_local, "conn", None)
+    if conn is None or _cache_local.pid != os.getpid():
+        conn = sqlite3.connect(CACHE_DB_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS processed_attachments "
+            "(key TEXT PRIMARY KEY, data BLOB NOT NULL, extracted_text TEXT)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunk_embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        # Databases created before extracted_text had its own column
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(processed_attachments)")}
+        if "extracted_text" not in columns:
+            conn.execute("ALTER TABLE processed_attachments ADD COLUMN extracted_text TEXT")
+        _cache_local.conn = conn
+        _cache_local.pid = os.getpid()
+    
+    return conn
+
+def _dump_cache_json(obj):
+    """
+    Serialize cached data to JSON bytes, with orjson when available.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+def _load_cache_json(raw):
+    """
+    Parse cached JSON bytes or text, with orjson when available.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def load_processed_data(file_path, file_hash):
+    """
+    Load cached processed data for an attachment.
+    
+    Data cached as a JSON file by earlier versions is migrated into the cache database.
+    
+    Parameters:
+        file_path (str): Path to the attachment file.
+        file_hash (str): Cache key from attachment_cache_key.
+        
+    Returns:
+        dict: Cached processed data, or None if the attachment has not been processed.
+    """
+    row = _get_cache_db().execute(
+        "SELECT data, extracted_text FROM processed_attachments WHERE key = ?", (file_hash,)
+    ).fetchone()
+    if row is not None:
+        processed_data = _load_cache_json(row[0])
+        if row[1] is not None:
+            processed_data["extracted_text"] = row[1]
+        return processed_data
+    
+    for legacy_hash in (file_hash, hashlib.md5(file_path.encode()).hexdigest()):
+        legacy_path = os.path.join(PROCESSED_DIR, f"{legacy_hash}.json")
+        if os.path.exists(legacy_path):
+            with open(legacy_path, 'rb') as f:
+                processed_data = _load_cache_json(f.read())
+            save_processed_data(file_hash, processed_data)
+            return processed_data
+    
+    return None
+
+def save_processed_data(file_hash, processed_data):
+    """
+    Save processed data for an attachment to the cache database.
+    
+    The extracted text, usually the bulk of the data, is stored in its own
+    column so it is never escaped into or parsed out of the JSON.
+    
+    Parameters:
+        file_hash (str): Cache key from attachment_cache_key.
+        processed_data (dict): Processed data to cache.
+    """
+    data = {key: value for key, value in processed_data.items() if key != "extracted_text"}
+    conn = _get_cache_db()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO processed_attachments (key, data, extracted_text) VALUES (?, ?, ?)",
+            (file_hash, _dump_cache_json(data), processed_data.get("extracted_text"))
+        )
+
+def attachment_cache_key(file_path):
+    """
+    Compute the processed-attachment cache key for a file path.
+    
+    Parameters:
+        file_path (str): Path to the attachment file.
+        
+    Returns:
+        str: Hex digest used to name the cached processed data.
+    """
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64_hexdigest(file_path.encode())
+    return hashlib.md5(file_path.encode()).hexdigest()
+
 def process_attachment(attachment):
     """
     Process an attachment based on its file type.
@@ -278,15 +766,10 @@ def process_attachment(attachment):
         return attachment
     
     # Check if we've already processed this attachment
-    hash_obj = hashlib.md5(file_path.encode())
-    file_hash = hash_obj.hexdigest()
-    processed_path = os.path.join(PROCESSED_DIR, f"{file_hash}.json")
+    file_hash = attachment_cache_key(file_path)
+    processed_data = load_processed_data(file_path, file_hash)
     
-    if os.path.exists(processed_path):
-        # Load previously processed data
-        with open(processed_path, 'r') as f:
-            processed_data = json.load(f)
-        
+    if processed_data is not None:
         # Update the attachment with the processed data
         attachment.update(processed_data)
         return attachment
@@ -316,19 +799,184 @@ def process_attachment(attachment):
         "extracted_text": extracted_text,
         "processed_at": datetime.now().isoformat(),
         "medical_info": medical_info,
-        "ocr_available": TESSERACT_AVAILABLE,
-        "pdf_processing_available": PDF_AVAILABLE and PDF_IMAGE_AVAILABLE
+        "ocr_available": OCR_AVAILABLE,
+        "pdf_processing_available": PDFIUM_AVAILABLE or (PDF_AVAILABLE and PDF_IMAGE_AVAILABLE)
     }
     
     # Save processed data
-    with open(processed_path, 'w') as f:
-        json.dump(processed_data, f)
+    save_processed_data(file_hash, processed_data)
     
     # Update the attachment with the processed data
     attachment.update(processed_data)
     
     return attachment
 
+def _keyword_alternation(keywords):
+    return "|".join(re.escape(keyword) for keyword in keywords)
+
+# Titles that introduce each type of personnel - improved to catch more variations
+PERSONNEL_TITLES = {
+    "doctor": ["Dr.", "Dr", "Doctor", "Prof.", "Prof", "Professor", "Mr.", "Mr", "Mrs.", "Mrs", "Ms.", "Ms", "Miss", "Consultant", "Specialist", "Surgeon", "Physician"],
+    "nurse": ["Nurse", "Sister", "Matron", "RN", "Staff Nurse", "Nursing"],
+    "therapist": ["Therapist", "Physiotherapist", "Physio", "OT", "Occupational Therapist", "Speech", "SALT", "SLT", "Psychologist"]
+}
+
+# Patterns for personnel
+PERSONNEL_PATTERNS = {
+    role: re.compile(r'(?:' + _keyword_alternation(titles) + r')\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?(?:\s+[A-Z][a-z]+)?)')
+    for role, titles in PERSONNEL_TITLES.items()
+}
+
+# Words that introduce each type of facility - improved to catch more variations
+FACILITY_KEYWORDS = {
+    "hospital": ["Hospital", "Medical Center", "Medical Centre", "Clinic", "Centre", "Center", "NHS Trust", "Foundation Trust", "Children's", "Paediatric", "Pediatric"],
+    "department": ["Department", "Dept", "Ward", "Unit", "Clinic", "Service", "Team", "Division"]
+}
+
+# Patterns for facilities
+FACILITY_PATTERNS = {
+    kind: re.compile(r'(?:' + _keyword_alternation(keywords) + r')(?:[:\s]+)([A-Za-z\s\-\']+)')
+    for kind, keywords in FACILITY_KEYWORDS.items()
+}
+
+# Words that introduce each type of event
+EVENT_TYPE_KEYWORDS = {
+    "Appointment": ["Appointment", "Visit", "Consultation", "Follow-up", "Review", "Assessment", "Evaluation", "Examination", "Check-up", "Checkup"],
+    "Medication": ["Medication", "Prescribed", "Taking", "Drug", "Therapy", "Treatment", "Dose", "Dosage"],
+    "Procedure": ["Procedure", "Surgery", "Operation", "Intervention", "Treatment"],
+    "Diagnosis": ["Diagnosis", "Diagnosed with", "Assessment", "Condition", "Problem", "Issue", "Concern"],
+    "Symptom": ["Symptom", "Presenting with", "Complaining of", "Reporting", "Experiencing"],
+    "Result": ["Result", "Finding", "Outcome", "Report", "Test", "Investigation", "Scan", "X-ray", "MRI", "CT", "Ultrasound"],
+    "Plan": ["Plan", "Recommendation", "Advised", "Suggested", "Proposed", "Next steps", "Follow-up", "Review"]
+}
+
+# Patterns for different types of events
+EVENT_PATTERNS = {
+    event_type: re.compile(
+        r'(?:' + _keyword_alternation(keywords) + r')'
+        + (r'(?:\s+with|\s+at|\s+on|\s+for)?' if event_type == "Appointment" else '')
+        + r'(?:[:\s]+)([^\.]+)'
+    )
+    for event_type, keywords in EVENT_TYPE_KEYWORDS.items()
+}
+
+# Keywords that might indicate significant events
+EVENT_KEYWORDS = [
+    'diagnosis', 'diagnosed', 'surgery', 'operation', 'procedure', 
+    'admitted', 'admission', 'discharged', 'discharge', 'emergency',
+    'treatment', 'therapy', 'medication', 'prescribed', 'test results',
+    'scan', 'mri', 'ct', 'x-ray', 'ultrasound', 'blood test',
+    'appointment', 'consultation', 'follow-up', 'review', 'referral',
+    'assessment', 'evaluation', 'examination', 'check-up', 'checkup',
+    'symptoms', 'pain', 'discomfort', 'difficulty', 'problem',
+    'improvement', 'deterioration', 'change', 'progress', 'regress',
+    'complication', 'side effect', 'reaction', 'response', 'outcome'
+]
+
+EVENT_KEYWORD_RE = re.compile(_keyword_alternation(EVENT_KEYWORDS))
+
+EVENT_KEYWORD_AUTOMATON = None
+if AHOCORASICK_AVAILABLE:
+    EVENT_KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for keyword in EVENT_KEYWORDS:
+        EVENT_KEYWORD_AUTOMATON.add_word(keyword, keyword)
+    EVENT_KEYWORD_AUTOMATON.make_automaton()
+
+# Labels that introduce each patient identifier
+IDENTIFIER_LABELS = {
+    "nhs_number": ["NHS", "National Health Service", "NHS Number", "NHS No", "NHS #"],
+    "hospital_number": ["Hospital Number", "Hospital No", "Hospital #", "Patient Number", "Patient ID", "MRN", "Medical Record Number"],
+    "alder_hey_number": ["Alder Hey", "Alder Hey Number", "Alder Hey ID"]
+}
+
+# Patterns for patient identifiers
+IDENTIFIER_PATTERNS = {
+    identifier: re.compile(
+        r'(?:' + _keyword_alternation(labels) + r')(?:[:\s]+)'
+        + (r'([0-9\s]{10,12})' if identifier == "nhs_number" else r'([A-Z0-9\s]{5,12})')
+    )
+    for identifier, labels in IDENTIFIER_LABELS.items()
+}
+
+# Every extraction pattern starts with one of a list of literal keywords
+ENTITY_PATTERNS = {**PERSONNEL_PATTERNS, **FACILITY_PATTERNS, **IDENTIFIER_PATTERNS, **EVENT_PATTERNS}
+ENTITY_KEYWORDS = {**PERSONNEL_TITLES, **FACILITY_KEYWORDS, **IDENTIFIER_LABELS, **EVENT_TYPE_KEYWORDS}
+
+# Automaton finding every entity keyword occurrence in one pass; each keyword
+# maps to its length - 1 (to recover the start) and the patterns it begins
+ENTITY_KEYWORD_AUTOMATON = None
+if AHOCORASICK_AVAILABLE:
+    keyword_names = {}
+    for name, keywords in ENTITY_KEYWORDS.items():
+        for keyword in keywords:
+            keyword_names.setdefault(keyword, []).append(name)
+    
+    ENTITY_KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for keyword, names in keyword_names.items():
+        ENTITY_KEYWORD_AUTOMATON.add_word(keyword, (len(keyword) - 1, names))
+    ENTITY_KEYWORD_AUTOMATON.make_automaton()
+
+SENTENCE_SPLIT_RE = re.compile(r'[.!?]')
+WHITESPACE_RE = re.compile(r'\s+')
+
+def find_entity_matches(text, starts=None):
+    """
+    Run every extraction pattern over the text, like pattern.findall.
+    
+    With the Aho-Corasick automaton, a single pass finds where each pattern's
+    keywords occur and the patterns are only tried there; otherwise each
+    pattern scans the text itself.
+    
+    Parameters:
+        text (str): Text to extract from.
+        starts (dict, optional): Position to start matching each pattern at, keyed by pattern name.
+        
+    Returns:
+        dict: The captured group of each match, keyed by pattern name.
+    """
+    starts = starts or {}
+    
+    if ENTITY_KEYWORD_AUTOMATON is None:
+        return {name: pattern.findall(text, starts.get(name, 0)) for name, pattern in ENTITY_PATTERNS.items()}
+    
+    candidates = {name: set() for name in ENTITY_PATTERNS}
+    for end, (offset, names) in ENTITY_KEYWORD_AUTOMATON.iter(text):
+        for name in names:
+            candidates[name].add(end - offset)
+    
+    return {
+        name: findall_at(pattern, text, sorted(candidates[name]), starts.get(name, 0))
+        for name, pattern in ENTITY_PATTERNS.items()
+    }
+
+def findall_at(pattern, text, positions, start=0):
+    """
+    Find the non-overlapping matches of a pattern that start at the given positions.
+    
+    When the positions include everywhere the pattern could start, this gives
+    the same result as pattern.findall(text, start) without scanning the whole text.
+    
+    Parameters:
+        pattern (re.Pattern): Pattern with one capturing group.
+        text (str): Text to match in.
+        positions (list): Candidate start positions, in ascending order.
+        start (int): Position to start matching at.
+        
+    Returns:
+        list: The captured group of each match.
+    """
+    found = []
+    resume_at = start
+    for position in positions:
+        if position < resume_at:
+            continue
+        match = pattern.match(text, position)
+        if match:
+            found.append(match.group(1))
+            resume_at = match.end()
+    
+    return found
+
 def extract_medical_info(title, content):
     """
     Extract medical information from attachment content.
@@ -342,40 +990,50 @@ def extract_medical_info(title, content):
     """
     combined_text = title + " " + content
     
+    # Run every extraction pattern in one pass; events come from the
+    # content only, which starts after the title
+    matches = find_entity_matches(
+        combined_text, {event_type: len(title) + 1 for event_type in EVENT_PATTERNS}
+    )
+    
     # Determine specialty
     specialty = phb_details.determine_specialty(combined_text, title)
     
     # Extract personnel
-    personnel = extract_personnel(combined_text)
+    personnel = extract_personnel(combined_text, matches)
     
     # Extract facilities
-    facilities = extract_facilities(combined_text)
+    facilities = extract_facilities(combined_text, matches)
     
     # Extract significant events
-    events = extract_significant_events(content)
+    events = extract_significant_events(content, matches)
     
     # Extract patient identifiers
-    identifiers = extract_patient_identifiers(combined_text)
+    identifiers = extract_patient_identifiers(combined_text, matches)
     
     # Link to PHB categories
     phb_categories = []
+    cat_seen = set()
     for event in events:
-        categories = phb_details.get_phb_category_for_event(event["content"])
+        categories = _phb_categories_for_event(event["content"])
         if categories:
             for category in categories:
                 # Check if this category is already in the list
-                if not any(cat["category"] == category["category"] for cat in phb_categories):
-                    phb_categories.append(category)
+                if category["category"] not in cat_seen:
+                    cat_seen.add(category["category"])
+                    phb_categories.append(dict(category))
     
     # Link to PHB supports
     phb_supports = []
+    sup_seen = set()
     for event in events:
-        supports = phb_details.get_phb_support_for_event(event["content"])
+        supports = _phb_supports_for_event(event["content"])
         if supports:
             for support in supports:
                 # Check if this support is already in the list
-                if not any(sup["support"] == support["support"] for sup in phb_supports):
-                    phb_supports.append(support)
+                if support["support"] not in sup_seen:
+                    sup_seen.add(support["support"])
+                    phb_supports.append(dict(support))
     
     return {
         "specialty": specialty,
@@ -387,25 +1045,24 @@ def extract_medical_info(title, content):
         "phb_supports": phb_supports
     }
 
-def extract_personnel(text):
+def extract_personnel(text, matches=None):
     """
     Extract and categorize medical personnel from text.
     
     Parameters:
         text (str): Text to extract from.
+        matches (dict, optional): Pattern matches from find_entity_matches, to avoid rescanning the text.
         
     Returns:
         list: List of personnel dictionaries.
     """
-    # Define patterns for different types of personnel - improved to catch more variations
-    doctor_pattern = r'(?:Dr\.?|Doctor|Prof\.?|Professor|Mr\.?|Mrs\.?|Ms\.?|Miss|Consultant|Specialist|Surgeon|Physician)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?(?:\s+[A-Z][a-z]+)?)'
-    nurse_pattern = r'(?:Nurse|Sister|Matron|RN|Staff Nurse|Nursing)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?(?:\s+[A-Z][a-z]+)?)'
-    therapist_pattern = r'(?:Therapist|Physiotherapist|Physio|OT|Occupational Therapist|Speech|SALT|SLT|Psychologist)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?(?:\s+[A-Z][a-z]+)?)'
+    if matches is None:
+        matches = find_entity_matches(text)
     
     # Find all matches
-    doctors = re.findall(doctor_pattern, text)
-    nurses = re.findall(nurse_pattern, text)
-    therapists = re.findall(therapist_pattern, text)
+    doctors = matches["doctor"]
+    nurses = matches["nurse"]
+    therapists = matches["therapist"]
     
     # Normalize names to avoid duplicates with different formats
     doctors = [normalize_name(name) for name in doctors]
@@ -422,10 +1079,10 @@ def extract_personnel(text):
     # Process doctors
     for name in doctors:
         # Skip if this is Adam Vials Moore (the father, not a doctor)
-        if patient_info.is_family_member(name):
+        if _is_family(name):
             continue
             
-        category = phb_details.categorize_personnel(name, "doctor")
+        category = _categorize_personnel(name, "doctor")
         personnel.append({
             "name": name,
             "type": category["type"],
@@ -434,10 +1091,10 @@ def extract_personnel(text):
     
     # Process nurses
     for name in nurses:
-        if patient_info.is_family_member(name):
+        if _is_family(name):
             continue
             
-        category = phb_details.categorize_personnel(name, "nurse")
+        category = _categorize_personnel(name, "nurse")
         personnel.append({
             "name": name,
             "type": category["type"],
@@ -446,10 +1103,10 @@ def extract_personnel(text):
     
     # Process therapists
     for name in therapists:
-        if patient_info.is_family_member(name):
+        if _is_family(name):
             continue
             
-        category = phb_details.categorize_personnel(name, "therapist")
+        category = _categorize_personnel(name, "therapist")
         personnel.append({
             "name": name,
             "type": category["type"],
@@ -482,30 +1139,30 @@ def normalize_name(name):
             name = name[len(title) + 1:]
     
     # Remove extra spaces
-    name = re.sub(r'\s+', ' ', name).strip()
+    name = WHITESPACE_RE.sub(' ', name).strip()
     
     # Capitalize first letter of each word
     name = name.title()
     
     return name
 
-def extract_facilities(text):
+def extract_facilities(text, matches=None):
     """
     Extract and categorize medical facilities from text.
     
     Parameters:
         text (str): Text to extract from.
+        matches (dict, optional): Pattern matches from find_entity_matches, to avoid rescanning the text.
         
     Returns:
         list: List of facility dictionaries.
     """
-    # Define patterns for different types of facilities - improved to catch more variations
-    hospital_pattern = r'(?:Hospital|Medical Center|Medical Centre|Clinic|Centre|Center|NHS Trust|Foundation Trust|Children\'s|Paediatric|Pediatric)(?:[:\s]+)([A-Za-z\s\-\']+)'
-    department_pattern = r'(?:Department|Dept|Ward|Unit|Clinic|Service|Team|Division)(?:[:\s]+)([A-Za-z\s\-\']+)'
+    if matches is None:
+        matches = find_entity_matches(text)
     
     # Find all matches
-    hospitals = re.findall(hospital_pattern, text)
-    departments = re.findall(department_pattern, text)
+    hospitals = matches["hospital"]
+    departments = matches["department"]
     
     # Clean up facility names
     hospitals = [name.strip() for name in hospitals if len(name.strip()) > 2]
@@ -519,7 +1176,7 @@ def extract_facilities(text):
     
     # Process hospitals
     for name in hospitals:
-        category = phb_details.categorize_facility(name)
+        category = _categorize_facility(name)
         facilities.append({
             "name": name,
             "type": category["type"],
@@ -528,7 +1185,7 @@ def extract_facilities(text):
     
     # Process departments
     for name in departments:
-        category = phb_details.categorize_facility(name)
+        category = _categorize_facility(name)
         facilities.append({
             "name": name,
             "type": "Department",
@@ -537,12 +1194,13 @@ def extract_facilities(text):
     
     return facilities
 
-def extract_significant_events(text):
+def extract_significant_events(text, matches=None):
     """
     Extract significant medical events from text.
     
     Parameters:
         text (str): Text to extract from.
+        matches (dict, optional): Pattern matches from find_entity_matches, to avoid rescanning the text.
         
     Returns:
         list: List of event dictionaries.
@@ -550,118 +1208,157 @@ def extract_significant_events(text):
     if not text:
         return []
     
-    events = []
+    if matches is None:
+        matches = find_entity_matches(text)
     
-    # Define patterns for different types of events
-    patterns = {
-        "Appointment": r'(?:Appointment|Visit|Consultation|Follow-up|Review|Assessment|Evaluation|Examination|Check-up|Checkup)(?:\s+with|\s+at|\s+on|\s+for)?(?:[:\s]+)([^\.]+)',
-        "Medication": r'(?:Medication|Prescribed|Taking|Drug|Therapy|Treatment|Dose|Dosage)(?:[:\s]+)([^\.]+)',
-        "Procedure": r'(?:Procedure|Surgery|Operation|Intervention|Treatment)(?:[:\s]+)([^\.]+)',
-        "Diagnosis": r'(?:Diagnosis|Diagnosed with|Assessment|Condition|Problem|Issue|Concern)(?:[:\s]+)([^\.]+)',
-        "Symptom": r'(?:Symptom|Presenting with|Complaining of|Reporting|Experiencing)(?:[:\s]+)([^\.]+)',
-        "Result": r'(?:Result|Finding|Outcome|Report|Test|Investigation|Scan|X-ray|MRI|CT|Ultrasound)(?:[:\s]+)([^\.]+)',
-        "Plan": r'(?:Plan|Recommendation|Advised|Suggested|Proposed|Next steps|Follow-up|Review)(?:[:\s]+)([^\.]+)'
-    }
+    events = []
     
     # Extract events by type
-    for event_type, pattern in patterns.items():
-        matches = re.findall(pattern, text)
-        for match in matches:
+    for event_type in EVENT_PATTERNS:
+        for content in matches[event_type]:
             events.append({
                 "type": event_type,
-                "content": match
+                "content": content
             })
     
     # If no structured events were found, extract sentences with medical keywords
     if not events:
-        # Keywords that might indicate significant events
-        event_keywords = [
-            'diagnosis', 'diagnosed', 'surgery', 'operation', 'procedure', 
-            'admitted', 'admission', 'discharged', 'discharge', 'emergency',
-            'treatment', 'therapy', 'medication', 'prescribed', 'test results',
-            'scan', 'mri', 'ct', 'x-ray', 'ultrasound', 'blood test',
-            'appointment', 'consultation', 'follow-up', 'review', 'referral',
-            'assessment', 'evaluation', 'examination', 'check-up', 'checkup',
-            'symptoms', 'pain', 'discomfort', 'difficulty', 'problem',
-            'improvement', 'deterioration', 'change', 'progress', 'regress',
-            'complication', 'side effect', 'reaction', 'response', 'outcome'
-        ]
-        
         # Extract sentences containing event keywords
-        sentences = re.split(r'[.!?]', text)
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-                
-            for keyword in event_keywords:
-                if keyword in sentence.lower():
-                    events.append({
-                        "type": "General",
-                        "content": sentence
-                    })
-                    break
+        for sentence in find_keyword_sentences(text):
+            events.append({
+                "type": "General",
+                "content": sentence
+            })
     
     return events if events else [{"type": "Unknown", "content": "No specific events extracted"}]
 
-def extract_patient_identifiers(text):
+def find_keyword_sentences(text):
+    """
+    Find the sentences that contain an event keyword, ignoring case.
+    
+    The lowercased text is scanned once for all keywords (with the
+    Aho-Corasick automaton when available), and each match is mapped
+    back to its sentence.
+    
+    Parameters:
+        text (str): Text to search.
+        
+    Returns:
+        list: Stripped sentences containing a keyword, in text order.
+    """
+    text_lower = text.lower()
+    
+    # Lowercasing a few characters changes the text length, so offsets would not line up
+    if len(text_lower) != len(text):
+        sentences = (sentence.strip() for sentence in SENTENCE_SPLIT_RE.split(text))
+        return [sentence for sentence in sentences if sentence and EVENT_KEYWORD_RE.search(sentence.lower())]
+    
+    if EVENT_KEYWORD_AUTOMATON is not None:
+        positions = (end - len(keyword) + 1 for end, keyword in EVENT_KEYWORD_AUTOMATON.iter(text_lower))
+    else:
+        positions = (match.start() for match in EVENT_KEYWORD_RE.finditer(text_lower))
+    
+    # Keywords never contain sentence punctuation, so each match lies inside one sentence
+    boundaries = [match.start() for match in SENTENCE_SPLIT_RE.finditer(text)]
+    sentence_indexes = sorted({bisect_right(boundaries, position) for position in positions})
+    
+    sentences = []
+    for index in sentence_indexes:
+        start = boundaries[index - 1] + 1 if index > 0 else 0
+        end = boundaries[index] if index < len(boundaries) else len(text)
+        sentences.append(text[start:end].strip())
+    
+    return sentences
+
+def extract_patient_identifiers(text, matches=None):
     """
     Extract patient identifiers like NHS number, hospital numbers, etc.
     
     Parameters:
         text (str): Text to extract from.
+        matches (dict, optional): Pattern matches from find_entity_matches, to avoid rescanning the text.
         
     Returns:
         dict: Dictionary with patient identifiers.
     """
+    if matches is None:
+        matches = find_entity_matches(text)
+    
     identifiers = {}
     
-    # NHS Number pattern (10 digits, often with spaces)
-    nhs_pattern = r'(?:NHS|National Health Service|NHS Number|NHS No|NHS #)(?:[:\s]+)([0-9\s]{10,12})'
-    nhs_matches = re.findall(nhs_pattern, text)
+    # NHS Number (10 digits, often with spaces)
+    nhs_matches = matches["nhs_number"]
     if nhs_matches:
         # Clean up the number (remove spaces)
-        nhs_number = re.sub(r'\s', '', nhs_matches[0])
+        nhs_number = WHITESPACE_RE.sub('', nhs_matches[0])
         identifiers["nhs_number"] = nhs_number
     
-    # Hospital Number pattern (varies by hospital, but often alphanumeric)
-    hospital_pattern = r'(?:Hospital Number|Hospital No|Hospital #|Patient Number|Patient ID|MRN|Medical Record Number)(?:[:\s]+)([A-Z0-9\s]{5,12})'
-    hospital_matches = re.findall(hospital_pattern, text)
+    # Hospital Number (varies by hospital, but often alphanumeric)
+    hospital_matches = matches["hospital_number"]
     if hospital_matches:
         hospital_number = hospital_matches[0].strip()
         identifiers["hospital_number"] = hospital_number
     
-    # Alder Hey specific pattern
-    alder_hey_pattern = r'(?:Alder Hey|Alder Hey Number|Alder Hey ID)(?:[:\s]+)([A-Z0-9\s]{5,12})'
-    alder_hey_matches = re.findall(alder_hey_pattern, text)
+    # Alder Hey specific number
+    alder_hey_matches = matches["alder_hey_number"]
     if alder_hey_matches:
         alder_hey_number = alder_hey_matches[0].strip()
         identifiers["alder_hey_number"] = alder_hey_number
     
     return identifiers
 
+def _init_attachment_worker():
+    """
+    Keep OCR single-threaded in each worker, since the workers
+    already use every core, and leave vector storage to the parent.
+    """
+    global OCR_CONCURRENCY, VECTOR_DB_AVAILABLE
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    OCR_CONCURRENCY = 1
+    VECTOR_DB_AVAILABLE = False
+
 def process_all_attachments(events):
     """
     Process all attachments in all events.
     
+    Attachments are independent of each other, so they are processed in
+    parallel across ATTACHMENT_WORKERS processes.
+    
     Parameters:
         events (list): List of events with attachments.
         
     Returns:
         list: Updated events with processed attachments.
     """
+    attachments = [
+        attachment
+        for event in events if "attachments" in event and event["attachments"]
+        for attachment in event["attachments"]
+    ]
+    
+    processed = None
+    if ATTACHMENT_WORKERS > 1 and len(attachments) > 1:
+        # Spawned workers import this module before the initializer runs, so they
+        # are told to skip the embeddings model through their environment
+        os.environ[ATTACHMENT_WORKER_ENV] = "1"
+        try:
+            with ProcessPoolExecutor(max_workers=ATTACHMENT_WORKERS, initializer=_init_attachment_worker) as executor:
+                processed = list(executor.map(process_attachment, attachments, chunksize=4))
+        except Exception as e:
+            print(f"Error processing attachments in parallel, processing serially: {e}")
+        finally:
+            os.environ.pop(ATTACHMENT_WORKER_ENV, None)
+    
+    if processed is None:
+        processed = [process_attachment(attachment) for attachment in attachments]
+    
+    # Put the processed attachments back in order; merging into the events mutates them, so do it serially
+    processed_attachments = iter(processed)
     updated_events = []
     
     for event in events:
-        # Process attachments
         if "attachments" in event and event["attachments"]:
-            processed_attachments = []
-            for attachment in event["attachments"]:
-                processed_attachment = process_attachment(attachment)
-                processed_attachments.append(processed_attachment)
-            
-            event["attachments"] = processed_attachments
+            event["attachments"] = [next(processed_attachments) for _ in event["attachments"]]
             
             # Update event with information from attachments
             update_event_with_attachment_info(event)
@@ -670,6 +1367,16 @@ def process_all_attachments(events):
     
     return updated_events
 
+# Lists merged from attachment medical info into the event, with the field
+# each list is de-duplicated on
+MERGED_INFO_FIELDS = (
+    ("personnel", "name"),
+    ("facilities", "name"),
+    ("events", "content"),
+    ("phb_categories", "category"),
+    ("phb_supports", "support"),
+)
+
 def update_event_with_attachment_info(event):
     """
     Update an event with information extracted from its attachments.
@@ -677,61 +1384,32 @@ def update_event_with_attachment_info(event):
     Parameters:
         event (dict): Event to update.
     """
+    # Keys already present in each merged list, so duplicates are found in O(1)
+    seen = {}
+    
     for attachment in event["attachments"]:
         if "medical_info" not in attachment:
             continue
         
         medical_info = attachment["medical_info"]
         
-        # Add personnel
-        if "personnel" in medical_info and medical_info["personnel"]:
-            if "personnel" not in event:
-                event["personnel"] = []
-            
-            for person in medical_info["personnel"]:
-                # Check if this person is already in the event
-                if not any(p["name"] == person["name"] for p in event["personnel"]):
-                    event["personnel"].append(person)
-        
-        # Add facilities
-        if "facilities" in medical_info and medical_info["facilities"]:
-            if "facilities" not in event:
-                event["facilities"] = []
-            
-            for facility in medical_info["facilities"]:
-                # Check if this facility is already in the event
-                if not any(f["name"] == facility["name"] for f in event["facilities"]):
-                    event["facilities"].append(facility)
-        
-        # Add events
-        if "events" in medical_info and medical_info["events"]:
-            if "events" not in event:
-                event["events"] = []
+        # Add personnel, facilities, events, PHB categories and PHB supports,
+        # skipping items whose key is already in the event
+        for field, key in MERGED_INFO_FIELDS:
+            if field not in medical_info or not medical_info[field]:
+                continue
             
-            for med_event in medical_info["events"]:
-                # Check if this event is already in the event
-                if not any(e["content"] == med_event["content"] for e in event["events"]):
-                    event["events"].append(med_event)
-        
-        # Add PHB categories
-        if "phb_categories" in medical_info and medical_info["phb_categories"]:
-            if "phb_categories" not in event:
-                event["phb_categories"] = []
+            if field not in event:
+                event[field] = []
             
-            for category in medical_info["phb_categories"]:
-                # Check if this category is already in the event
-                if not any(cat["category"] == category["category"] for cat in event["phb_categories"]):
-                    event["phb_categories"].append(category)
-        
-        # Add PHB supports
-        if "phb_supports" in medical_info and medical_info["phb_supports"]:
-            if "phb_supports" not in event:
-                event["phb_supports"] = []
+            if field not in seen:
+                seen[field] = {item[key] for item in event[field]}
+            field_seen = seen[field]
             
-            for support in medical_info["phb_supports"]:
-                # Check if this support is already in the event
-                if not any(sup["support"] == support["support"] for sup in event["phb_supports"]):
-                    event["phb_supports"].append(support)
+            for item in medical_info[field]:
+                if item[key] not in field_seen:
+                    field_seen.add(item[key])
+                    event[field].append(item)
         
         # Add patient identifiers
         if "identifiers" in medical_info and medical_info["identifiers"]:
@@ -742,6 +1420,110 @@ def update_event_with_attachment_info(event):
                 if key not in event["patient_identifiers"]:
                     event["patient_identifiers"][key] = value
 
+# Vector store loaded by load_vector_store, as (index file mtime, store)
+vector_store_cache = None
+vector_store_lock = threading.Lock()
+
+def split_document_text(text):
+    """
+    Split document text into chunks for embedding.
+    
+    Parameters:
+        text (str): Document text.
+        
+    Returns:
+        list: Text chunks.
+    """
+    if CHONKIE_AVAILABLE:
+        return [chunk.text for chunk in text_splitter.chunk(text) if chunk.text.strip()]
+    return text_splitter.split_text(text)
+
+# Number of cached chunk embeddings looked up per query
+EMBEDDING_LOOKUP_BATCH_SIZE = 500
+
+def chunk_embedding_key(text):
+    """
+    Compute the embedding cache key for a chunk of text and the embeddings model.
+    
+    Parameters:
+        text (str): Chunk text.
+        
+    Returns:
+        str: Hex digest identifying the chunk's embedding.
+    """
+    data = f"{EMBEDDING_MODEL_NAME}\n{text}".encode()
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def embed_chunks(texts):
+    """
+    Embed chunks of text, reusing embeddings cached from earlier runs.
+    
+    Only chunks whose content has not been embedded before are passed to the
+    embeddings model; their embeddings are then added to the cache.
+    
+    Parameters:
+        texts (list): Chunk texts.
+        
+    Returns:
+        numpy.ndarray: float32 embedding matrix, one row per chunk.
+    """
+    keys = [chunk_embedding_key(text) for text in texts]
+    unique_keys = list(dict.fromkeys(keys))
+    
+    conn = _get_cache_db()
+    vectors = {}
+    for i in range(0, len(unique_keys), EMBEDDING_LOOKUP_BATCH_SIZE):
+        batch = unique_keys[i:i + EMBEDDING_LOOKUP_BATCH_SIZE]
+        rows = conn.execute(
+            f"SELECT key, vector FROM chunk_embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+        )
+        for key, vector in rows:
+            vectors[key] = np.frombuffer(vector, dtype=np.float32)
+    
+    # Embed each new chunk once, even if it appears several times
+    new_chunks = {key: text for key, text in zip(keys, texts) if key not in vectors}
+    if new_chunks:
+        new_vectors = np.asarray(embeddings.embed_documents(list(new_chunks.values())), dtype=np.float32)
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunk_embeddings (key, vector) VALUES (?, ?)",
+                ((key, vector.tobytes()) for key, vector in zip(new_chunks, new_vectors))
+            )
+        vectors.update(zip(new_chunks, new_vectors))
+    
+    return np.array([vectors[key] for key in keys], dtype=np.float32)
+
+def build_faiss_index(vectors):
+    """
+    Build a FAISS index over chunk embeddings.
+    
+    Small corpora get a flat L2 index; corpora larger than
+    HNSW_MIN_VECTORS get an HNSW graph, which answers queries in
+    roughly logarithmic time. Either way the vectors are stored
+    scalar-quantized to 8 bits per dimension, a quarter of the float32
+    size, and queries are compared against them as float32.
+    
+    Parameters:
+        vectors (numpy.ndarray): float32 embedding matrix, one row per chunk.
+        
+    Returns:
+        faiss.Index: Index containing the vectors in row order.
+    """
+    dim = vectors.shape[1]
+    
+    if len(vectors) > HNSW_MIN_VECTORS:
+        index = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, HNSW_M)
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    else:
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+    
+    # Learn the per-dimension value ranges used for quantization
+    index.train(vectors)
+    index.add(vectors)
+    return index
+
 def create_vector_store(events):
     """
     Create a vector store from all events and their attachments.
@@ -752,6 +1534,8 @@ def create_vector_store(events):
     Returns:
         FAISS: Vector store for semantic search.
     """
+    global vector_store_cache
+    
     if not VECTOR_DB_AVAILABLE:
         print("Vector database functionality not available. Install langchain, langchain-community, and faiss-cpu.")
         return None
@@ -773,7 +1557,10 @@ def create_vector_store(events):
                         "metadata": {
                             "id": event["id"], 
                             "type": "attachment", 
-                            "attachment_index": i
+                            "attachment_index": i,
+                            "file_name": attachment["file_name"],
+                            "file_path": attachment["file_path"],
+                            "mime_type": attachment["mime_type"]
                         }
                     })
     
@@ -782,17 +1569,31 @@ def create_vector_store(events):
     metadatas = []
     
     for doc in documents:
-        chunks = text_splitter.split_text(doc["content"])
+        chunks = split_document_text(doc["content"])
         for chunk in chunks:
             texts.append(chunk)
             metadatas.append(doc["metadata"])
     
     # Create vector store
     try:
-        vector_store = FAISS.from_texts(texts=texts, embedding=embeddings, metadatas=metadatas)
+        vectors = embed_chunks(texts)
+        index = build_faiss_index(vectors)
         
-        # Save vector store
-        vector_store.save_local(VECTOR_DB_PATH)
+        docstore = InMemoryDocstore({
+            str(i): Document(page_content=text, metadata=metadata)
+            for i, (text, metadata) in enumerate(zip(texts, metadatas))
+        })
+        vector_store = FAISS(
+            embedding_function=embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id={i: str(i) for i in range(len(texts))},
+        )
+        
+        # Save vector store, replacing any cached copy of the old one
+        with vector_store_lock:
+            vector_store.save_local(VECTOR_DB_PATH)
+            vector_store_cache = (os.path.getmtime(os.path.join(VECTOR_DB_PATH, "index.faiss")), vector_store)
         
         return vector_store
     except Exception as e:
@@ -803,15 +1604,31 @@ def load_vector_store():
     """
     Load the vector store from disk.
     
+    The loaded store is kept in memory and reused until the index file on
+    disk changes, so repeated searches don't reload it.
+    
     Returns:
         FAISS: Vector store for semantic search.
     """
+    global vector_store_cache
+    
     if not VECTOR_DB_AVAILABLE:
         return None
     
+    index_path = os.path.join(VECTOR_DB_PATH, "index.faiss")
+    
     try:
-        if os.path.exists(os.path.join(VECTOR_DB_PATH, "index.faiss")):
-            return FAISS.load_local(VECTOR_DB_PATH, embeddings)
+        with vector_store_lock:
+            if not os.path.exists(index_path):
+                return None
+            
+            mtime = os.path.getmtime(index_path)
+            if vector_store_cache is None or vector_store_cache[0] != mtime:
+                # The index is written by create_vector_store, so it is trusted
+                vector_store = FAISS.load_local(VECTOR_DB_PATH, embeddings, allow_dangerous_deserialization=True)
+                vector_store_cache = (mtime, vector_store)
+            
+            return vector_store_cache[1]
     except Exception as e:
         print(f"Error loading vector store: {e}")
     
@@ -875,9 +1692,13 @@ def get_ocr_status():
     """
     return {
         "tesseract_available": TESSERACT_AVAILABLE,
+        "tesserocr_available": TESSEROCR_AVAILABLE,
+        "easyocr_available": EASYOCR_AVAILABLE,
+        "ocr_engine": "easyocr" if USE_EASYOCR else "tesseract",
         "pdf_image_available": PDF_IMAGE_AVAILABLE,
         "cv2_available": CV2_AVAILABLE,
         "docx_available": DOCX_AVAILABLE,
         "pdf_available": PDF_AVAILABLE,
+        "pdfium_available": PDFIUM_AVAILABLE,
         "vector_db_available": VECTOR_DB_AVAILABLE
     }
@@ -1,94 +1,381 @@
-import json
+import hashlib
+import importlib.util
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from functools import lru_cache
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from plotly.colors import qualitative
+from plotly.io.json import to_json_plotly
 import os
 
-def load_data():
+# Parquet cache of the parsed data (requires pyarrow, which pandas loads when needed)
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+DATA_FILE = 'gwendolyn_medical_data.json'
+PARQUET_FILE = 'gwendolyn_medical_data.parquet'
+OUTPUT_FILE = 'gwendolyn_medical_timeline_enhanced.html'
+# Key of the inputs the page was last built from (see input_key)
+CACHE_FILE = '.enhanced_timeline.cache'
+EVENT_COLUMNS = ['title', 'date', 'specialty', 'personnel', 'events', 'content']
+HOVER_TEMPLATE = "<b>{t}</b><br>Date: {d}<br>Specialty: {s}<br>Personnel: {p}<br>Events: {e}<br>"
+
+# Page template before the JSON payload; the filter options are filled in with str.format
+HTML_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Gwendolyn Vials Moore - Medical History Timeline</title>
+    <script defer src="https://cdn.plot.ly/plotly-gl2d-2.35.2.min.js"></script>
+    <style>
+        body {{ margin: 0; padding: 0; background-color: #1E1E1E; color: white; font-family: Arial, sans-serif; }}
+        .container {{ width: 95%; margin: 20px auto; }}
+        h1 {{ text-align: center; margin-bottom: 20px; }}
+        .filters {{ margin-bottom: 20px; background-color: #333; padding: 10px; border-radius: 5px; }}
+        .filters label {{ margin-right: 10px; }}
+        select {{ background-color: #444; color: white; padding: 5px; border: none; border-radius: 3px; }}
+        .timeline {{ width: 100%; height: 800px; }}
+        .info-panel {{ background-color: #333; padding: 15px; margin-top: 20px; border-radius: 5px; }}
+        .info-panel h2 {{ margin-top: 0; }}
+        .search-box {{ margin-bottom: 10px; }}
+        .search-box input {{ width: 100%; padding: 8px; background-color: #444; color: white; border: none; border-radius: 3px; }}
+        .details-table {{ width: 100%; border-collapse: collapse; font-size: 11px; }}
+        .details-table th {{ background-color: rgba(50, 50, 50, 1); font-size: 12px; text-align: left; padding: 5px; }}
+        .details-table td {{ background-color: rgba(30, 30, 30, 0.8); text-align: left; padding: 5px; border-top: 1px solid #444; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>Gwendolyn Vials Moore - Medical History Timeline</h1>
+
+        <div class="filters">
+            <label for="specialty-filter">Filter by Specialty:</label>
+            <select id="specialty-filter" onchange="filterBySpecialty()">
+                <option value="all">All Specialties</option>
+                {specialty_options}
+            </select>
+
+            <label for="year-filter" style="margin-left: 20px;">Filter by Year:</label>
+            <select id="year-filter" onchange="filterByYear()">
+                <option value="all">All Years</option>
+                {year_options}
+            </select>
+        </div>
+
+        <div class="search-box">
+            <input type="text" id="search-input" placeholder="Search for keywords in events or titles..." onkeyup="onSearch()">
+        </div>
+
+        <div id="timeline" class="timeline"></div>
+
+        <div class="info-panel">
+            <h2>Event Details</h2>
+            <table id="details-table" class="details-table">
+                <thead>
+                    <tr><th>Date</th><th>Title</th><th>Specialty</th><th>Personnel</th><th>Events</th></tr>
+                </thead>
+                <tbody></tbody>
+            </table>
+        </div>
+
+        <div class="info-panel">
+            <h2>Selected Event Details</h2>
+            <div id="event-details">Click on a point in the timeline to see details</div>
+        </div>
+    </div>
+
+"""
+
+# Page template after the JSON payload
+HTML_FOOTER = """
+    <script>
+        // Store the original figure data
+        let originalData;
+
+        // Read the figure and events from the JSON island
+        const payload = JSON.parse(document.getElementById('figData').textContent);
+
+        // Store the event data, remembering each event's position for click lookups
+        const eventData = payload.events;
+        eventData.forEach((event, i) => { event.index = i; });
+
+        // Lowercase the searchable text of each event once, instead of on every keystroke
+        const searchIndex = eventData.map(event => [event.title, ...event.events, event.content].join('\\n').toLowerCase());
+
+        // Plotly is loaded with defer, so draw the figure once the document has been parsed
+        document.addEventListener('DOMContentLoaded', () => {
+            // Load the Plotly figure; Plotly mutates the layout it is given, so keep the original pristine
+            Plotly.newPlot('timeline', payload.data, structuredClone(payload.layout));
+
+            // Get the original data after plot is created
+            document.getElementById('timeline').on('plotly_afterplot', function() {
+                originalData = document.getElementById('timeline').data;
+            });
+
+            // Handle click events on the timeline
+            document.getElementById('timeline').on('plotly_click', function(data) {
+                const point = data.points[0];
+                if (point.customdata) {
+                    const index = point.customdata[0];
+                    const event = eventData[index];
+
+                    let detailsHtml = `
+                        <h3>${event.title}</h3>
+                        <p><strong>Date:</strong> ${event.date}</p>
+                        <p><strong>Specialty:</strong> ${event.specialty}</p>
+                        <p><strong>Personnel:</strong> ${event.personnel.join(', ')}</p>
+                        <p><strong>Events:</strong></p>
+                        <ul>
+                            ${event.events.map(e => `<li>${e}</li>`).join('')}
+                        </ul>
+                        <p><strong>Content:</strong> ${event.content}</p>
+                    `;
+
+                    document.getElementById('event-details').innerHTML = detailsHtml;
+                }
+            });
+        });
+
+        // Filter by specialty
+        function filterBySpecialty() {
+            const specialty = document.getElementById('specialty-filter').value;
+            const yearFilter = document.getElementById('year-filter').value;
+
+            applyFilters(specialty, yearFilter);
+        }
+
+        // Filter by year
+        function filterByYear() {
+            const specialty = document.getElementById('specialty-filter').value;
+            const year = document.getElementById('year-filter').value;
+
+            applyFilters(specialty, year);
+        }
+
+        // Apply both filters
+        function applyFilters(specialty, year) {
+            let filteredData = eventData;
+
+            // Apply specialty filter
+            if (specialty !== 'all') {
+                filteredData = filteredData.filter(event => event.specialty === specialty);
+            }
+
+            // Apply year filter
+            if (year !== 'all') {
+                filteredData = filteredData.filter(event => (event.date || '').slice(0, 4) === year);
+            }
+
+            // Update the timeline
+            updateTimeline(filteredData);
+        }
+
+        // Wait for typing to pause before searching
+        let searchTimer;
+        function onSearch() {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(searchTimeline, 150);
+        }
+
+        // Search functionality
+        function searchTimeline() {
+            const searchTerm = document.getElementById('search-input').value.toLowerCase();
+
+            if (searchTerm === '') {
+                // Reset to current filters if search is cleared
+                const specialty = document.getElementById('specialty-filter').value;
+                const year = document.getElementById('year-filter').value;
+                applyFilters(specialty, year);
+                return;
+            }
+
+            // Search in title, events, and content
+            const filteredData = eventData.filter((event, i) => searchIndex[i].includes(searchTerm));
+
+            updateTimeline(filteredData);
+        }
+
+        // Position of each specialty's trace in the figure
+        const scatterTraces = [];
+        const slotBySpecialty = {};
+        payload.data.forEach((trace, i) => {
+            if (trace.type === 'scattergl') {
+                slotBySpecialty[trace.name] = scatterTraces.length;
+                scatterTraces.push(i);
+            }
+        });
+
+        // Escape text for use in table cells
+        function escapeHtml(value) {
+            return String(value ?? '').replace(/[&<>"']/g, c => `&#${c.charCodeAt(0)};`);
+        }
+
+        // Fill the details table with the given events
+        function renderTable(filteredData) {
+            document.querySelector('#details-table tbody').innerHTML = filteredData.map(item =>
+                `<tr><td>${escapeHtml(item.date)}</td>` +
+                `<td>${escapeHtml(item.title)}</td>` +
+                `<td>${escapeHtml(item.specialty)}</td>` +
+                `<td>${escapeHtml(item.personnel.join(', '))}</td>` +
+                `<td>${escapeHtml(item.events.slice(0, 2).join(', '))}</td></tr>`
+            ).join('');
+        }
+        renderTable(eventData);
+
+        // Update the timeline with filtered data
+        function updateTimeline(filteredData) {
+            // Split the filtered events across the existing specialty traces
+            const x = scatterTraces.map(() => []);
+            const y = scatterTraces.map(() => []);
+            const text = scatterTraces.map(() => []);
+            const customdata = scatterTraces.map(() => []);
+            filteredData.forEach(row => {
+                const slot = slotBySpecialty[row.specialty];
+                if (slot === undefined) {
+                    return;
+                }
+
+                // Dates are already YYYY-MM-DD strings, which Plotly reads directly
+                const hoverText = `<b>${row.title}</b><br>` +
+                                 `Date: ${row.date}<br>` +
+                                 `Specialty: ${row.specialty}<br>` +
+                                 `Personnel: ${row.personnel.join(', ')}<br>` +
+                                 `Events: ${row.events.slice(0, 2).join(', ')}<br>`;
+
+                x[slot].push(row.date);
+                y[slot].push(row.specialty);
+                text[slot].push(hoverText);
+                customdata[slot].push([row.index]);
+            });
+
+            // Only the points change, so restyle the existing traces instead of rebuilding the figure
+            Plotly.restyle('timeline', {x, y, text, customdata}, scatterTraces);
+
+            // Update the table rows
+            renderTable(filteredData);
+        }
+    </script>
+</body>
+</html>
+"""
+
+@lru_cache(maxsize=4)
+def _load_cached(path, mtime):
+    """
+    Parse the medical data file, memoized on its modification time.
+    
+    Parameters:
+    - path: Path to the JSON data file
+    - mtime: Modification time of the file, used as part of the cache key
+    
+    Returns:
+    - DataFrame with the dates parsed to datetime64
+    """
+    parquet_path = os.path.join(os.path.dirname(path), PARQUET_FILE)
+    
+    # Reuse the typed parquet copy if it is newer than the JSON file
+    if PARQUET_AVAILABLE and os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= mtime:
+        return pd.read_parquet(parquet_path)
+    
+    df = pd.read_json(path, orient='records', convert_dates=False, keep_default_dates=False)
+    
+    # Parse the dates for the whole column at once; cache=True parses each distinct date only once
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', cache=True, errors='coerce')
+    
+    if PARQUET_AVAILABLE:
+        try:
+            df.to_parquet(parquet_path, engine='pyarrow')
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not write {parquet_path}: {e}")
+    
+    return df
+
+def load_data(path=DATA_FILE):
     """Load the medical data from JSON file"""
-    with open('gwendolyn_medical_data.json', 'r') as f:
-        data = json.load(f)
+    # Return a shallow copy so callers cannot modify the cached frame
+    return _load_cached(path, os.path.getmtime(path)).copy(deep=False)
+
+def prepare_dataframe(data):
+    """
+    Sort the events by date and add the derived columns used by the figure and page.
     
-    # Convert date strings to datetime objects
-    for item in data:
-        if item['date']:
-            item['date'] = datetime.strptime(item['date'], '%Y-%m-%d')
+    Parameters:
+    - data: DataFrame (or list of event dicts) with parsed dates
     
-    return data
+    Returns:
+    - New DataFrame numbered in date order
+    """
+    # Convert to DataFrame with only the event columns
+    if isinstance(data, pd.DataFrame):
+        df = data[EVENT_COLUMNS]
+    else:
+        df = pd.DataFrame.from_records(data, columns=EVENT_COLUMNS)
+    
+    # Store specialties as categorical codes for the grouping and comparisons below
+    df = df.astype({'specialty': 'category', 'title': 'string'})
+    
+    # Sort by date (stable, so same-day events keep their file order), numbering the events in date order
+    df = df.sort_values('date', kind='mergesort').reset_index(drop=True)
+    
+    # Format the dates once for the hover text and event data
+    df['date_str'] = df['date'].dt.strftime('%Y-%m-%d').astype(object).where(df['date'].notna(), None)
+    
+    # Derive the year and joined list columns once for reuse below
+    df['year'] = df['date'].dt.year
+    df['personnel_str'] = df['personnel'].str.join(', ')
+    df['events_preview'] = df['events'].str[:2].str.join(', ')
+    
+    return df
 
-def create_enhanced_timeline(data):
-    """Create an enhanced interactive timeline visualization"""
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
+def build_figure(df):
+    """
+    Build the timeline figure.
     
-    # Sort by date
-    df = df.sort_values('date')
+    Parameters:
+    - df: DataFrame returned by prepare_dataframe
     
+    Returns:
+    - Plotly figure with one scatter trace per specialty
+    """
     # Create a color map for specialties
     specialties = df['specialty'].unique()
-    color_map = {specialty: f'rgb({hash(specialty) % 256}, {(hash(specialty) // 256) % 256}, {(hash(specialty) // 65536) % 256})' 
-                for specialty in specialties}
-    
-    # Create figure with subplots
-    fig = make_subplots(
-        rows=2, cols=1,
-        row_heights=[0.7, 0.3],
-        specs=[[{"type": "scatter"}], [{"type": "table"}]],
-        vertical_spacing=0.1,
-        subplot_titles=("Medical Timeline", "Event Details")
-    )
+    palette = qualitative.Dark24
+    color_map = {specialty: palette[i % len(palette)] for i, specialty in enumerate(sorted(specialties))}
+    
+    # Create figure; the event details table is rendered as HTML by the page
+    fig = go.Figure()
+    
+    # Build the hover text for every event from one template, one string per event
+    df['hover_text'] = [
+        HOVER_TEMPLATE.format(t=t, d=d, s=sp, p=p, e=e)
+        for t, d, sp, p, e in zip(
+            df['title'], df['date_str'].fillna(''), df['specialty'], df['personnel_str'], df['events_preview']
+        )
+    ]
     
-    # Add events to the timeline
-    for i, row in df.iterrows():
-        hover_text = f"<b>{row['title']}</b><br>"
-        hover_text += f"Date: {row['date'].strftime('%Y-%m-%d')}<br>"
-        hover_text += f"Specialty: {row['specialty']}<br>"
-        hover_text += f"Personnel: {', '.join(row['personnel'])}<br>"
-        hover_text += f"Events: {', '.join(row['events'][:2])}<br>"
-        
+    # Add events to the timeline, one WebGL trace per specialty
+    trace_specialties = []
+    for specialty, group in df.groupby('specialty', sort=True, observed=True):
+        trace_specialties.append(specialty)
         fig.add_trace(
-            go.Scatter(
-                x=[row['date']],
-                y=[row['specialty']],
+            go.Scattergl(
+                x=group['date'],
+                y=group['specialty'],
                 mode='markers',
                 marker=dict(
                     size=15,
-                    color=color_map[row['specialty']],
+                    color=color_map[specialty],
                     line=dict(width=2, color='DarkSlateGrey')
                 ),
-                name=row['title'],
-                text=hover_text,
+                name=specialty,
+                text=group['hover_text'],
                 hoverinfo='text',
-                customdata=[i]  # Store the index for filtering
-            ),
-            row=1, col=1
+                customdata=[[i] for i in group.index]  # Store the index for filtering
+            )
         )
     
-    # Add table for details
-    fig.add_trace(
-        go.Table(
-            header=dict(
-                values=["Date", "Title", "Specialty", "Personnel", "Events"],
-                fill_color='rgba(50, 50, 50, 1)',
-                align='left',
-                font=dict(color='white', size=12)
-            ),
-            cells=dict(
-                values=[
-                    df['date'].dt.strftime('%Y-%m-%d'),
-                    df['title'],
-                    df['specialty'],
-                    [', '.join(p) for p in df['personnel']],
-                    [', '.join(e[:2]) for e in df['events']]
-                ],
-                fill_color='rgba(30, 30, 30, 0.8)',
-                align='left',
-                font=dict(color='white', size=11)
-            )
-        ),
-        row=2, col=1
-    )
+    # Visibility mask per specialty button, compared once against the trace order
+    sp_arr = np.asarray(trace_specialties, dtype=object)
+    visibility = {specialty: (sp_arr == specialty).tolist() for specialty in trace_specialties}
     
     # Update layout
     fig.update_layout(
@@ -119,7 +406,7 @@ def create_enhanced_timeline(data):
             categoryorder='category ascending'
         ),
         hovermode='closest',
-        height=1000,
+        height=700,
         template='plotly_dark',
         margin=dict(t=100, b=0, l=0, r=0),
         showlegend=False,
@@ -133,13 +420,13 @@ def create_enhanced_timeline(data):
                     dict(
                         label="All Specialties",
                         method="update",
-                        args=[{"visible": [True] * len(df) + [True]}]
+                        args=[{"visible": [True] * len(trace_specialties)}]
                     )
                 ] + [
                     dict(
                         label=specialty,
                         method="update",
-                        args=[{"visible": [row['specialty'] == specialty for _, row in df.iterrows()] + [True]}]
+                        args=[{"visible": visibility[specialty]}]
                     ) for specialty in sorted(specialties) if specialty != "Unknown"
                 ]
             )
@@ -147,24 +434,25 @@ def create_enhanced_timeline(data):
     )
     
     # Add annotations for significant events
-    significant_years = df.groupby(df['date'].dt.year).size().sort_values(ascending=False).head(3).index.tolist()
-    
-    for year in significant_years:
-        year_data = df[df['date'].dt.year == year]
-        if not year_data.empty:
-            max_events = year_data.iloc[0]
-            fig.add_annotation(
-                x=max_events['date'],
-                y=max_events['specialty'],
-                text=f"Significant activity in {year}",
-                showarrow=True,
-                arrowhead=2,
-                arrowsize=1,
-                arrowwidth=2,
-                arrowcolor="white",
-                ax=0,
-                ay=-40
-            )
+    year_counts = df['year'].value_counts().head(3)
+    
+    # First (earliest) event of each year, found in one pass
+    first_per_year = df.drop_duplicates('year').set_index('year')
+    
+    for year in year_counts.index:
+        max_events = first_per_year.loc[year]
+        fig.add_annotation(
+            x=max_events['date'],
+            y=max_events['specialty'],
+            text=f"Significant activity in {year}",
+            showarrow=True,
+            arrowhead=2,
+            arrowsize=1,
+            arrowwidth=2,
+            arrowcolor="white",
+            ax=0,
+            ay=-40
+        )
     
     # Add instructions
     fig.add_annotation(
@@ -182,262 +470,154 @@ def create_enhanced_timeline(data):
         borderpad=4
     )
     
-    # Save the figure as JSON for the HTML template
-    fig_json = fig.to_json()
-    fig_dict = json.loads(fig_json)
-    
-    # Convert data to JSON for JavaScript
-    data_json = []
-    for item in data:
-        data_json.append({
-            'title': item['title'],
-            'date': item['date'].strftime('%Y-%m-%d') if item['date'] else None,
-            'specialty': item['specialty'],
-            'personnel': item['personnel'],
-            'events': item['events'],
-            'content': item['content']
-        })
-    
-    # Create the HTML content with the JSON data embedded
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Gwendolyn Vials Moore - Medical History Timeline</title>
-        <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
-        <style>
-            body {{ margin: 0; padding: 0; background-color: #1E1E1E; color: white; font-family: Arial, sans-serif; }}
-            .container {{ width: 95%; margin: 20px auto; }}
-            h1 {{ text-align: center; margin-bottom: 20px; }}
-            .filters {{ margin-bottom: 20px; background-color: #333; padding: 10px; border-radius: 5px; }}
-            .filters label {{ margin-right: 10px; }}
-            select {{ background-color: #444; color: white; padding: 5px; border: none; border-radius: 3px; }}
-            .timeline {{ width: 100%; height: 800px; }}
-            .info-panel {{ background-color: #333; padding: 15px; margin-top: 20px; border-radius: 5px; }}
-            .info-panel h2 {{ margin-top: 0; }}
-            .search-box {{ margin-bottom: 10px; }}
-            .search-box input {{ width: 100%; padding: 8px; background-color: #444; color: white; border: none; border-radius: 3px; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>Gwendolyn Vials Moore - Medical History Timeline</h1>
-            
-            <div class="filters">
-                <label for="specialty-filter">Filter by Specialty:</label>
-                <select id="specialty-filter" onchange="filterBySpecialty()">
-                    <option value="all">All Specialties</option>
-                    {' '.join([f'<option value="{s}">{s}</option>' for s in sorted(specialties) if s != "Unknown"])}
-                </select>
-                
-                <label for="year-filter" style="margin-left: 20px;">Filter by Year:</label>
-                <select id="year-filter" onchange="filterByYear()">
-                    <option value="all">All Years</option>
-                    {' '.join([f'<option value="{y}">{y}</option>' for y in sorted(df['date'].dt.year.unique())])}
-                </select>
-            </div>
-            
-            <div class="search-box">
-                <input type="text" id="search-input" placeholder="Search for keywords in events or titles..." onkeyup="searchTimeline()">
-            </div>
-            
-            <div id="timeline" class="timeline"></div>
-            
-            <div class="info-panel">
-                <h2>Selected Event Details</h2>
-                <div id="event-details">Click on a point in the timeline to see details</div>
-            </div>
-        </div>
-        
-        <script>
-            // Store the original figure data
-            let originalData;
-            
-            // Store the event data
-            const eventData = {json.dumps(data_json)};
-            
-            // Load the Plotly figure
-            Plotly.newPlot('timeline', {json.dumps(fig_dict['data'])}, {json.dumps(fig_dict['layout'])});
-            
-            // Get the original data after plot is created
-            document.getElementById('timeline').on('plotly_afterplot', function() {{
-                originalData = document.getElementById('timeline').data;
-            }});
-            
-            // Handle click events on the timeline
-            document.getElementById('timeline').on('plotly_click', function(data) {{
-                const point = data.points[0];
-                if (point.customdata) {{
-                    const index = point.customdata[0];
-                    const event = eventData[index];
-                    
-                    let detailsHtml = `
-                        <h3>${{event.title}}</h3>
-                        <p><strong>Date:</strong> ${{event.date}}</p>
-                        <p><strong>Specialty:</strong> ${{event.specialty}}</p>
-                        <p><strong>Personnel:</strong> ${{event.personnel.join(', ')}}</p>
-                        <p><strong>Events:</strong></p>
-                        <ul>
-                            ${{event.events.map(e => `<li>${{e}}</li>`).join('')}}
-                        </ul>
-                        <p><strong>Content:</strong> ${{event.content}}</p>
-                    `;
-                    
-                    document.getElementById('event-details').innerHTML = detailsHtml;
-                }}
-            }});
-            
-            // Filter by specialty
-            function filterBySpecialty() {{
-                const specialty = document.getElementById('specialty-filter').value;
-                const yearFilter = document.getElementById('year-filter').value;
-                
-                applyFilters(specialty, yearFilter);
-            }}
-            
-            // Filter by year
-            function filterByYear() {{
-                const specialty = document.getElementById('specialty-filter').value;
-                const year = document.getElementById('year-filter').value;
-                
-                applyFilters(specialty, year);
-            }}
-            
-            // Apply both filters
-            function applyFilters(specialty, year) {{
-                let filteredData = eventData;
-                
-                // Apply specialty filter
-                if (specialty !== 'all') {{
-                    filteredData = filteredData.filter(event => event.specialty === specialty);
-                }}
-                
-                // Apply year filter
-                if (year !== 'all') {{
-                    filteredData = filteredData.filter(event => {{
-                        const eventDate = new Date(event.date);
-                        return eventDate.getFullYear().toString() === year;
-                    }});
-                }}
-                
-                // Update the timeline
-                updateTimeline(filteredData);
-            }}
-            
-            // Search functionality
-            function searchTimeline() {{
-                const searchTerm = document.getElementById('search-input').value.toLowerCase();
-                
-                if (searchTerm === '') {{
-                    // Reset to current filters if search is cleared
-                    const specialty = document.getElementById('specialty-filter').value;
-                    const year = document.getElementById('year-filter').value;
-                    applyFilters(specialty, year);
-                    return;
-                }}
-                
-                // Search in title, events, and content
-                const filteredData = eventData.filter(event => {{
-                    return event.title.toLowerCase().includes(searchTerm) || 
-                           event.events.some(e => e.toLowerCase().includes(searchTerm)) ||
-                           (event.content && event.content.toLowerCase().includes(searchTerm));
-                }});
-                
-                updateTimeline(filteredData);
-            }}
-            
-            // Update the timeline with filtered data
-            function updateTimeline(filteredData) {{
-                // Create new traces for the filtered data
-                const traces = [];
-                
-                // Get the color map
-                const specialties = [...new Set(filteredData.map(item => item.specialty))];
-                const colorMap = {{}};
-                specialties.forEach(specialty => {{
-                    const hash = specialty.split('').reduce((acc, char) => {{
-                        return acc + char.charCodeAt(0);
-                    }}, 0);
-                    colorMap[specialty] = `rgb(${{hash % 256}}, ${{(hash / 256) % 256}}, ${{(hash / 65536) % 256}})`;
-                }});
-                
-                // Create scatter plot traces
-                filteredData.forEach((row, i) => {{
-                    const date = new Date(row.date);
-                    
-                    const hoverText = `<b>${{row.title}}</b><br>` +
-                                     `Date: ${{date.toISOString().split('T')[0]}}<br>` +
-                                     `Specialty: ${{row.specialty}}<br>` +
-                                     `Personnel: ${{row.personnel.join(', ')}}<br>` +
-                                     `Events: ${{row.events.slice(0, 2).join(', ')}}<br>`;
-                    
-                    traces.push({{
-                        x: [date],
-                        y: [row.specialty],
-                        mode: 'markers',
-                        marker: {{
-                            size: 15,
-                            color: colorMap[row.specialty],
-                            line: {{width: 2, color: 'DarkSlateGrey'}}
-                        }},
-                        name: row.title,
-                        text: hoverText,
-                        hoverinfo: 'text',
-                        customdata: [i]
-                    }});
-                }});
-                
-                // Create table trace
-                const tableTrace = {{
-                    type: 'table',
-                    header: {{
-                        values: ["Date", "Title", "Specialty", "Personnel", "Events"],
-                        fill: {{color: 'rgba(50, 50, 50, 1)'}},
-                        align: 'left',
-                        font: {{color: 'white', size: 12}}
-                    }},
-                    cells: {{
-                        values: [
-                            filteredData.map(item => new Date(item.date).toISOString().split('T')[0]),
-                            filteredData.map(item => item.title),
-                            filteredData.map(item => item.specialty),
-                            filteredData.map(item => item.personnel.join(', ')),
-                            filteredData.map(item => item.events.slice(0, 2).join(', '))
-                        ],
-                        fill: {{color: 'rgba(30, 30, 30, 0.8)'}},
-                        align: 'left',
-                        font: {{color: 'white', size: 11}}
-                    }}
-                }};
-                
-                // Add the table trace
-                traces.push(tableTrace);
-                
-                // Update the plot with new data
-                Plotly.react('timeline', traces, {json.dumps(fig_dict['layout'])});
-            }}
-        </script>
-    </body>
-    </html>
+    return fig
+
+@lru_cache(maxsize=4)
+def _build_cached(path, mtime):
+    """
+    Load the data and build the figure, memoized on the data file's modification time.
+    
+    Parameters:
+    - path: Path to the JSON data file
+    - mtime: Modification time of the file, used as part of the cache key
+    
+    Returns:
+    - Tuple of (prepared DataFrame, figure)
+    """
+    df = prepare_dataframe(load_data(path))
+    return df, build_figure(df)
+
+def render_html(fig, df):
     """
+    Render the timeline page.
+    
+    Parameters:
+    - fig: Figure returned by build_figure
+    - df: DataFrame the figure was built from
+    
+    Returns:
+    - Iterator over the pieces of the HTML page, so the page is never held as one string
+    """
+    # Convert data to JSON for JavaScript, in the same order as the customdata indexes
+    data_json = (
+        df[['title', 'date_str', 'specialty', 'personnel', 'events', 'content']]
+        .rename(columns={'date_str': 'date'})
+        .to_dict(orient='records')
+    )
     
-    # Write the HTML file
-    with open('gwendolyn_medical_timeline_enhanced.html', 'w') as f:
-        f.write(html_content)
+    # Serialize the figure and events once into a single JSON island;
+    # plotly uses orjson when it is installed and escapes '<', '>' and '/' so
+    # the payload cannot close the script tag
+    fig_dict = fig.to_plotly_json()
+    fig_payload = to_json_plotly({
+        'data': fig_dict['data'],
+        'layout': fig_dict['layout'],
+        'events': data_json
+    })
     
-    print("Enhanced timeline saved to gwendolyn_medical_timeline_enhanced.html")
+    # Fill in the filter options; the static template around the payload is never copied
+    yield HTML_HEADER.format(
+        specialty_options=' '.join([f'<option value="{s}">{s}</option>' for s in sorted(df['specialty'].unique()) if s != "Unknown"]),
+        year_options=' '.join([f'<option value="{y}">{y}</option>' for y in sorted(df['year'].unique())])
+    )
+    yield '    <script id="figData" type="application/json">'
+    yield fig_payload
+    yield '</script>\n'
+    yield HTML_FOOTER
+
+def _file_digest(path):
+    """Return the BLAKE2b digest of a file, or None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+    
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.digest()
+
+def save(path, html):
+    """
+    Write the rendered page to disk, leaving the existing file untouched if the content is unchanged.
+    
+    Parameters:
+    - path: Output HTML path
+    - html: String or iterable of strings from render_html
+    
+    Returns:
+    - True if the file was written, False if it already had the same content
+    """
+    if isinstance(html, str):
+        html = [html]
+    
+    # Stream the page to a temporary file, hashing it as it is written
+    tmp_path = path + '.tmp'
+    digest = hashlib.blake2b()
+    with open(tmp_path, 'wb', buffering=1 << 20) as f:
+        for chunk in html:
+            data = chunk.encode('utf-8')
+            digest.update(data)
+            f.write(data)
+    
+    # Keep the existing file (and its mtime) so downstream caches stay valid
+    if digest.digest() == _file_digest(path):
+        os.remove(tmp_path)
+        return False
+    
+    os.replace(tmp_path, path)
+    return True
+
+def create_enhanced_timeline(data):
+    """Create an enhanced interactive timeline visualization"""
+    df = prepare_dataframe(data)
+    fig = build_figure(df)
+    if save(OUTPUT_FILE, render_html(fig, df)):
+        print(f"Enhanced timeline saved to {OUTPUT_FILE}")
+    else:
+        print(f"Enhanced timeline unchanged, kept {OUTPUT_FILE}")
+
+def input_key(paths):
+    """
+    Hash the mtime and size of the files a page is built from.
+    
+    Parameters:
+    - paths: Paths of the input files
+    
+    Returns:
+    - Hex digest that changes whenever one of the files does
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        st = os.stat(path)
+        h.update(f"{path}:{st.st_mtime_ns}:{st.st_size}\n".encode())
+    return h.hexdigest()
 
 def main():
     # Check if data file exists
-    if not os.path.exists('gwendolyn_medical_data.json'):
+    if not os.path.exists(DATA_FILE):
         print("Error: gwendolyn_medical_data.json not found. Run parse_enex.py first.")
         return
     
-    # Load data
-    data = load_data()
+    # Skip the rebuild if the page was built from exactly these inputs; save() keeps
+    # an unchanged page's old mtime, so the page's own mtime cannot be compared
+    key = input_key([DATA_FILE, __file__])
+    if os.path.exists(OUTPUT_FILE) and os.path.exists(CACHE_FILE):
+        with open(CACHE_FILE, 'r') as f:
+            if f.readline().strip() == key:
+                print(f"{OUTPUT_FILE} is up to date")
+                return
+    
+    # Load the data and build the figure
+    df, fig = _build_cached(DATA_FILE, os.path.getmtime(DATA_FILE))
     
     # Create enhanced timeline
-    create_enhanced_timeline(data)
+    if save(OUTPUT_FILE, render_html(fig, df)):
+        print(f"Enhanced timeline saved to {OUTPUT_FILE}")
+    else:
+        print(f"Enhanced timeline unchanged, kept {OUTPUT_FILE}")
+    
+    with open(CACHE_FILE, 'w') as f:
+        f.write(key + '\n')
 
 if __name__ == "__main__":
     main()
@@ -1,161 +1,584 @@
 #!/usr/bin/env python3
+import gzip
+import hashlib
 import json
+import numpy as np
 import pandas as pd
-from datetime import datetime
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from plotly.io.json import to_json_plotly
 import os
+import zlib
 import phb_details
 
+# Brotli is optional; without it only the gzip copy of the page is written
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+OUTPUT_FILE = 'gwendolyn_medical_timeline_phb.html'
+
+# Event data and figure the page fetches when it loads
+DATA_OUTPUT_FILE = 'gwendolyn_medical_timeline_phb.data.json'
+
+# Holds the key of the inputs the current page was built from
+CACHE_FILE = '.phb_timeline.cache'
+
+# The PHB categories and supports never change at run time, so take their items once
+PHB_CATEGORY_ITEMS = tuple(phb_details.PHB_CATEGORIES.items())
+PHB_SUPPORT_ITEMS = tuple(phb_details.PHB_SUPPORTS.items())
+
+# Optional event fields copied into the page's event data when present
+EXTRA_EVENT_FIELDS = ['personnel', 'hospitals', 'appointments', 'dates',
+                      'medications', 'procedures', 'diagnoses', 'events',
+                      'phb_categories', 'phb_supports']
+
+# Page template before the data script; the filter options and PHB panels are filled in with str.format
+HTML_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+    <title>Gwendolyn Vials Moore - Medical History Timeline with PHB Integration</title>
+    <script src="https://cdn.plot.ly/plotly-gl2d-2.35.2.min.js"></script>
+    <style>
+        body {{ margin: 0; padding: 0; background-color: #1E1E1E; color: white; font-family: Arial, sans-serif; }}
+        .container {{ width: 95%; margin: 20px auto; }}
+        h1 {{ text-align: center; margin-bottom: 20px; }}
+        .filters {{ margin-bottom: 20px; background-color: #333; padding: 10px; border-radius: 5px; }}
+        .filters label {{ margin-right: 10px; }}
+        select {{ background-color: #444; color: white; padding: 5px; border: none; border-radius: 3px; }}
+        .timeline {{ width: 100%; height: 800px; }}
+        .info-panel {{ background-color: #333; padding: 15px; margin-top: 20px; border-radius: 5px; }}
+        .info-panel h2 {{ margin-top: 0; }}
+        .search-box {{ margin-bottom: 10px; }}
+        .search-box input {{ width: 100%; padding: 8px; background-color: #444; color: white; border: none; border-radius: 3px; }}
+        .details-table {{ width: 100%; border-collapse: collapse; font-size: 11px; }}
+        .details-table th {{ background-color: rgba(50, 50, 50, 1); font-size: 12px; text-align: left; padding: 5px; }}
+        .details-table td {{ background-color: rgba(30, 30, 30, 0.8); text-align: left; padding: 5px; border-top: 1px solid #444; }}
+        .phb-panel {{ background-color: #333; padding: 15px; margin-top: 20px; border-radius: 5px; }}
+        .phb-panel h2 {{ margin-top: 0; }}
+        .phb-category {{ margin-bottom: 10px; padding: 10px; border-radius: 5px; }}
+        .severity-SEVERE {{ background-color: rgba(255, 0, 0, 0.3); }}
+        .severity-HIGH {{ background-color: rgba(255, 165, 0, 0.3); }}
+        .severity-MODERATE {{ background-color: rgba(255, 255, 0, 0.3); }}
+        .tab-container {{ display: flex; margin-bottom: 10px; }}
+        .tab {{ padding: 10px 20px; background-color: #444; margin-right: 5px; cursor: pointer; border-radius: 5px 5px 0 0; }}
+        .tab.active {{ background-color: #555; }}
+        .tab-content {{ display: none; }}
+        .tab-content.active {{ display: block; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>Gwendolyn Vials Moore - Medical History Timeline with PHB Integration</h1>
+
+        <div class="tab-container">
+            <div class="tab active" onclick="openTab(event, 'timeline-tab')">Timeline</div>
+            <div class="tab" onclick="openTab(event, 'phb-tab')">PHB Details</div>
+        </div>
+
+        <div id="timeline-tab" class="tab-content active">
+            <div class="filters">
+                <label for="specialty-filter">Filter by Specialty:</label>
+                <select id="specialty-filter" onchange="filterBySpecialty()">
+                    <option value="all">All Specialties</option>
+                    {specialty_options}
+                </select>
+
+                <label for="year-filter" style="margin-left: 20px;">Filter by Year:</label>
+                <select id="year-filter" onchange="filterByYear()">
+                    <option value="all">All Years</option>
+                    {year_options}
+                </select>
+
+                <label for="phb-filter" style="margin-left: 20px;">Filter by PHB Category:</label>
+                <select id="phb-filter" onchange="filterByPHB()">
+                    <option value="all">All PHB Categories</option>
+                    {phb_options}
+                </select>
+            </div>
+
+            <div class="search-box">
+                <input type="text" id="search-input" placeholder="Search for keywords in events, titles, or PHB categories..." oninput="onSearch()">
+            </div>
+
+            <div id="timeline" class="timeline"></div>
+
+            <div class="info-panel">
+                <h2>Event Details</h2>
+                <table id="event-table" class="details-table">
+                    <thead>
+                        <tr><th>Date</th><th>Title</th><th>Specialty</th><th>PHB Categories</th></tr>
+                    </thead>
+                    <tbody></tbody>
+                </table>
+            </div>
+
+            <div class="info-panel">
+                <h2>Selected Event Details</h2>
+                <div id="event-details">Click on a point in the timeline to see details</div>
+            </div>
+        </div>
+
+        <div id="phb-tab" class="tab-content">
+            <div class="phb-panel">
+                <h2>Public Health Budget (PHB) Categories</h2>
+                <div id="phb-categories">
+                    {phb_categories_html}
+                </div>
+
+                <h2>PHB Supports</h2>
+                <div id="phb-supports">
+                    {phb_supports_html}
+                </div>
+            </div>
+        </div>
+    </div>
+
+"""
+
+# Page template after the data script (which defines dataFile, the name of the page's data file)
+HTML_FOOTER = """    <script>
+        // Store the original figure data
+        let originalData;
+
+        // Filled in once the data file has loaded
+        let eventData = [];
+        let colorMap = {};
+        let searchIndex = [];
+
+        // Fetch the events and figure from the data file next to this page, so the
+        // browser parses them apart from the HTML
+        fetch(dataFile)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(payload => {
+                eventData = payload.events;
+                colorMap = payload.colors;
+                initTimeline(payload.data, payload.layout);
+            })
+            .catch(error => {
+                // Missing file, server error, or a page opened from file:// (where browsers block fetch)
+                console.error(`Could not load ${dataFile}:`, error);
+                const message = document.createElement('p');
+                message.style.padding = '20px';
+                message.textContent = `Could not load ${dataFile} (${error.message}). ` +
+                    'Serve this page over HTTP (e.g. with view_phb_timeline.py) next to its data file.';
+                document.getElementById('timeline').replaceChildren(message);
+            });
+
+        // Build the timeline, table and search index from the loaded data
+        function initTimeline(figureData, figureLayout) {
+            // Remember each event's position for click lookups
+            eventData.forEach((event, i) => { event.index = i; });
+
+            // Lowercase the searchable text of each event once, instead of on every keystroke
+            searchIndex = eventData.map(e => [
+                e.title,
+                e.content,
+                ...(e.events || []),
+                ...(e.phb_categories || []).flatMap(c => [c.category, c.description]),
+                ...(e.phb_supports || []).flatMap(s => [s.support, s.description])
+            ].join('\\u0001').toLowerCase());
+
+            // Draw the Plotly figure
+            Plotly.newPlot('timeline', figureData, figureLayout);
+
+            // Get the original data after plot is created
+            document.getElementById('timeline').on('plotly_afterplot', function() {
+                originalData = document.getElementById('timeline').data;
+            });
+
+            // Handle click events on the timeline
+            document.getElementById('timeline').on('plotly_click', function(data) {
+                const point = data.points[0];
+                if (point.customdata) {
+                    const index = point.customdata[0];
+                    const event = eventData[index];
+
+                    let detailsHtml = `
+                        <h3>${event.title}</h3>
+                        <p><strong>Date:</strong> ${event.date}</p>
+                        <p><strong>Specialty:</strong> ${event.specialty}</p>
+                    `;
+
+                    if (event.personnel) {
+                        detailsHtml += `<p><strong>Personnel:</strong> ${event.personnel.join(', ')}</p>`;
+                    }
+
+                    if (event.hospitals) {
+                        detailsHtml += `<p><strong>Hospitals:</strong> ${event.hospitals.join(', ')}</p>`;
+                    }
+
+                    if (event.appointments) {
+                        detailsHtml += `<p><strong>Appointments:</strong> ${event.appointments.join(', ')}</p>`;
+                    }
+
+                    if (event.medications) {
+                        detailsHtml += `<p><strong>Medications:</strong> ${event.medications.join(', ')}</p>`;
+                    }
+
+                    if (event.procedures) {
+                        detailsHtml += `<p><strong>Procedures:</strong> ${event.procedures.join(', ')}</p>`;
+                    }
+
+                    if (event.diagnoses) {
+                        detailsHtml += `<p><strong>Diagnoses:</strong> ${event.diagnoses.join(', ')}</p>`;
+                    }
+
+                    if (event.events) {
+                        detailsHtml += `<p><strong>Events:</strong></p><ul>`;
+                        event.events.forEach(e => {
+                            detailsHtml += `<li>${e}</li>`;
+                        });
+                        detailsHtml += `</ul>`;
+                    }
+
+                    if (event.phb_categories && event.phb_categories.length > 0) {
+                        detailsHtml += `<p><strong>PHB Categories:</strong></p><ul>`;
+                        event.phb_categories.forEach(cat => {
+                            detailsHtml += `<li>${cat.category} (${cat.severity}): ${cat.description}</li>`;
+                        });
+                        detailsHtml += `</ul>`;
+                    }
+
+                    if (event.phb_supports && event.phb_supports.length > 0) {
+                        detailsHtml += `<p><strong>PHB Supports:</strong></p><ul>`;
+                        event.phb_supports.forEach(sup => {
+                            detailsHtml += `<li>${sup.support}: ${sup.description}</li>`;
+                        });
+                        detailsHtml += `</ul>`;
+                    }
+
+                    detailsHtml += `<p><strong>Content:</strong> ${event.content}</p>`;
+
+                    document.getElementById('event-details').innerHTML = detailsHtml;
+                }
+            });
+
+            // Start the table with every event in date order, as in the plot
+            renderTable(eventData.slice().sort((a, b) => (a.date || '').localeCompare(b.date || '')));
+        }
+
+        // Filter by specialty
+        function filterBySpecialty() {
+            const specialty = document.getElementById('specialty-filter').value;
+            const yearFilter = document.getElementById('year-filter').value;
+            const phbFilter = document.getElementById('phb-filter').value;
+
+            applyFilters(specialty, yearFilter, phbFilter);
+        }
+
+        // Filter by year
+        function filterByYear() {
+            const specialty = document.getElementById('specialty-filter').value;
+            const year = document.getElementById('year-filter').value;
+            const phbFilter = document.getElementById('phb-filter').value;
+
+            applyFilters(specialty, year, phbFilter);
+        }
+
+        // Filter by PHB category
+        function filterByPHB() {
+            const specialty = document.getElementById('specialty-filter').value;
+            const year = document.getElementById('year-filter').value;
+            const phbCategory = document.getElementById('phb-filter').value;
+
+            applyFilters(specialty, year, phbCategory);
+        }
+
+        // Apply all filters
+        function applyFilters(specialty, year, phbCategory) {
+            let filteredData = eventData;
+
+            // Apply specialty filter
+            if (specialty !== 'all') {
+                filteredData = filteredData.filter(event => event.specialty === specialty);
+            }
+
+            // Apply year filter
+            if (year !== 'all') {
+                filteredData = filteredData.filter(event => event.date && event.date.slice(0, 4) === year);
+            }
+
+            // Apply PHB category filter
+            if (phbCategory !== 'all') {
+                filteredData = filteredData.filter(event => {
+                    if (!event.phb_categories) return false;
+                    return event.phb_categories.some(cat => cat.category === phbCategory);
+                });
+            }
+
+            // Update the timeline
+            updateTimeline(filteredData);
+        }
+
+        // Wait for typing to pause before searching
+        let searchTimer;
+        function onSearch() {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(searchTimeline, 120);
+        }
+
+        // Search functionality
+        function searchTimeline() {
+            const searchTerm = document.getElementById('search-input').value.toLowerCase();
+
+            if (searchTerm === '') {
+                // Reset to current filters if search is cleared
+                const specialty = document.getElementById('specialty-filter').value;
+                const year = document.getElementById('year-filter').value;
+                const phbCategory = document.getElementById('phb-filter').value;
+                applyFilters(specialty, year, phbCategory);
+                return;
+            }
+
+            // Search in title, events, content, and PHB categories
+            const filteredData = eventData.filter((event, i) => searchIndex[i].includes(searchTerm));
+
+            updateTimeline(filteredData);
+        }
+
+        // Update the timeline with filtered data
+        function updateTimeline(filteredData) {
+            // Collect the filtered points for the events trace
+            const x = [];
+            const y = [];
+            const sizes = [];
+            const colors = [];
+            const text = [];
+            const customdata = [];
+            filteredData.forEach(row => {
+                // Prepare hover text; the dates arrive as YYYY-MM-DD strings
+                let hoverText = `<b>${row.title}</b><br>` +
+                               `Date: ${row.date || ''}<br>` +
+                               `Specialty: ${row.specialty}<br>`;
+
+                if (row.personnel) {
+                    hoverText += `Personnel: ${row.personnel.join(', ')}<br>`;
+                }
+
+                if (row.events) {
+                    hoverText += `Events: ${row.events.slice(0, 2).join(', ')}<br>`;
+                }
+
+                if (row.phb_categories && row.phb_categories.length > 0) {
+                    const phbCats = row.phb_categories.map(cat => `${cat.category} (${cat.severity})`);
+                    hoverText += `PHB Categories: ${phbCats.join(', ')}<br>`;
+                }
+
+                // Determine marker size based on PHB relevance
+                let markerSize = 15;
+                if (row.phb_categories && row.phb_categories.length > 0) {
+                    markerSize = 20;
+                }
+
+                x.push(row.date);
+                y.push(row.specialty);
+                sizes.push(markerSize);
+                colors.push(colorMap[row.specialty]);
+                text.push(hoverText);
+                customdata.push([row.index]);
+            });
+
+            // Only the points change, so restyle the events trace (0) instead of rebuilding the figure
+            Plotly.restyle('timeline', {
+                'x': [x],
+                'y': [y],
+                'marker.size': [sizes],
+                'marker.color': [colors],
+                'text': [text],
+                'customdata': [customdata]
+            }, [0]);
+
+            // Update the table rows
+            renderTable(filteredData);
+        }
+
+        // Escape text for use in table cells
+        function escapeHtml(value) {
+            return String(value ?? '').replace(/[&<>"']/g, c => `&#${c.charCodeAt(0)};`);
+        }
+
+        // Fill the event table with the given events
+        function renderTable(filteredData) {
+            document.querySelector('#event-table tbody').innerHTML = filteredData.map(item => {
+                const phbCats = (item.phb_categories || []).map(cat => `${cat.category} (${cat.severity})`).join(', ');
+                return `<tr><td>${escapeHtml(item.date)}</td>` +
+                       `<td>${escapeHtml(item.title)}</td>` +
+                       `<td>${escapeHtml(item.specialty)}</td>` +
+                       `<td>${escapeHtml(phbCats)}</td></tr>`;
+            }).join('');
+        }
+
+        // Tab functionality
+        function openTab(evt, tabName) {
+            // Hide all tab content
+            const tabContents = document.getElementsByClassName('tab-content');
+            for (let i = 0; i < tabContents.length; i++) {
+                tabContents[i].classList.remove('active');
+            }
+
+            // Remove active class from all tabs
+            const tabs = document.getElementsByClassName('tab');
+            for (let i = 0; i < tabs.length; i++) {
+                tabs[i].classList.remove('active');
+            }
+
+            // Show the selected tab content and mark the button as active
+            document.getElementById(tabName).classList.add('active');
+            evt.currentTarget.classList.add('active');
+        }
+    </script>
+</body>
+</html>
+"""
+
+def data_file():
+    """Return the data file to build from: the enhanced data if it exists, otherwise the regular data"""
+    for path in ('gwendolyn_medical_data_enhanced.json', 'gwendolyn_medical_data.json'):
+        if os.path.exists(path):
+            return path
+    return None
+
 def load_data():
     """Load the medical data from JSON file"""
-    # Check if enhanced data exists, otherwise use regular data
-    if os.path.exists('gwendolyn_medical_data_enhanced.json'):
-        with open('gwendolyn_medical_data_enhanced.json', 'r') as f:
-            data = json.load(f)
-    elif os.path.exists('gwendolyn_medical_data.json'):
-        with open('gwendolyn_medical_data.json', 'r') as f:
-            data = json.load(f)
-    else:
+    path = data_file()
+    if path is None:
         raise FileNotFoundError("No medical data JSON file found")
     
-    # Convert date strings to datetime objects
-    for item in data:
-        if item['date']:
-            item['date'] = datetime.strptime(item['date'], '%Y-%m-%d')
+    with open(path, 'r') as f:
+        data = json.load(f)
     
-    return data
+    # Convert date strings to datetimes for the whole column at once
+    df = pd.DataFrame(data)
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce', cache=True)
+    
+    return df
+
+def name_hash(name):
+    """
+    Hash a specialty or category name for its color.
+    
+    Unlike hash(), CRC-32 is the same in every process, so the colors (and
+    the compressed copies of the page) do not change between rebuilds.
+    
+    Parameters:
+    - name: Specialty or category name
+    
+    Returns:
+    - Unsigned 32-bit hash of the name
+    """
+    return zlib.crc32(str(name).encode('utf-8'))
+
+def hover_section(df, column, label, limit=None):
+    """
+    Build one hover-text line per event from a list column.
+    
+    Parameters:
+    - df: Events DataFrame
+    - column: Name of the list column
+    - label: Label shown before the joined values
+    - limit: Only include the first `limit` values, if given
+    
+    Returns:
+    - Series of "<label>: a, b<br>" strings, empty where the event has no values
+    """
+    if column not in df.columns:
+        return ''
+    
+    values = df[column]
+    if limit is not None:
+        values = values.str[:limit]
+    
+    return (label + ': ' + values.str.join(', ') + '<br>').where(df[column].str.len() > 0, '')
+
+def join_phb_entries(df, column, name_key, severity_key=None):
+    """
+    Join the PHB entries (dicts) of each event into a comma-separated string.
+    
+    Parameters:
+    - df: Events DataFrame
+    - column: Name of the PHB list column
+    - name_key: Key of the entry name
+    - severity_key: Key of the severity shown in brackets, if any
+    
+    Returns:
+    - Series of joined strings, empty where the event has no entries
+    """
+    if column not in df.columns:
+        return pd.Series('', index=df.index)
+    
+    entries = df[column].explode().dropna()
+    labels = entries.str[name_key]
+    if severity_key is not None:
+        labels = labels + ' (' + entries.str[severity_key] + ')'
+    
+    return labels.groupby(level=0).agg(', '.join).reindex(df.index, fill_value='')
 
 def create_phb_timeline(data):
     """Create an enhanced interactive timeline visualization with PHB integration"""
-    # Convert to DataFrame
+    # Convert to DataFrame; the few specialties repeat across every event, so store them as a category
     df = pd.DataFrame(data)
+    df['specialty'] = df['specialty'].astype('category')
     
-    # Sort by date
-    df = df.sort_values('date')
-    
-    # Create a color map for specialties
-    specialties = df['specialty'].unique()
-    color_map = {specialty: f'rgb({hash(specialty) % 256}, {(hash(specialty) // 256) % 256}, {(hash(specialty) // 65536) % 256})' 
-                for specialty in specialties}
-    
-    # Create figure with subplots
-    fig = make_subplots(
-        rows=2, cols=1,
-        row_heights=[0.7, 0.3],
-        specs=[[{"type": "scatter"}], [{"type": "table"}]],
-        vertical_spacing=0.1,
-        subplot_titles=("Medical Timeline with PHB Integration", "Event Details")
-    )
+    # Sort by date with a stable sort, so events on the same day keep their file order
+    df = df.iloc[np.argsort(df['date'].to_numpy(), kind='stable')]
     
-    # Add events to the timeline
-    for i, row in df.iterrows():
-        # Prepare hover text with all available information
-        hover_text = f"<b>{row['title']}</b><br>"
-        hover_text += f"Date: {row['date'].strftime('%Y-%m-%d')}<br>"
-        hover_text += f"Specialty: {row['specialty']}<br>"
-        
-        # Add personnel if available
-        if 'personnel' in row and row['personnel']:
-            hover_text += f"Personnel: {', '.join(row['personnel'])}<br>"
-        
-        # Add hospitals if available
-        if 'hospitals' in row and row['hospitals']:
-            hover_text += f"Hospitals: {', '.join(row['hospitals'])}<br>"
-        
-        # Add appointments if available
-        if 'appointments' in row and row['appointments']:
-            hover_text += f"Appointments: {', '.join(row['appointments'])}<br>"
-        
-        # Add medications if available
-        if 'medications' in row and row['medications']:
-            hover_text += f"Medications: {', '.join(row['medications'])}<br>"
-        
-        # Add procedures if available
-        if 'procedures' in row and row['procedures']:
-            hover_text += f"Procedures: {', '.join(row['procedures'])}<br>"
-        
-        # Add diagnoses if available
-        if 'diagnoses' in row and row['diagnoses']:
-            hover_text += f"Diagnoses: {', '.join(row['diagnoses'])}<br>"
-        
-        # Add events
-        if 'events' in row and row['events']:
-            hover_text += f"Events: {', '.join(row['events'][:2])}<br>"
-        
-        # Add PHB categories if available
-        if 'phb_categories' in row and row['phb_categories']:
-            phb_cats = [f"{cat['category']} ({cat['severity']})" for cat in row['phb_categories']]
-            hover_text += f"PHB Categories: {', '.join(phb_cats)}<br>"
-        
-        # Add PHB supports if available
-        if 'phb_supports' in row and row['phb_supports']:
-            phb_sups = [sup['support'] for sup in row['phb_supports']]
-            hover_text += f"PHB Supports: {', '.join(phb_sups)}<br>"
-        
-        # Determine marker size based on PHB relevance
-        marker_size = 15
-        if 'phb_categories' in row and row['phb_categories']:
-            # Larger marker for events with PHB categories
-            marker_size = 20
-        
-        # Determine marker color based on specialty
-        marker_color = color_map[row['specialty']]
-        
-        # Add trace for this event
-        fig.add_trace(
-            go.Scatter(
-                x=[row['date']],
-                y=[row['specialty']],
-                mode='markers',
-                marker=dict(
-                    size=marker_size,
-                    color=marker_color,
-                    line=dict(width=2, color='DarkSlateGrey')
-                ),
-                name=row['title'],
-                text=hover_text,
-                hoverinfo='text',
-                customdata=[i]  # Store the index for filtering
-            ),
-            row=1, col=1
-        )
+    # Format the dates once for the hover text and the page's event data
+    df['date_str'] = df['date'].dt.strftime('%Y-%m-%d')
     
-    # Add table for details
-    table_columns = ["Date", "Title", "Specialty", "PHB Categories"]
-    table_values = [
-        df['date'].dt.strftime('%Y-%m-%d'),
-        df['title'],
-        df['specialty'],
-    ]
+    # Create a color map for specialties, hashing each one once
+    specialties = df['specialty'].cat.categories
+    specialty_labels = df['specialty'].astype(str)
+    color_map = {specialty: f'rgb({h % 256}, {(h // 256) % 256}, {(h // 65536) % 256})'
+                 for specialty in specialties for h in [name_hash(specialty)]}
+    
+    # Create figure; the event details table is rendered as HTML by the page
+    fig = go.Figure()
+    
+    # Join the PHB entries of each event once, for the hover text and marker sizes
+    phb_categories_str = join_phb_entries(df, 'phb_categories', 'category', 'severity')
+    phb_supports_str = join_phb_entries(df, 'phb_supports', 'support')
     
-    # Add PHB categories column
-    phb_categories_column = []
-    for _, row in df.iterrows():
-        if 'phb_categories' in row and row['phb_categories']:
-            phb_cats = [f"{cat['category']} ({cat['severity']})" for cat in row['phb_categories']]
-            phb_categories_column.append(', '.join(phb_cats))
-        else:
-            phb_categories_column.append('')
+    # Prepare hover text with all available information, one vectorized column at a time
+    df['hover_text'] = (
+        '<b>' + df['title'] + '</b><br>'
+        + 'Date: ' + df['date_str'].fillna('') + '<br>'
+        + 'Specialty: ' + specialty_labels + '<br>'
+        + hover_section(df, 'personnel', 'Personnel')
+        + hover_section(df, 'hospitals', 'Hospitals')
+        + hover_section(df, 'appointments', 'Appointments')
+        + hover_section(df, 'medications', 'Medications')
+        + hover_section(df, 'procedures', 'Procedures')
+        + hover_section(df, 'diagnoses', 'Diagnoses')
+        + hover_section(df, 'events', 'Events', limit=2)
+        + ('PHB Categories: ' + phb_categories_str + '<br>').where(phb_categories_str != '', '')
+        + ('PHB Supports: ' + phb_supports_str + '<br>').where(phb_supports_str != '', '')
+    )
     
-    table_values.append(phb_categories_column)
+    # Larger markers for events with PHB categories (plain lists, so plotly.js gets arrays, not typed-array blobs)
+    marker_sizes = np.where(phb_categories_str != '', 20, 15).tolist()
     
+    # Add all events to the timeline as one WebGL trace, with per-point sizes and colors
     fig.add_trace(
-        go.Table(
-            header=dict(
-                values=table_columns,
-                fill_color='rgba(50, 50, 50, 1)',
-                align='left',
-                font=dict(color='white', size=12)
+        go.Scattergl(
+            x=df['date'],
+            y=specialty_labels.tolist(),
+            mode='markers',
+            marker=dict(
+                size=marker_sizes,
+                color=df['specialty'].map(color_map).tolist(),
+                line=dict(width=2, color='DarkSlateGrey')
             ),
-            cells=dict(
-                values=table_values,
-                fill_color='rgba(30, 30, 30, 0.8)',
-                align='left',
-                font=dict(color='white', size=11)
-            )
-        ),
-        row=2, col=1
+            text=df['hover_text'].tolist(),
+            hoverinfo='text',
+            customdata=[[i] for i in df.index]  # Store the index for filtering
+        )
     )
     
     # Update layout
@@ -187,459 +610,156 @@ def create_phb_timeline(data):
             categoryorder='category ascending'
         ),
         hovermode='closest',
-        height=1000,
+        height=700,
         template='plotly_dark',
         margin=dict(t=100, b=0, l=0, r=0),
         showlegend=False
     )
     
+    # Background color for each PHB category annotation, hashing each category once
+    category_colors = {category: f"rgba({h % 256}, {(h // 256) % 256}, {(h // 65536) % 256}, 0.5)"
+                       for category, _ in PHB_CATEGORY_ITEMS for h in [name_hash(category)]}
+    
     # Add annotations for PHB categories
-    for category, info in phb_details.PHB_CATEGORIES.items():
+    for idx, (category, info) in enumerate(PHB_CATEGORY_ITEMS):
         fig.add_annotation(
             x=0.01,
-            y=0.99 - (list(phb_details.PHB_CATEGORIES.keys()).index(category) * 0.03),
+            y=0.99 - idx * 0.03,
             xref="paper",
             yref="paper",
             text=f"{category} ({info['severity']})",
             showarrow=False,
             font=dict(size=10, color="white"),
             align="left",
-            bgcolor=f"rgba({hash(category) % 256}, {(hash(category) // 256) % 256}, {(hash(category) // 65536) % 256}, 0.5)",
+            bgcolor=category_colors[category],
             bordercolor="white",
             borderwidth=1,
             borderpad=4,
             width=200
         )
     
-    # Save the figure as JSON for the HTML template
-    fig_json = fig.to_json()
-    fig_dict = json.loads(fig_json)
-    
-    # Convert data to JSON for JavaScript
-    data_json = []
-    for item in data:
-        data_item = {
-            'title': item['title'],
-            'date': item['date'].strftime('%Y-%m-%d') if item['date'] else None,
-            'specialty': item['specialty'],
-            'content': item['content']
-        }
-        
-        # Add additional fields if they exist
-        for field in ['personnel', 'hospitals', 'appointments', 'dates', 
-                     'medications', 'procedures', 'diagnoses', 'events',
-                     'phb_categories', 'phb_supports']:
-            if field in item:
-                data_item[field] = item[field]
-        
-        data_json.append(data_item)
-    
-    # Create the HTML content with the JSON data embedded
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Gwendolyn Vials Moore - Medical History Timeline with PHB Integration</title>
-        <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
-        <style>
-            body {{ margin: 0; padding: 0; background-color: #1E1E1E; color: white; font-family: Arial, sans-serif; }}
-            .container {{ width: 95%; margin: 20px auto; }}
-            h1 {{ text-align: center; margin-bottom: 20px; }}
-            .filters {{ margin-bottom: 20px; background-color: #333; padding: 10px; border-radius: 5px; }}
-            .filters label {{ margin-right: 10px; }}
-            select {{ background-color: #444; color: white; padding: 5px; border: none; border-radius: 3px; }}
-            .timeline {{ width: 100%; height: 800px; }}
-            .info-panel {{ background-color: #333; padding: 15px; margin-top: 20px; border-radius: 5px; }}
-            .info-panel h2 {{ margin-top: 0; }}
-            .search-box {{ margin-bottom: 10px; }}
-            .search-box input {{ width: 100%; padding: 8px; background-color: #444; color: white; border: none; border-radius: 3px; }}
-            .phb-panel {{ background-color: #333; padding: 15px; margin-top: 20px; border-radius: 5px; }}
-            .phb-panel h2 {{ margin-top: 0; }}
-            .phb-category {{ margin-bottom: 10px; padding: 10px; border-radius: 5px; }}
-            .severity-SEVERE {{ background-color: rgba(255, 0, 0, 0.3); }}
-            .severity-HIGH {{ background-color: rgba(255, 165, 0, 0.3); }}
-            .severity-MODERATE {{ background-color: rgba(255, 255, 0, 0.3); }}
-            .tab-container {{ display: flex; margin-bottom: 10px; }}
-            .tab {{ padding: 10px 20px; background-color: #444; margin-right: 5px; cursor: pointer; border-radius: 5px 5px 0 0; }}
-            .tab.active {{ background-color: #555; }}
-            .tab-content {{ display: none; }}
-            .tab-content.active {{ display: block; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>Gwendolyn Vials Moore - Medical History Timeline with PHB Integration</h1>
-            
-            <div class="tab-container">
-                <div class="tab active" onclick="openTab(event, 'timeline-tab')">Timeline</div>
-                <div class="tab" onclick="openTab(event, 'phb-tab')">PHB Details</div>
-            </div>
-            
-            <div id="timeline-tab" class="tab-content active">
-                <div class="filters">
-                    <label for="specialty-filter">Filter by Specialty:</label>
-                    <select id="specialty-filter" onchange="filterBySpecialty()">
-                        <option value="all">All Specialties</option>
-                        {' '.join([f'<option value="{s}">{s}</option>' for s in sorted(specialties) if s != "Unknown"])}
-                    </select>
-                    
-                    <label for="year-filter" style="margin-left: 20px;">Filter by Year:</label>
-                    <select id="year-filter" onchange="filterByYear()">
-                        <option value="all">All Years</option>
-                        {' '.join([f'<option value="{y}">{y}</option>' for y in sorted(df['date'].dt.year.unique())])}
-                    </select>
-                    
-                    <label for="phb-filter" style="margin-left: 20px;">Filter by PHB Category:</label>
-                    <select id="phb-filter" onchange="filterByPHB()">
-                        <option value="all">All PHB Categories</option>
-                        {' '.join([f'<option value="{c}">{c} ({info["severity"]})</option>' for c, info in phb_details.PHB_CATEGORIES.items()])}
-                    </select>
-                </div>
-                
-                <div class="search-box">
-                    <input type="text" id="search-input" placeholder="Search for keywords in events, titles, or PHB categories..." onkeyup="searchTimeline()">
-                </div>
-                
-                <div id="timeline" class="timeline"></div>
-                
-                <div class="info-panel">
-                    <h2>Selected Event Details</h2>
-                    <div id="event-details">Click on a point in the timeline to see details</div>
-                </div>
-            </div>
-            
-            <div id="phb-tab" class="tab-content">
-                <div class="phb-panel">
-                    <h2>Public Health Budget (PHB) Categories</h2>
-                    <div id="phb-categories">
-                        {' '.join([f'<div class="phb-category severity-{info["severity"]}"><h3>{category} ({info["severity"]})</h3><p>{info["description"]}</p><ul>{" ".join([f"<li>{detail}</li>" for detail in info["details"]])}</ul></div>' for category, info in phb_details.PHB_CATEGORIES.items()])}
-                    </div>
-                    
-                    <h2>PHB Supports</h2>
-                    <div id="phb-supports">
-                        {' '.join([f'<div class="phb-category"><h3>{support}</h3><p>{info["description"]}</p><ul>{" ".join([f"<li>{detail}</li>" for detail in info["details"]])}</ul></div>' for support, info in phb_details.PHB_SUPPORTS.items()])}
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <script>
-            // Store the original figure data
-            let originalData;
-            
-            // Store the event data
-            const eventData = {json.dumps(data_json)};
-            
-            // Load the Plotly figure
-            Plotly.newPlot('timeline', {json.dumps(fig_dict['data'])}, {json.dumps(fig_dict['layout'])});
-            
-            // Get the original data after plot is created
-            document.getElementById('timeline').on('plotly_afterplot', function() {{
-                originalData = document.getElementById('timeline').data;
-            }});
-            
-            // Handle click events on the timeline
-            document.getElementById('timeline').on('plotly_click', function(data) {{
-                const point = data.points[0];
-                if (point.customdata) {{
-                    const index = point.customdata[0];
-                    const event = eventData[index];
-                    
-                    let detailsHtml = `
-                        <h3>${{event.title}}</h3>
-                        <p><strong>Date:</strong> ${{event.date}}</p>
-                        <p><strong>Specialty:</strong> ${{event.specialty}}</p>
-                    `;
-                    
-                    if (event.personnel) {{
-                        detailsHtml += `<p><strong>Personnel:</strong> ${{event.personnel.join(', ')}}</p>`;
-                    }}
-                    
-                    if (event.hospitals) {{
-                        detailsHtml += `<p><strong>Hospitals:</strong> ${{event.hospitals.join(', ')}}</p>`;
-                    }}
-                    
-                    if (event.appointments) {{
-                        detailsHtml += `<p><strong>Appointments:</strong> ${{event.appointments.join(', ')}}</p>`;
-                    }}
-                    
-                    if (event.medications) {{
-                        detailsHtml += `<p><strong>Medications:</strong> ${{event.medications.join(', ')}}</p>`;
-                    }}
-                    
-                    if (event.procedures) {{
-                        detailsHtml += `<p><strong>Procedures:</strong> ${{event.procedures.join(', ')}}</p>`;
-                    }}
-                    
-                    if (event.diagnoses) {{
-                        detailsHtml += `<p><strong>Diagnoses:</strong> ${{event.diagnoses.join(', ')}}</p>`;
-                    }}
-                    
-                    if (event.events) {{
-                        detailsHtml += `<p><strong>Events:</strong></p><ul>`;
-                        event.events.forEach(e => {{
-                            detailsHtml += `<li>${{e}}</li>`;
-                        }});
-                        detailsHtml += `</ul>`;
-                    }}
-                    
-                    if (event.phb_categories && event.phb_categories.length > 0) {{
-                        detailsHtml += `<p><strong>PHB Categories:</strong></p><ul>`;
-                        event.phb_categories.forEach(cat => {{
-                            detailsHtml += `<li>${{cat.category}} (${{cat.severity}}): ${{cat.description}}</li>`;
-                        }});
-                        detailsHtml += `</ul>`;
-                    }}
-                    
-                    if (event.phb_supports && event.phb_supports.length > 0) {{
-                        detailsHtml += `<p><strong>PHB Supports:</strong></p><ul>`;
-                        event.phb_supports.forEach(sup => {{
-                            detailsHtml += `<li>${{sup.support}}: ${{sup.description}}</li>`;
-                        }});
-                        detailsHtml += `</ul>`;
-                    }}
-                    
-                    detailsHtml += `<p><strong>Content:</strong> ${{event.content}}</p>`;
-                    
-                    document.getElementById('event-details').innerHTML = detailsHtml;
-                }}
-            }});
-            
-            // Filter by specialty
-            function filterBySpecialty() {{
-                const specialty = document.getElementById('specialty-filter').value;
-                const yearFilter = document.getElementById('year-filter').value;
-                const phbFilter = document.getElementById('phb-filter').value;
-                
-                applyFilters(specialty, yearFilter, phbFilter);
-            }}
-            
-            // Filter by year
-            function filterByYear() {{
-                const specialty = document.getElementById('specialty-filter').value;
-                const year = document.getElementById('year-filter').value;
-                const phbFilter = document.getElementById('phb-filter').value;
-                
-                applyFilters(specialty, year, phbFilter);
-            }}
-            
-            // Filter by PHB category
-            function filterByPHB() {{
-                const specialty = document.getElementById('specialty-filter').value;
-                const year = document.getElementById('year-filter').value;
-                const phbCategory = document.getElementById('phb-filter').value;
-                
-                applyFilters(specialty, year, phbCategory);
-            }}
-            
-            // Apply all filters
-            function applyFilters(specialty, year, phbCategory) {{
-                let filteredData = eventData;
-                
-                // Apply specialty filter
-                if (specialty !== 'all') {{
-                    filteredData = filteredData.filter(event => event.specialty === specialty);
-                }}
-                
-                // Apply year filter
-                if (year !== 'all') {{
-                    filteredData = filteredData.filter(event => {{
-                        const eventDate = new Date(event.date);
-                        return eventDate.getFullYear().toString() === year;
-                    }});
-                }}
-                
-                // Apply PHB category filter
-                if (phbCategory !== 'all') {{
-                    filteredData = filteredData.filter(event => {{
-                        if (!event.phb_categories) return false;
-                        return event.phb_categories.some(cat => cat.category === phbCategory);
-                    }});
-                }}
-                
-                // Update the timeline
-                updateTimeline(filteredData);
-            }}
-            
-            // Search functionality
-            function searchTimeline() {{
-                const searchTerm = document.getElementById('search-input').value.toLowerCase();
-                
-                if (searchTerm === '') {{
-                    // Reset to current filters if search is cleared
-                    const specialty = document.getElementById('specialty-filter').value;
-                    const year = document.getElementById('year-filter').value;
-                    const phbCategory = document.getElementById('phb-filter').value;
-                    applyFilters(specialty, year, phbCategory);
-                    return;
-                }}
-                
-                // Search in title, events, content, and PHB categories
-                const filteredData = eventData.filter(event => {{
-                    // Search in title and content
-                    if (event.title.toLowerCase().includes(searchTerm) || 
-                        (event.content && event.content.toLowerCase().includes(searchTerm))) {{
-                        return true;
-                    }}
-                    
-                    // Search in events
-                    if (event.events && event.events.some(e => e.toLowerCase().includes(searchTerm))) {{
-                        return true;
-                    }}
-                    
-                    // Search in PHB categories
-                    if (event.phb_categories && event.phb_categories.some(cat => 
-                        cat.category.toLowerCase().includes(searchTerm) || 
-                        cat.description.toLowerCase().includes(searchTerm))) {{
-                        return true;
-                    }}
-                    
-                    // Search in PHB supports
-                    if (event.phb_supports && event.phb_supports.some(sup => 
-                        sup.support.toLowerCase().includes(searchTerm) || 
-                        sup.description.toLowerCase().includes(searchTerm))) {{
-                        return true;
-                    }}
-                    
-                    return false;
-                }});
-                
-                updateTimeline(filteredData);
-            }}
-            
-            // Update the timeline with filtered data
-            function updateTimeline(filteredData) {{
-                // Create new traces for the filtered data
-                const traces = [];
-                
-                // Get the color map
-                const specialties = [...new Set(filteredData.map(item => item.specialty))];
-                const colorMap = {{}};
-                specialties.forEach(specialty => {{
-                    const hash = specialty.split('').reduce((acc, char) => {{
-                        return acc + char.charCodeAt(0);
-                    }}, 0);
-                    colorMap[specialty] = `rgb(${{hash % 256}}, ${{(hash / 256) % 256}}, ${{(hash / 65536) % 256}})`;
-                }});
-                
-                // Create scatter plot traces
-                filteredData.forEach((row, i) => {{
-                    const date = new Date(row.date);
-                    
-                    // Prepare hover text
-                    let hoverText = `<b>${{row.title}}</b><br>` +
-                                   `Date: ${{date.toISOString().split('T')[0]}}<br>` +
-                                   `Specialty: ${{row.specialty}}<br>`;
-                    
-                    if (row.personnel) {{
-                        hoverText += `Personnel: ${{row.personnel.join(', ')}}<br>`;
-                    }}
-                    
-                    if (row.events) {{
-                        hoverText += `Events: ${{row.events.slice(0, 2).join(', ')}}<br>`;
-                    }}
-                    
-                    if (row.phb_categories && row.phb_categories.length > 0) {{
-                        const phbCats = row.phb_categories.map(cat => `${{cat.category}} (${{cat.severity}})`);
-                        hoverText += `PHB Categories: ${{phbCats.join(', ')}}<br>`;
-                    }}
-                    
-                    // Determine marker size based on PHB relevance
-                    let markerSize = 15;
-                    if (row.phb_categories && row.phb_categories.length > 0) {{
-                        markerSize = 20;
-                    }}
-                    
-                    traces.push({{
-                        x: [date],
-                        y: [row.specialty],
-                        mode: 'markers',
-                        marker: {{
-                            size: markerSize,
-                            color: colorMap[row.specialty],
-                            line: {{width: 2, color: 'DarkSlateGrey'}}
-                        }},
-                        name: row.title,
-                        text: hoverText,
-                        hoverinfo: 'text',
-                        customdata: [i]
-                    }});
-                }});
-                
-                // Create table trace
-                const tableTrace = {{
-                    type: 'table',
-                    header: {{
-                        values: ["Date", "Title", "Specialty", "PHB Categories"],
-                        fill: {{color: 'rgba(50, 50, 50, 1)'}},
-                        align: 'left',
-                        font: {{color: 'white', size: 12}}
-                    }},
-                    cells: {{
-                        values: [
-                            filteredData.map(item => new Date(item.date).toISOString().split('T')[0]),
-                            filteredData.map(item => item.title),
-                            filteredData.map(item => item.specialty),
-                            filteredData.map(item => {{
-                                if (item.phb_categories && item.phb_categories.length > 0) {{
-                                    return item.phb_categories.map(cat => `${{cat.category}} (${{cat.severity}})`).join(', ');
-                                }}
-                                return '';
-                            }})
-                        ],
-                        fill: {{color: 'rgba(30, 30, 30, 0.8)'}},
-                        align: 'left',
-                        font: {{color: 'white', size: 11}}
-                    }}
-                }};
-                
-                // Add the table trace
-                traces.push(tableTrace);
-                
-                // Update the plot with new data
-                Plotly.react('timeline', traces, {json.dumps(fig_dict['layout'])});
-            }}
-            
-            // Tab functionality
-            function openTab(evt, tabName) {{
-                // Hide all tab content
-                const tabContents = document.getElementsByClassName('tab-content');
-                for (let i = 0; i < tabContents.length; i++) {{
-                    tabContents[i].classList.remove('active');
-                }}
-                
-                // Remove active class from all tabs
-                const tabs = document.getElementsByClassName('tab');
-                for (let i = 0; i < tabs.length; i++) {{
-                    tabs[i].classList.remove('active');
-                }}
-                
-                // Show the selected tab content and mark the button as active
-                document.getElementById(tabName).classList.add('active');
-                evt.currentTarget.classList.add('active');
-            }}
-        </script>
-    </body>
-    </html>
+    # Serialize the figure for the HTML template straight from its dict (no to_json/loads
+    # round trip); plotly uses orjson when it is installed
+    fig_dict = fig.to_plotly_json()
+    data_payload = to_json_plotly(fig_dict['data'])
+    layout_payload = to_json_plotly(fig_dict['layout'])
+    
+    # Convert data to JSON for JavaScript, in file order (the customdata indexes refer to it),
+    # with the preformatted date strings
+    events_df = df.sort_index()
+    events_df['date'] = events_df['date_str'].astype(object).where(events_df['date_str'].notna(), None)
+    extra_fields = [field for field in EXTRA_EVENT_FIELDS if field in events_df.columns]
+    records = events_df[['title', 'date', 'specialty', 'content'] + extra_fields].to_dict(orient='records')
+    
+    # Events that lack one of the optional fields get a NaN/None for it in the frame; leave it out
+    data_json = [
+        {key: value for key, value in record.items()
+         if key not in extra_fields or (value is not None and value == value)}
+        for record in records
+    ]
+    events_payload = to_json_plotly(data_json)
+    colors_payload = to_json_plotly(color_map)
+    
+    # Sort the filter values once, then fill in the filter options and PHB panels; the static
+    # template around the payloads is never copied
+    sorted_specialties = sorted(s for s in specialties if s != "Unknown")
+    years = sorted(df['date'].dt.year.dropna().unique().astype(int).tolist())
+    header = HTML_HEADER.format(
+        specialty_options=' '.join(f'<option value="{s}">{s}</option>' for s in sorted_specialties),
+        year_options=' '.join(f'<option value="{y}">{y}</option>' for y in years),
+        phb_options=' '.join(f'<option value="{c}">{c} ({info["severity"]})</option>' for c, info in PHB_CATEGORY_ITEMS),
+        phb_categories_html=' '.join(f'<div class="phb-category severity-{info["severity"]}"><h3>{category} ({info["severity"]})</h3><p>{info["description"]}</p><ul>{" ".join(f"<li>{detail}</li>" for detail in info["details"])}</ul></div>' for category, info in PHB_CATEGORY_ITEMS),
+        phb_supports_html=' '.join(f'<div class="phb-category"><h3>{support}</h3><p>{info["description"]}</p><ul>{" ".join(f"<li>{detail}</li>" for detail in info["details"])}</ul></div>' for support, info in PHB_SUPPORT_ITEMS)
+    )
+    
+    # Stream the payloads into the data file the page fetches, piece by piece instead of as one string
+    with open(DATA_OUTPUT_FILE, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        separator = '{'
+        for name, payload in (('events', events_payload), ('colors', colors_payload),
+                              ('data', data_payload), ('layout', layout_payload)):
+            f.write(f'{separator}"{name}":')
+            f.write(payload)
+            separator = ','
+        f.write('}')
+    
+    # The page itself only needs the name of its data file
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        f.write(header)
+        f.write('    <script>\n')
+        f.write(f'        const dataFile = {json.dumps(os.path.basename(DATA_OUTPUT_FILE))};\n')
+        f.write('    </script>\n\n')
+        f.write(HTML_FOOTER)
+    
+    write_compressed_copies(OUTPUT_FILE)
+    write_compressed_copies(DATA_OUTPUT_FILE)
+    
+    print(f"PHB-integrated timeline saved to {OUTPUT_FILE}")
+
+def write_compressed_copies(path):
+    """
+    Write pre-compressed copies of a generated file next to it, so a static
+    server can send them with a Content-Encoding header instead of the full file.
+    
+    Parameters:
+    - path: Path of the HTML or data file
+    
+    Returns:
+    - List of the compressed files written
+    """
+    with open(path, 'rb') as f:
+        html_bytes = f.read()
+    
+    # mtime=0 keeps the gzip output identical for identical pages
+    written = [path + '.gz']
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(html_bytes, compresslevel=9, mtime=0))
+    
+    if BROTLI_AVAILABLE:
+        written.append(path + '.br')
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(html_bytes, quality=11, mode=brotli.MODE_TEXT))
+    
+    return written
+
+def input_key(paths):
     """
+    Hash the mtime and size of the files a page is built from.
     
-    # Write the HTML file
-    with open('gwendolyn_medical_timeline_phb.html', 'w') as f:
-        f.write(html_content)
+    Parameters:
+    - paths: Paths of the input files
     
-    print("PHB-integrated timeline saved to gwendolyn_medical_timeline_phb.html")
+    Returns:
+    - Hex digest that changes whenever one of the files does
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        st = os.stat(path)
+        h.update(f"{path}:{st.st_mtime_ns}:{st.st_size}\n".encode())
+    return h.hexdigest()
 
 def main():
     # Check if data file exists
-    if not os.path.exists('gwendolyn_medical_data.json') and not os.path.exists('gwendolyn_medical_data_enhanced.json'):
+    source = data_file()
+    if source is None:
         print("Error: No medical data JSON file found. Run parse_enex.py or enhanced_parse_enex.py first.")
         return
     
+    # Skip the rebuild if the page was built from exactly these inputs
+    key = input_key([source, __file__, phb_details.__file__])
+    if all(os.path.exists(path) for path in (OUTPUT_FILE, DATA_OUTPUT_FILE, CACHE_FILE)):
+        with open(CACHE_FILE, 'r') as f:
+            if f.readline().strip() == key:
+                print(f"{OUTPUT_FILE} is up to date")
+                return
+    
     # Load data
     data = load_data()
     
     # Create PHB-integrated timeline
     create_phb_timeline(data)
+    
+    with open(CACHE_FILE, 'w') as f:
+        f.write(key + '\n')
 
 if __name__ == "__main__":
     main()
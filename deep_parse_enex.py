@@ -4,23 +4,79 @@ import re
 import base64
 import tempfile
 import xml.etree.ElementTree as ET
-from bs4 import BeautifulSoup
+from lxml import etree
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import datetime
 import json
 import hashlib
+import sqlite3
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 import improved_phb_details as phb_details
 import traceback
 
+# The same names, facilities and event texts recur across notes, so memoize the
+# PHB classifiers. The PHB entries are copied before being stored in a note so
+# the cached values are never shared.
+_categorize_personnel = lru_cache(maxsize=4096)(phb_details.categorize_personnel)
+_categorize_facility = lru_cache(maxsize=4096)(phb_details.categorize_facility)
+_phb_categories_for_event = lru_cache(maxsize=4096)(phb_details.get_phb_category_for_event)
+_phb_supports_for_event = lru_cache(maxsize=4096)(phb_details.get_phb_support_for_event)
+
+# Parser for the ENML inside each note; like BeautifulSoup's 'xml' parser it recovers from malformed markup
+ENML_PARSER = etree.XMLParser(recover=True, no_network=True, strip_cdata=False)
+
+# OCR text of every resource seen so far, keyed by a hash of its bytes, so identical
+# scans are only OCR'd once across notes and runs (WAL mode, so worker processes can share it)
+OCR_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_cache.sqlite3")
+
+# Number of processes notes are parsed in; set PARSE_WORKERS=1 to parse in this process, e.g. for debugging
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", os.cpu_count() or 1))
+
+# The saved data is written compact; set PRETTY_JSON=1 to indent it for reading
+PRETTY_JSON = os.environ.get("PRETTY_JSON") == "1"
+
+# orjson writes the comprehensive data file much faster than the json module
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 # Try to import OCR libraries, but continue if not available
 try:
-    import pytesseract
     from PIL import Image
     import io
-    HAS_OCR = True
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+# Prefer tesserocr, which keeps Tesseract and its language data loaded in-process
+# instead of starting a tesseract subprocess for every image
+try:
+    from tesserocr import PyTessBaseAPI
+    HAS_TESSEROCR = True
 except ImportError:
-    HAS_OCR = False
+    HAS_TESSEROCR = False
+
+try:
+    import pytesseract
+    HAS_PYTESSERACT = True
+except ImportError:
+    HAS_PYTESSERACT = False
+
+HAS_OCR = HAS_PIL and (HAS_TESSEROCR or HAS_PYTESSERACT)
+
+# This process's tesserocr API, created on first use and reused for every image
+_tess_api = None
+
+# This process's OCR cache connection, reopened in worker processes
+_ocr_cache_conn = None
+_ocr_cache_pid = None
 
 try:
     from pdf2image import convert_from_path
@@ -28,20 +84,174 @@ try:
 except ImportError:
     HAS_PDF2IMAGE = False
 
-# Define more comprehensive patterns for extracting medical information
-DOCTOR_PATTERN = r'(?:Dr\.?|Doctor|Prof\.?|Professor|Mr\.?|Mrs\.?|Ms\.?|Miss|Consultant|Specialist)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'
-NURSE_PATTERN = r'(?:Nurse|Sister|Matron|RN|Staff Nurse)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'
-THERAPIST_PATTERN = r'(?:Therapist|Physiotherapist|Physio|OT|Occupational Therapist|Speech|SALT|SLT)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'
-HOSPITAL_PATTERN = r'(?:Hospital|Medical Center|Clinic|Centre|Center|NHS Trust|Foundation Trust|Children\'s|Paediatric|Pediatric)(?:[:\s]+)([A-Za-z\s\-\']+)'
-DEPARTMENT_PATTERN = r'(?:Department|Dept|Ward|Unit|Clinic|Service|Team)(?:[:\s]+)([A-Za-z\s\-\']+)'
-APPOINTMENT_PATTERN = r'(?:Appointment|Visit|Consultation|Follow-up|Review|Assessment|Evaluation|Examination|Check-up|Checkup)(?:\s+with|\s+at|\s+on|\s+for)?(?:[:\s]+)([^\.]+)'
-DATE_PATTERN = r'(?:Date|On|Dated)(?:[:\s]+)(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4}|\d{1,2}(?:st|nd|rd|th)?\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{2,4})'
-MEDICATION_PATTERN = r'(?:Medication|Prescribed|Taking|Drug|Therapy|Treatment|Dose|Dosage)(?:[:\s]+)([^\.]+)'
-PROCEDURE_PATTERN = r'(?:Procedure|Surgery|Operation|Intervention|Treatment)(?:[:\s]+)([^\.]+)'
-DIAGNOSIS_PATTERN = r'(?:Diagnosis|Diagnosed with|Assessment|Condition|Problem|Issue|Concern)(?:[:\s]+)([^\.]+)'
-SYMPTOM_PATTERN = r'(?:Symptom|Presenting with|Complaining of|Reporting|Experiencing)(?:[:\s]+)([^\.]+)'
-RESULT_PATTERN = r'(?:Result|Finding|Outcome|Report|Test|Investigation|Scan|X-ray|MRI|CT|Ultrasound)(?:[:\s]+)([^\.]+)'
-PLAN_PATTERN = r'(?:Plan|Recommendation|Advised|Suggested|Proposed|Next steps|Follow-up|Review)(?:[:\s]+)([^\.]+)'
+# Aho-Corasick automaton for matching many keywords in one pass
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+def _keyword_alternation(keywords):
+    return "|".join(re.escape(keyword) for keyword in keywords)
+
+# Literal keywords that start each extraction pattern
+PATTERN_KEYWORDS = {
+    "doctor": ["Dr.", "Dr", "Doctor", "Prof.", "Prof", "Professor", "Mr.", "Mr", "Mrs.", "Mrs", "Ms.", "Ms", "Miss", "Consultant", "Specialist"],
+    "nurse": ["Nurse", "Sister", "Matron", "RN", "Staff Nurse"],
+    "therapist": ["Therapist", "Physiotherapist", "Physio", "OT", "Occupational Therapist", "Speech", "SALT", "SLT"],
+    "hospital": ["Hospital", "Medical Center", "Clinic", "Centre", "Center", "NHS Trust", "Foundation Trust", "Children's", "Paediatric", "Pediatric"],
+    "department": ["Department", "Dept", "Ward", "Unit", "Clinic", "Service", "Team"],
+    "appointment": ["Appointment", "Visit", "Consultation", "Follow-up", "Review", "Assessment", "Evaluation", "Examination", "Check-up", "Checkup"],
+    "date": ["Date", "On", "Dated"],
+    "medication": ["Medication", "Prescribed", "Taking", "Drug", "Therapy", "Treatment", "Dose", "Dosage"],
+    "procedure": ["Procedure", "Surgery", "Operation", "Intervention", "Treatment"],
+    "diagnosis": ["Diagnosis", "Diagnosed with", "Assessment", "Condition", "Problem", "Issue", "Concern"],
+    "symptom": ["Symptom", "Presenting with", "Complaining of", "Reporting", "Experiencing"],
+    "result": ["Result", "Finding", "Outcome", "Report", "Test", "Investigation", "Scan", "X-ray", "MRI", "CT", "Ultrasound"],
+    "plan": ["Plan", "Recommendation", "Advised", "Suggested", "Proposed", "Next steps", "Follow-up", "Review"]
+}
+
+# More comprehensive patterns for extracting medical information, compiled once at import
+NAME_GROUP = r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'
+PLACE_GROUP = r'(?:[:\s]+)([A-Za-z\s\-\']+)'
+DETAIL_GROUP = r'(?:[:\s]+)([^\.]+)'
+DOCTOR_RE = re.compile(r'(?:' + _keyword_alternation(PATTERN_KEYWORDS["doctor"]) + r')\s+' + NAME_GROUP)
+NURSE_RE = re.compile(r'(?:' + _keyword_alternation(PATTERN_KEYWORDS["nurse"]) + r')\s+' + NAME_GROUP)
+THERAPIST_RE = re.compile(r'(?:' + _keyword_alternation(PATTERN_KEYWORDS["therapist"]) + r')\s+' + NAME_GROUP)
+HOSPITAL_RE = re.compile(r'(?:' + _keyword_alternation(PATTERN_KEYWORDS["hospital"]) + r')' + PLACE_GROUP)
+DEPARTMENT_RE = re.compile(r'(?:' + _keyword_alternation(PATTERN_KEYWORDS["department"]) + r')' + PLACE_GROUP)
+APPOINTMENT_RE = re.compile(r'(?:' + _keyword_alternation(PATTERN_KEYWORDS["appointment"]) + r')(?:\s+with|\s+at|\s+on|\s+for)?' + DETAIL_GROUP)
+DATE_RE = re.compile(r'(?:' + _keyword_alternation(PATTERN_KEYWORDS["date"]) + r')(?:[:\s]+)(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4}|\d{1,2}(?:st|nd|rd|th)?\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{2,4})')
+MEDICATION_RE = re.compile(r'(?:' + _keyword_alternation(PATTERN_KEYWORDS["medication"]) + r')' + DETAIL_GROUP)
+PROCEDURE_RE = re.compile(r'(?:' + _keyword_alternation(PATTERN_KEYWORDS["procedure"]) + r')' + DETAIL_GROUP)
+DIAGNOSIS_RE = re.compile(r'(?:' + _keyword_alternation(PATTERN_KEYWORDS["diagnosis"]) + r')' + DETAIL_GROUP)
+SYMPTOM_RE = re.compile(r'(?:' + _keyword_alternation(PATTERN_KEYWORDS["symptom"]) + r')' + DETAIL_GROUP)
+RESULT_RE = re.compile(r'(?:' + _keyword_alternation(PATTERN_KEYWORDS["result"]) + r')' + DETAIL_GROUP)
+PLAN_RE = re.compile(r'(?:' + _keyword_alternation(PATTERN_KEYWORDS["plan"]) + r')' + DETAIL_GROUP)
+SENTENCE_SPLIT_RE = re.compile(r'[.!?]')
+MEDIA_HASH_RE = re.compile(r'(?<![0-9a-fA-F])[0-9a-fA-F]{32}(?![0-9a-fA-F])')
+
+# Patterns run over the combined title and text of a note
+EXTRACTION_PATTERNS = {
+    "doctor": DOCTOR_RE,
+    "nurse": NURSE_RE,
+    "therapist": THERAPIST_RE,
+    "hospital": HOSPITAL_RE,
+    "department": DEPARTMENT_RE,
+    "appointment": APPOINTMENT_RE,
+    "date": DATE_RE,
+    "medication": MEDICATION_RE,
+    "procedure": PROCEDURE_RE,
+    "diagnosis": DIAGNOSIS_RE,
+    "symptom": SYMPTOM_RE,
+    "result": RESULT_RE,
+    "plan": PLAN_RE
+}
+
+# Patterns for the significant events, run over the note text only
+EVENT_PATTERNS = {
+    "Appointment": APPOINTMENT_RE,
+    "Medication": MEDICATION_RE,
+    "Procedure": PROCEDURE_RE,
+    "Diagnosis": DIAGNOSIS_RE,
+    "Symptom": SYMPTOM_RE,
+    "Result": RESULT_RE,
+    "Plan": PLAN_RE
+}
+
+ALL_PATTERNS = {**EXTRACTION_PATTERNS, **EVENT_PATTERNS}
+ALL_PATTERN_KEYWORDS = {
+    **PATTERN_KEYWORDS,
+    **{event_type: PATTERN_KEYWORDS[event_type.lower()] for event_type in EVENT_PATTERNS}
+}
+
+# Automaton finding every pattern keyword occurrence in one pass; each keyword
+# maps to its length - 1 (to recover the start) and the patterns it begins
+PATTERN_KEYWORD_AUTOMATON = None
+if AHOCORASICK_AVAILABLE:
+    keyword_names = {}
+    for name, keywords in ALL_PATTERN_KEYWORDS.items():
+        for keyword in keywords:
+            keyword_names.setdefault(keyword, []).append(name)
+    
+    PATTERN_KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for keyword, names in keyword_names.items():
+        PATTERN_KEYWORD_AUTOMATON.add_word(keyword, (len(keyword) - 1, names))
+    PATTERN_KEYWORD_AUTOMATON.make_automaton()
+
+# Keywords that might indicate significant events
+EVENT_KEYWORDS = [
+    'diagnosis', 'diagnosed', 'surgery', 'operation', 'procedure', 
+    'admitted', 'admission', 'discharged', 'discharge', 'emergency',
+    'treatment', 'therapy', 'medication', 'prescribed', 'test results',
+    'scan', 'mri', 'ct', 'x-ray', 'ultrasound', 'blood test',
+    'appointment', 'consultation', 'follow-up', 'review', 'referral',
+    'assessment', 'evaluation', 'examination', 'check-up', 'checkup',
+    'symptoms', 'pain', 'discomfort', 'difficulty', 'problem',
+    'improvement', 'deterioration', 'change', 'progress', 'regress',
+    'complication', 'side effect', 'reaction', 'response', 'outcome'
+]
+
+EVENT_KEYWORD_RE = re.compile(_keyword_alternation(EVENT_KEYWORDS))
+
+EVENT_KEYWORD_AUTOMATON = None
+SPECIALTY_KEYWORD_AUTOMATON = None
+if AHOCORASICK_AVAILABLE:
+    EVENT_KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for keyword in EVENT_KEYWORDS:
+        EVENT_KEYWORD_AUTOMATON.add_word(keyword, keyword)
+    EVENT_KEYWORD_AUTOMATON.make_automaton()
+    
+    # Each PHB category keyword maps to itself and the categories that list it
+    keyword_specialties = {}
+    for specialty, info in phb_details.PHB_CATEGORIES.items():
+        for keyword in info["keywords"]:
+            keyword_specialties.setdefault(keyword, []).append(specialty)
+    
+    SPECIALTY_KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for keyword, specialties in keyword_specialties.items():
+        SPECIALTY_KEYWORD_AUTOMATON.add_word(keyword, (keyword, specialties))
+    SPECIALTY_KEYWORD_AUTOMATON.make_automaton()
+
+def find_pattern_matches(text, starts=None):
+    """
+    Run every extraction and event pattern over the text, like pattern.findall.
+    With the Aho-Corasick automaton, one pass finds where each pattern's keywords
+    occur and the patterns are only tried there.
+    Returns the captured group of each match, keyed by pattern name.
+    """
+    starts = starts or {}
+    
+    if PATTERN_KEYWORD_AUTOMATON is None:
+        return {name: pattern.findall(text, starts.get(name, 0)) for name, pattern in ALL_PATTERNS.items()}
+    
+    candidates = {name: set() for name in ALL_PATTERNS}
+    for end, (offset, names) in PATTERN_KEYWORD_AUTOMATON.iter(text):
+        for name in names:
+            candidates[name].add(end - offset)
+    
+    return {
+        name: findall_at(pattern, text, sorted(candidates[name]), starts.get(name, 0))
+        for name, pattern in ALL_PATTERNS.items()
+    }
+
+def findall_at(pattern, text, positions, start=0):
+    """
+    Find the non-overlapping matches of a pattern that start at the given positions.
+    Gives the same result as pattern.findall(text, start) when the positions
+    include everywhere the pattern could start.
+    """
+    found = []
+    resume_at = start
+    for position in positions:
+        if position < resume_at:
+            continue
+        match = pattern.match(text, position)
+        if match:
+            found.append(match.group(1))
+            resume_at = match.end()
+    
+    return found
 
 def determine_specialty(text, title=""):
     """
@@ -54,7 +264,7 @@ def determine_specialty(text, title=""):
     combined_text = (text + " " + title).lower()
     
     # Check for explicit mentions of departments or specialties
-    department_matches = re.findall(DEPARTMENT_PATTERN, combined_text)
+    department_matches = DEPARTMENT_RE.findall(combined_text)
     for dept in department_matches:
         dept = dept.lower()
         for specialty, keywords in phb_details.PHB_CATEGORIES.items():
@@ -62,13 +272,22 @@ def determine_specialty(text, title=""):
                 if keyword in dept:
                     return {"specialty": specialty, "confidence": 90}
     
-    # Count keyword matches for each specialty
+    # Count the distinct keywords of each specialty found in the text, in one pass with the automaton
+    if SPECIALTY_KEYWORD_AUTOMATON is not None:
+        found_keywords = dict(value for _, value in SPECIALTY_KEYWORD_AUTOMATON.iter(combined_text))
+        match_counts = {}
+        for specialties in found_keywords.values():
+            for specialty in specialties:
+                match_counts[specialty] = match_counts.get(specialty, 0) + 1
+    else:
+        match_counts = {
+            specialty: sum(1 for keyword in info["keywords"] if keyword in combined_text)
+            for specialty, info in phb_details.PHB_CATEGORIES.items()
+        }
+    
     specialty_scores = {}
     for specialty, info in phb_details.PHB_CATEGORIES.items():
-        match_count = 0
-        for keyword in info["keywords"]:
-            if keyword in combined_text:
-                match_count += 1
+        match_count = match_counts.get(specialty, 0)
         
         if match_count > 0:
             # Calculate confidence score based on matches and keyword density
@@ -82,20 +301,24 @@ def determine_specialty(text, title=""):
     
     return {"specialty": "Unknown", "confidence": 0}
 
-def extract_personnel(text):
+def extract_personnel(text, matches=None):
     """
     Extract and categorize medical personnel from text.
     Returns a list of personnel with their type, name, and specialty.
+    Takes the pattern matches from find_pattern_matches, if already computed.
     """
-    doctors = re.findall(DOCTOR_PATTERN, text)
-    nurses = re.findall(NURSE_PATTERN, text)
-    therapists = re.findall(THERAPIST_PATTERN, text)
+    if matches is None:
+        matches = {"doctor": DOCTOR_RE.findall(text), "nurse": NURSE_RE.findall(text), "therapist": THERAPIST_RE.findall(text)}
+    
+    doctors = matches["doctor"]
+    nurses = matches["nurse"]
+    therapists = matches["therapist"]
     
     personnel = []
     
     # Process doctors
     for name in doctors:
-        category = phb_details.categorize_personnel(name, "doctor")
+        category = _categorize_personnel(name, "doctor")
         personnel.append({
             "name": name,
             "type": category["type"],
@@ -104,7 +327,7 @@ def extract_personnel(text):
     
     # Process nurses
     for name in nurses:
-        category = phb_details.categorize_personnel(name, "nurse")
+        category = _categorize_personnel(name, "nurse")
         personnel.append({
             "name": name,
             "type": category["type"],
@@ -113,7 +336,7 @@ def extract_personnel(text):
     
     # Process therapists
     for name in therapists:
-        category = phb_details.categorize_personnel(name, "therapist")
+        category = _categorize_personnel(name, "therapist")
         personnel.append({
             "name": name,
             "type": category["type"],
@@ -122,19 +345,23 @@ def extract_personnel(text):
     
     return personnel if personnel else [{"name": "Unknown", "type": "Unknown", "specialty": "Unknown"}]
 
-def extract_facilities(text):
+def extract_facilities(text, matches=None):
     """
     Extract and categorize medical facilities from text.
     Returns a list of facilities with their type and specialty.
+    Takes the pattern matches from find_pattern_matches, if already computed.
     """
-    hospitals = re.findall(HOSPITAL_PATTERN, text)
-    departments = re.findall(DEPARTMENT_PATTERN, text)
+    if matches is None:
+        matches = {"hospital": HOSPITAL_RE.findall(text), "department": DEPARTMENT_RE.findall(text)}
+    
+    hospitals = matches["hospital"]
+    departments = matches["department"]
     
     facilities = []
     
     # Process hospitals
     for name in hospitals:
-        category = phb_details.categorize_facility(name)
+        category = _categorize_facility(name)
         facilities.append({
             "name": name,
             "type": category["type"],
@@ -143,7 +370,7 @@ def extract_facilities(text):
     
     # Process departments
     for name in departments:
-        category = phb_details.categorize_facility(name)
+        category = _categorize_facility(name)
         facilities.append({
             "name": name,
             "type": "Department",
@@ -152,50 +379,51 @@ def extract_facilities(text):
     
     return facilities
 
-def extract_appointments(text):
-    """Extract appointment details from text"""
-    appointments = re.findall(APPOINTMENT_PATTERN, text)
+def extract_appointments(text, matches=None):
+    """Extract appointment details from text, or take them from precomputed pattern matches"""
+    appointments = matches["appointment"] if matches is not None else APPOINTMENT_RE.findall(text)
     return appointments if appointments else []
 
-def extract_dates(text):
-    """Extract dates from text"""
-    dates = re.findall(DATE_PATTERN, text)
+def extract_dates(text, matches=None):
+    """Extract dates from text, or take them from precomputed pattern matches"""
+    dates = matches["date"] if matches is not None else DATE_RE.findall(text)
     return dates if dates else []
 
-def extract_medications(text):
-    """Extract medication information from text"""
-    medications = re.findall(MEDICATION_PATTERN, text)
+def extract_medications(text, matches=None):
+    """Extract medication information from text, or take them from precomputed pattern matches"""
+    medications = matches["medication"] if matches is not None else MEDICATION_RE.findall(text)
     return medications if medications else []
 
-def extract_procedures(text):
-    """Extract procedure information from text"""
-    procedures = re.findall(PROCEDURE_PATTERN, text)
+def extract_procedures(text, matches=None):
+    """Extract procedure information from text, or take them from precomputed pattern matches"""
+    procedures = matches["procedure"] if matches is not None else PROCEDURE_RE.findall(text)
     return procedures if procedures else []
 
-def extract_diagnoses(text):
-    """Extract diagnosis information from text"""
-    diagnoses = re.findall(DIAGNOSIS_PATTERN, text)
+def extract_diagnoses(text, matches=None):
+    """Extract diagnosis information from text, or take them from precomputed pattern matches"""
+    diagnoses = matches["diagnosis"] if matches is not None else DIAGNOSIS_RE.findall(text)
     return diagnoses if diagnoses else []
 
-def extract_symptoms(text):
-    """Extract symptom information from text"""
-    symptoms = re.findall(SYMPTOM_PATTERN, text)
+def extract_symptoms(text, matches=None):
+    """Extract symptom information from text, or take them from precomputed pattern matches"""
+    symptoms = matches["symptom"] if matches is not None else SYMPTOM_RE.findall(text)
     return symptoms if symptoms else []
 
-def extract_results(text):
-    """Extract test result information from text"""
-    results = re.findall(RESULT_PATTERN, text)
+def extract_results(text, matches=None):
+    """Extract test result information from text, or take them from precomputed pattern matches"""
+    results = matches["result"] if matches is not None else RESULT_RE.findall(text)
     return results if results else []
 
-def extract_plans(text):
-    """Extract treatment plan information from text"""
-    plans = re.findall(PLAN_PATTERN, text)
+def extract_plans(text, matches=None):
+    """Extract treatment plan information from text, or take them from precomputed pattern matches"""
+    plans = matches["plan"] if matches is not None else PLAN_RE.findall(text)
     return plans if plans else []
 
-def extract_significant_events(text):
+def extract_significant_events(text, matches=None):
     """
     Extract significant medical events from text using comprehensive pattern matching.
     Returns a list of events with their type and content.
+    Takes the event pattern matches from find_pattern_matches, if already computed.
     """
     if not text:
         return []
@@ -203,15 +431,9 @@ def extract_significant_events(text):
     events = []
     
     # Extract events by type
-    event_types = {
-        "Appointment": extract_appointments(text),
-        "Medication": extract_medications(text),
-        "Procedure": extract_procedures(text),
-        "Diagnosis": extract_diagnoses(text),
-        "Symptom": extract_symptoms(text),
-        "Result": extract_results(text),
-        "Plan": extract_plans(text)
-    }
+    if matches is None:
+        matches = {event_type: pattern.findall(text) for event_type, pattern in EVENT_PATTERNS.items()}
+    event_types = {event_type: matches[event_type] for event_type in EVENT_PATTERNS}
     
     # Add extracted events to the list
     for event_type, items in event_types.items():
@@ -223,37 +445,102 @@ def extract_significant_events(text):
     
     # If no structured events were found, extract sentences with medical keywords
     if not events:
-        # Keywords that might indicate significant events
-        event_keywords = [
-            'diagnosis', 'diagnosed', 'surgery', 'operation', 'procedure', 
-            'admitted', 'admission', 'discharged', 'discharge', 'emergency',
-            'treatment', 'therapy', 'medication', 'prescribed', 'test results',
-            'scan', 'mri', 'ct', 'x-ray', 'ultrasound', 'blood test',
-            'appointment', 'consultation', 'follow-up', 'review', 'referral',
-            'assessment', 'evaluation', 'examination', 'check-up', 'checkup',
-            'symptoms', 'pain', 'discomfort', 'difficulty', 'problem',
-            'improvement', 'deterioration', 'change', 'progress', 'regress',
-            'complication', 'side effect', 'reaction', 'response', 'outcome'
-        ]
-        
         # Extract sentences containing event keywords
-        sentences = re.split(r'[.!?]', text)
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-                
-            for keyword in event_keywords:
-                if keyword in sentence.lower():
-                    events.append({
-                        "type": "General",
-                        "content": sentence
-                    })
-                    break
+        for sentence in find_keyword_sentences(text):
+            events.append({
+                "type": "General",
+                "content": sentence
+            })
     
     return events if events else [{"type": "Unknown", "content": "No specific events extracted"}]
 
+def find_keyword_sentences(text):
+    """
+    Find the sentences that contain an event keyword, ignoring case.
+    The lowercased text is scanned once for all keywords, and each match is mapped
+    back to its sentence through the sentence boundaries.
+    """
+    text_lower = text.lower()
+    
+    # Lowercasing a few characters changes the text length, so offsets would not line up
+    if len(text_lower) != len(text):
+        sentences = (sentence.strip() for sentence in SENTENCE_SPLIT_RE.split(text))
+        return [sentence for sentence in sentences if sentence and EVENT_KEYWORD_RE.search(sentence.lower())]
+    
+    if EVENT_KEYWORD_AUTOMATON is not None:
+        positions = (end - len(keyword) + 1 for end, keyword in EVENT_KEYWORD_AUTOMATON.iter(text_lower))
+    else:
+        positions = (match.start() for match in EVENT_KEYWORD_RE.finditer(text_lower))
+    
+    # Keywords never contain sentence punctuation, so each match lies inside one sentence
+    boundaries = [match.start() for match in SENTENCE_SPLIT_RE.finditer(text)]
+    sentence_indexes = sorted({bisect_right(boundaries, position) for position in positions})
+    
+    sentences = []
+    for index in sentence_indexes:
+        start = boundaries[index - 1] + 1 if index > 0 else 0
+        end = boundaries[index] if index < len(boundaries) else len(text)
+        sentences.append(text[start:end].strip())
+    
+    return sentences
+
+def get_tess_api():
+    """Get this process's tesserocr API, creating it on first use"""
+    global _tess_api
+    if _tess_api is None:
+        _tess_api = PyTessBaseAPI(lang="eng")
+    return _tess_api
+
+def ocr_image(image):
+    """Run OCR on a PIL image, in-process with tesserocr when available"""
+    if not HAS_TESSEROCR:
+        return pytesseract.image_to_string(image)
+    
+    api = get_tess_api()
+    api.SetImage(image)
+    return api.GetUTF8Text()
+
+def ocr_images_batched(images):
+    """
+    Run OCR on several PIL images with a single tesseract invocation, so tesseract
+    starts and loads its language data once rather than once per image.
+    Returns the text of each image, in order.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_paths = []
+        for i, image in enumerate(images):
+            image_path = os.path.join(temp_dir, f"page_{i}.png")
+            image.save(image_path)
+            image_paths.append(image_path)
+        
+        list_path = os.path.join(temp_dir, "images.txt")
+        with open(list_path, 'w') as f:
+            f.write("\n".join(image_paths) + "\n")
+        
+        output = pytesseract.image_to_string(list_path)
+    
+    # Tesseract ends each page's text with a form feed
+    pages = output.split("\x0c")
+    if len(pages) < len(images):
+        raise ValueError(f"Expected OCR text for {len(images)} images, got {len(pages)}")
+    
+    return pages[:len(images)]
+
+def ocr_pages(images):
+    """
+    Run OCR on a list of PIL images, such as the pages of a PDF.
+    With tesserocr every image goes through the same loaded engine; with
+    pytesseract all images go through one tesseract run.
+    Returns the text of each image, in order.
+    """
+    if not HAS_TESSEROCR and len(images) > 1:
+        try:
+            return ocr_images_batched(images)
+        except Exception as e:
+            print(f"Error running batched OCR, processing images individually: {e}")
+    
+    return [ocr_image(image) for image in images]
+
 def perform_ocr_on_image(image_data):
     """Perform OCR on an image to extract text"""
     if not HAS_OCR:
@@ -264,7 +551,7 @@ def perform_ocr_on_image(image_data):
         image = Image.open(io.BytesIO(image_data))
         
         # Perform OCR
-        text = pytesseract.image_to_string(image)
+        text = ocr_image(image)
         return text
     except Exception as e:
         print(f"Error performing OCR: {e}")
@@ -284,10 +571,10 @@ def perform_ocr_on_pdf(pdf_data):
         # Convert PDF to images
         images = convert_from_path(temp_pdf_path)
         
-        # Perform OCR on each image
+        # Perform OCR on all the pages together
         text = ""
-        for image in images:
-            text += pytesseract.image_to_string(image) + "\n\n"
+        for page_text in ocr_pages(images):
+            text += page_text + "\n\n"
         
         # Clean up temporary file
         os.unlink(temp_pdf_path)
@@ -297,42 +584,114 @@ def perform_ocr_on_pdf(pdf_data):
         print(f"Error performing OCR on PDF: {e}")
         return ""
 
-def extract_text_from_resource(resource, mime_type):
-    """Extract text from a resource using OCR if necessary"""
+def get_ocr_cache():
+    """Get this process's connection to the OCR cache, opening it on first use"""
+    global _ocr_cache_conn, _ocr_cache_pid
+    if _ocr_cache_conn is None or _ocr_cache_pid != os.getpid():
+        conn = sqlite3.connect(OCR_CACHE_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS ocr_text (key TEXT PRIMARY KEY, text TEXT NOT NULL)")
+        _ocr_cache_conn = conn
+        _ocr_cache_pid = os.getpid()
+    
+    return _ocr_cache_conn
+
+def cached_ocr(data, ocr_function):
+    """
+    Run an OCR function on resource bytes, reusing the text cached for identical bytes.
+    Empty results are not cached, so failed OCR is retried on the next run.
+    """
+    # blake2b over a memoryview hashes multi-MB scans without copying them
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(memoryview(data))
+    key = f"{ocr_function.__name__}:{digest.hexdigest()}"
+    
+    try:
+        row = get_ocr_cache().execute("SELECT text FROM ocr_text WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            return row[0]
+    except sqlite3.Error as e:
+        print(f"Error reading OCR cache: {e}")
+    
+    text = ocr_function(data)
+    
+    if text:
+        try:
+            conn = get_ocr_cache()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO ocr_text (key, text) VALUES (?, ?)", (key, text))
+        except sqlite3.Error as e:
+            print(f"Error writing OCR cache: {e}")
+    
+    return text
+
+def extract_text_from_resource(resource, mime_type, resource_bytes=None):
+    """
+    Extract text from a resource using OCR if necessary.
+    resource_bytes, when given, holds the decoded data of resources by id() so each
+    resource of a note is only base64-decoded once.
+    """
     if not resource:
         return ""
     
     try:
-        # Get the base64-encoded data
-        data_elem = resource.find('data')
-        if data_elem is None or data_elem.text is None:
-            return ""
-        
-        # Decode the base64 data
-        data = base64.b64decode(data_elem.text)
+        data = resource_bytes.get(id(resource)) if resource_bytes is not None else None
+        if data is None:
+            # Get the base64-encoded data
+            data_elem = resource.find('data')
+            if data_elem is None or data_elem.text is None:
+                return ""
+            
+            # Decode the base64 data
+            data = base64.b64decode(data_elem.text)
+            if resource_bytes is not None:
+                resource_bytes[id(resource)] = data
         
         # Process based on mime type
         if 'image' in mime_type and HAS_OCR:
-            return perform_ocr_on_image(data)
+            return cached_ocr(data, perform_ocr_on_image)
         elif 'pdf' in mime_type and HAS_OCR and HAS_PDF2IMAGE:
-            return perform_ocr_on_pdf(data)
+            return cached_ocr(data, perform_ocr_on_pdf)
         else:
             return ""
     except Exception as e:
         print(f"Error extracting text from resource: {e}")
         return ""
 
+def index_resources_by_hash(resources):
+    """
+    Map each en-media hash found in a resource's source URL to the resources carrying it,
+    so every media element is resolved with one lookup instead of a scan of the resources
+    """
+    resources_by_hash = {}
+    for resource in resources:
+        resource_data = resource.find('data')
+        if resource_data is None or resource_data.text is None:
+            continue
+        
+        source_url = resource.find('.//resource-attributes/source-url')
+        if source_url is None or source_url.text is None:
+            continue
+        
+        for media_hash in dict.fromkeys(MEDIA_HASH_RE.findall(source_url.text)):
+            resources_by_hash.setdefault(media_hash, []).append(resource)
+    
+    return resources_by_hash
+
 def generate_note_id(note):
     """Generate a unique ID for a note based on its content"""
     try:
         # Get title and created date
-        title = note.find('title').text if note.find('title') is not None else "Untitled"
-        created = note.find('created').text if note.find('created') is not None else ""
+        title_elem = note.find('title')
+        created_elem = note.find('created')
+        title = title_elem.text if title_elem is not None else "Untitled"
+        created = created_elem.text if created_elem is not None else ""
         
         # Create a unique string
         unique_string = f"{title}_{created}"
         
-        # Generate a hash
+        # Generate a hash (kept as md5 so ids match earlier runs and the attachment index)
         note_id = hashlib.md5(unique_string.encode()).hexdigest()
         
         return note_id
@@ -340,216 +699,305 @@ def generate_note_id(note):
         print(f"Error generating note ID: {e}")
         return hashlib.md5(str(datetime.now()).encode()).hexdigest()
 
-def parse_enex_file(file_path):
+def is_gwen_note(note):
+    """Check whether a note is related to Gwendolyn, by its title or its tags"""
+    title_elem = note.find('title')
+    title = title_elem.text if title_elem is not None else "Untitled"
+    if any(keyword in title.lower() for keyword in ['gwen', 'gwendolyn']):
+        return True
+    
+    # Check tags for Gwen-related content
+    tags = [tag.text for tag in note.findall('tag') if tag.text is not None]
+    return any(tag.lower() in ['gwen', 'gwendolyn'] for tag in tags)
+
+def process_note(note_xml, source_file):
+    """
+    Extract the medical information from one note, serialized with ET.tostring
+    so it can be sent to a worker process.
+    Returns the note data, or None if the note could not be processed.
+    """
+    try:
+        note = ET.fromstring(note_xml)
+        title_elem = note.find('title')
+        title = title_elem.text if title_elem is not None else "Untitled"
+        
+        # Generate a unique ID for this note
+        note_id = generate_note_id(note)
+        
+        # Get created date
+        created_elem = note.find('created')
+        created_str = created_elem.text if created_elem is not None else None
+        if created_str:
+            # Format: 20170816T134740Z
+            created_date = datetime.strptime(created_str, '%Y%m%dT%H%M%SZ')
+        else:
+            created_date = None
+        
+        # Get updated date
+        updated_elem = note.find('updated')
+        updated_str = updated_elem.text if updated_elem is not None else None
+        if updated_str:
+            # Format: 20170816T134740Z
+            updated_date = datetime.strptime(updated_str, '%Y%m%dT%H%M%SZ')
+        else:
+            updated_date = None
+        
+        # Get tags
+        tags = [tag.text for tag in note.findall('tag') if tag.text is not None]
+        
+        # Initialize text content
+        text_content = ""
+        
+        # The note's resources and their decoded data, shared by the media and fallback resource loops
+        resources = note.findall('.//resource')
+        resource_bytes = {}
+        
+        # Get content
+        content_elem = note.find('content')
+        if content_elem is not None and content_elem.text is not None:
+            # Extract the CDATA content
+            cdata_content = content_elem.text
+            
+            # Parse the XML content inside CDATA
+            try:
+                enml = etree.fromstring(cdata_content.encode('utf-8'), ENML_PARSER) if cdata_content else None
+                
+                # Extract text content, joining the stripped text pieces as get_text(strip=True) did
+                text_content = "".join(text.strip() for text in enml.itertext()) if enml is not None else ""
+                
+                # Check for media elements that might need OCR; their text is joined on at the end
+                ocr_texts = []
+                media_elements = enml.iter('{*}en-media') if enml is not None else []
+                resources_by_hash = None
+                for media in media_elements:
+                    if media.get('hash'):
+                        # Find the corresponding resource
+                        media_hash = media.get('hash')
+                        media_type = media.get('type', '')
+                        
+                        # Find the resources with this hash, indexing them on the first media element
+                        if resources_by_hash is None:
+                            resources_by_hash = index_resources_by_hash(resources)
+                        for resource in resources_by_hash.get(media_hash, []):
+                            # Extract text using OCR
+                            ocr_text = extract_text_from_resource(resource, media_type, resource_bytes)
+                            if ocr_text:
+                                ocr_texts.append(ocr_text)
+                text_content += "".join("\n\n" + ocr_text for ocr_text in ocr_texts)
+            except Exception as e:
+                print(f"Error parsing content XML: {e}")
+                text_content = "Error extracting content"
+        
+        # Process resources directly if not already processed
+        if not text_content or len(text_content) < 100:  # If text content is empty or very short
+            ocr_texts = []
+            for resource in resources:
+                resource_attributes = resource.find('resource-attributes')
+                if resource_attributes is not None:
+                    mime = resource.find('mime')
+                    if mime is not None and mime.text is not None:
+                        mime_type = mime.text
+                        ocr_text = extract_text_from_resource(resource, mime_type, resource_bytes)
+                        if ocr_text:
+                            ocr_texts.append(ocr_text)
+            text_content += "".join("\n\n" + ocr_text for ocr_text in ocr_texts)
+        
+        # Determine medical specialty
+        specialty_info = determine_specialty(text_content, title)
+        specialty = specialty_info["specialty"]
+        specialty_confidence = specialty_info["confidence"]
+        
+        # Run every extraction pattern over the title and text in one pass; the
+        # events come from the text only, which starts after the title
+        combined_text = title + " " + text_content
+        matches = find_pattern_matches(combined_text, {event_type: len(title) + 1 for event_type in EVENT_PATTERNS})
+        
+        # Extract personnel
+        personnel = extract_personnel(combined_text, matches)
+        
+        # Extract facilities
+        facilities = extract_facilities(combined_text, matches)
+        
+        # Extract appointments
+        appointments = extract_appointments(combined_text, matches)
+        
+        # Extract dates
+        dates = extract_dates(combined_text, matches)
+        
+        # Extract medications
+        medications = extract_medications(combined_text, matches)
+        
+        # Extract procedures
+        procedures = extract_procedures(combined_text, matches)
+        
+        # Extract diagnoses
+        diagnoses = extract_diagnoses(combined_text, matches)
+        
+        # Extract symptoms
+        symptoms = extract_symptoms(combined_text, matches)
+        
+        # Extract results
+        results = extract_results(combined_text, matches)
+        
+        # Extract plans
+        plans = extract_plans(combined_text, matches)
+        
+        # Extract significant events
+        events = extract_significant_events(text_content, matches)
+        
+        # Link to PHB categories
+        phb_categories = []
+        seen_categories = set()
+        for event in events:
+            categories = _phb_categories_for_event(event["content"])
+            if categories:
+                for category in categories:
+                    # Check if this category is already in the list
+                    if category["category"] not in seen_categories:
+                        seen_categories.add(category["category"])
+                        phb_categories.append(dict(category))
+        
+        # Link to PHB supports
+        phb_supports = []
+        seen_supports = set()
+        for event in events:
+            supports = _phb_supports_for_event(event["content"])
+            if supports:
+                for support in supports:
+                    # Check if this support is already in the list
+                    if support["support"] not in seen_supports:
+                        seen_supports.add(support["support"])
+                        phb_supports.append(dict(support))
+        
+        return {
+            'id': note_id,
+            'source_file': source_file,
+            'title': title,
+            'date': created_date,
+            'updated': updated_date,
+            'tags': tags,
+            'specialty': specialty,
+            'specialty_confidence': specialty_confidence,
+            'personnel': personnel,
+            'facilities': facilities,
+            'appointments': appointments,
+            'dates': dates,
+            'medications': medications,
+            'procedures': procedures,
+            'diagnoses': diagnoses,
+            'symptoms': symptoms,
+            'results': results,
+            'plans': plans,
+            'events': events,
+            'phb_categories': phb_categories,
+            'phb_supports': phb_supports,
+            'content': text_content[:500] + "..." if len(text_content) > 500 else text_content,
+            'full_content': text_content
+        }
+    
+    except Exception as e:
+        print(f"Error processing note: {e}")
+        traceback.print_exc()
+        return None
+
+def finish_note(future, note_xml, source_file):
+    """Return the result of a note submitted to a worker, processing it here if the worker failed"""
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"Error processing note in a worker process, processing it here: {e}")
+        return process_note(note_xml, source_file)
+
+def is_pool_broken(executor):
+    """Check whether a worker of the pool died, which makes it refuse new work"""
+    try:
+        executor.submit(int)
+    except BrokenProcessPool:
+        return True
+    return False
+
+def parse_enex_file(file_path, executor=None):
     """
     Parse an ENEX file and extract notes with their metadata.
     Returns a list of notes with comprehensive medical information.
+    The file is streamed one note at a time, so only the notes being processed
+    are held in memory. The notes are independent, so they are processed by the
+    executor's worker processes when one is given, and one by one otherwise.
     """
     print(f"Parsing {file_path}...")
     
     try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
+        context = ET.iterparse(file_path, events=("start", "end"))
+        _, root = next(context)
         
-        notes_data = []
+        source_file = os.path.basename(file_path)
         
-        for note in root.findall('.//note'):
+        notes_data = []
+        pending = deque()
+        for event, elem in context:
+            if event != "end" or elem.tag != "note":
+                continue
+            
+            # Serialize the note if it is related to Gwendolyn
+            note_xml = None
             try:
-                title = note.find('title').text if note.find('title') is not None else "Untitled"
-                
-                # Skip if not related to Gwendolyn
-                if not any(keyword.lower() in title.lower() for keyword in ['gwen', 'gwendolyn']):
-                    # Check tags for Gwen-related content
-                    tags = [tag.text for tag in note.findall('tag') if tag.text is not None]
-                    if not any(tag.lower() in ['gwen', 'gwendolyn'] for tag in tags):
-                        continue
-                
-                # Generate a unique ID for this note
-                note_id = generate_note_id(note)
-                
-                # Get source file name
-                source_file = os.path.basename(file_path)
-                
-                # Get created date
-                created_str = note.find('created').text if note.find('created') is not None else None
-                if created_str:
-                    # Format: 20170816T134740Z
-                    created_date = datetime.strptime(created_str, '%Y%m%dT%H%M%SZ')
-                else:
-                    created_date = None
-                
-                # Get updated date
-                updated_str = note.find('updated').text if note.find('updated') is not None else None
-                if updated_str:
-                    # Format: 20170816T134740Z
-                    updated_date = datetime.strptime(updated_str, '%Y%m%dT%H%M%SZ')
-                else:
-                    updated_date = None
-                
-                # Get tags
-                tags = [tag.text for tag in note.findall('tag') if tag.text is not None]
-                
-                # Initialize text content
-                text_content = ""
-                
-                # Get content
-                content_elem = note.find('content')
-                if content_elem is not None and content_elem.text is not None:
-                    # Extract the CDATA content
-                    cdata_content = content_elem.text
-                    
-                    # Parse the XML content inside CDATA
-                    try:
-                        soup = BeautifulSoup(cdata_content, 'xml')
-                        # Extract text content
-                        text_content = soup.get_text(strip=True)
-                        
-                        # Check for media elements that might need OCR
-                        media_elements = soup.find_all('en-media')
-                        for media in media_elements:
-                            if media.get('hash'):
-                                # Find the corresponding resource
-                                media_hash = media.get('hash')
-                                media_type = media.get('type', '')
-                                
-                                # Find the resource with this hash
-                                for resource in note.findall('.//resource'):
-                                    resource_data = resource.find('data')
-                                    if resource_data is not None and resource_data.text is not None:
-                                        # Check if this is the right resource
-                                        resource_hash_elem = resource.find('.//resource-attributes/source-url')
-                                        if resource_hash_elem is not None and media_hash in resource_hash_elem.text:
-                                            # Extract text using OCR
-                                            ocr_text = extract_text_from_resource(resource, media_type)
-                                            if ocr_text:
-                                                text_content += "\n\n" + ocr_text
-                    except Exception as e:
-                        print(f"Error parsing content XML: {e}")
-                        text_content = "Error extracting content"
-                
-                # Process resources directly if not already processed
-                if not text_content or len(text_content) < 100:  # If text content is empty or very short
-                    for resource in note.findall('.//resource'):
-                        resource_attributes = resource.find('resource-attributes')
-                        if resource_attributes is not None:
-                            mime = resource.find('mime')
-                            if mime is not None and mime.text is not None:
-                                mime_type = mime.text
-                                ocr_text = extract_text_from_resource(resource, mime_type)
-                                if ocr_text:
-                                    text_content += "\n\n" + ocr_text
-                
-                # Determine medical specialty
-                specialty_info = determine_specialty(text_content, title)
-                specialty = specialty_info["specialty"]
-                specialty_confidence = specialty_info["confidence"]
-                
-                # Extract personnel
-                personnel = extract_personnel(title + " " + text_content)
-                
-                # Extract facilities
-                facilities = extract_facilities(title + " " + text_content)
-                
-                # Extract appointments
-                appointments = extract_appointments(title + " " + text_content)
-                
-                # Extract dates
-                dates = extract_dates(title + " " + text_content)
-                
-                # Extract medications
-                medications = extract_medications(title + " " + text_content)
-                
-                # Extract procedures
-                procedures = extract_procedures(title + " " + text_content)
-                
-                # Extract diagnoses
-                diagnoses = extract_diagnoses(title + " " + text_content)
-                
-                # Extract symptoms
-                symptoms = extract_symptoms(title + " " + text_content)
-                
-                # Extract results
-                results = extract_results(title + " " + text_content)
-                
-                # Extract plans
-                plans = extract_plans(title + " " + text_content)
-                
-                # Extract significant events
-                events = extract_significant_events(text_content)
-                
-                # Link to PHB categories
-                phb_categories = []
-                for event in events:
-                    categories = phb_details.get_phb_category_for_event(event["content"])
-                    if categories:
-                        for category in categories:
-                            # Check if this category is already in the list
-                            if not any(cat["category"] == category["category"] for cat in phb_categories):
-                                phb_categories.append(category)
-                
-                # Link to PHB supports
-                phb_supports = []
-                for event in events:
-                    supports = phb_details.get_phb_support_for_event(event["content"])
-                    if supports:
-                        for support in supports:
-                            # Check if this support is already in the list
-                            if not any(sup["support"] == support["support"] for sup in phb_supports):
-                                phb_supports.append(support)
-                
-                notes_data.append({
-                    'id': note_id,
-                    'source_file': source_file,
-                    'title': title,
-                    'date': created_date,
-                    'updated': updated_date,
-                    'tags': tags,
-                    'specialty': specialty,
-                    'specialty_confidence': specialty_confidence,
-                    'personnel': personnel,
-                    'facilities': facilities,
-                    'appointments': appointments,
-                    'dates': dates,
-                    'medications': medications,
-                    'procedures': procedures,
-                    'diagnoses': diagnoses,
-                    'symptoms': symptoms,
-                    'results': results,
-                    'plans': plans,
-                    'events': events,
-                    'phb_categories': phb_categories,
-                    'phb_supports': phb_supports,
-                    'content': text_content[:500] + "..." if len(text_content) > 500 else text_content,
-                    'full_content': text_content
-                })
-                
+                if is_gwen_note(elem):
+                    note_xml = ET.tostring(elem)
             except Exception as e:
                 print(f"Error processing note: {e}")
                 traceback.print_exc()
+            
+            # Free the parsed note, including its base64 resource data
+            root.clear()
+            
+            if note_xml is None:
+                continue
+            
+            if executor is not None:
+                try:
+                    future = executor.submit(process_note, note_xml, source_file)
+                except BrokenProcessPool as e:
+                    # A worker died (e.g. killed while OCRing a large scan); finish the file in this process
+                    print(f"Worker processes stopped, processing the rest of {file_path} here: {e}")
+                    executor = None
+                    notes_data.append(process_note(note_xml, source_file))
+                    continue
+                
+                pending.append((future, note_xml))
+                
+                # Keep only a few notes per worker in flight
+                if len(pending) > PARSE_WORKERS * 4:
+                    notes_data.append(finish_note(*pending.popleft(), source_file))
+            else:
+                notes_data.append(process_note(note_xml, source_file))
+        
+        while pending:
+            notes_data.append(finish_note(*pending.popleft(), source_file))
         
-        return notes_data
+        return [note_data for note_data in notes_data if note_data is not None]
     
     except Exception as e:
         print(f"Error parsing file {file_path}: {e}")
         traceback.print_exc()
         return []
 
+def json_default(value):
+    """Convert the values json cannot serialize itself, i.e. note dates, to strings"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
 def save_data(data, filename):
     """Save data to a JSON file with proper date handling"""
-    # Convert datetime objects to strings
-    serializable_data = []
-    for item in data:
-        serializable_item = {}
-        for key, value in item.items():
-            if isinstance(value, datetime):
-                serializable_item[key] = value.strftime('%Y-%m-%d %H:%M:%S')
-            else:
-                serializable_item[key] = value
-        serializable_data.append(serializable_item)
-    
-    # Save to file
-    with open(filename, 'w') as f:
-        json.dump(serializable_data, f, indent=2)
+    # Dates are converted as they are written, rather than in a copy of every note
+    if HAS_ORJSON:
+        # Pass datetimes through to json_default so they keep the json module's format
+        option = orjson.OPT_PASSTHROUGH_DATETIME | (orjson.OPT_INDENT_2 if PRETTY_JSON else 0)
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data, default=json_default, option=option))
+    else:
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=2 if PRETTY_JSON else None, default=json_default)
     
     print(f"Data saved to {filename}")
 
@@ -562,10 +1010,21 @@ def main():
     
     all_notes = []
     
-    # Parse each ENEX file
-    for enex_file in enex_files:
-        notes = parse_enex_file(enex_file)
-        all_notes.extend(notes)
+    # Parse each ENEX file, sharing one pool of worker processes across the files
+    executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS) if PARSE_WORKERS > 1 else None
+    try:
+        for enex_file in enex_files:
+            # Replace the pool if a worker died while parsing the previous file
+            if executor is not None and is_pool_broken(executor):
+                print("Worker processes stopped, starting new ones")
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+            
+            notes = parse_enex_file(enex_file, executor)
+            all_notes.extend(notes)
+    finally:
+        if executor is not None:
+            executor.shutdown()
     
     print(f"Total notes extracted: {len(all_notes)}")
     
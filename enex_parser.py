@@ -417,14 +417,13 @@ def extract_significant_events(text):
             sentence = sentence.strip()
             if not sentence:
                 continue
-                
-            for keyword in event_keywords:
-                if keyword in sentence.lower():
-                    events.append({
-                        "type": "General",
-                        "content": sentence
-                    })
-                    break
+            
+            sentence_lower = sentence.lower()
+            if any(keyword in sentence_lower for keyword in event_keywords):
+                events.append({
+                    "type": "General",
+                    "content": sentence
+                })
     
     return events if events else [{"type": "Unknown", "content": "No specific events extracted"}]
 
@@ -426,24 +426,18 @@ def categorize_personnel(name, title=""):
     combined_text = (name + " " + title).lower()
     
     # Determine personnel type
-    personnel_type = "Unknown"
-    for type_name, keywords in PERSONNEL_TYPES.items():
-        for keyword in keywords:
-            if keyword in combined_text:
-                personnel_type = type_name
-                break
-        if personnel_type != "Unknown":
-            break
+    personnel_type = next(
+        (type_name for type_name, keywords in PERSONNEL_TYPES.items()
+         if any(keyword in combined_text for keyword in keywords)),
+        "Unknown"
+    )
     
     # Determine specialty
-    specialty = "Unknown"
-    for category, info in PHB_CATEGORIES.items():
-        for keyword in info["keywords"]:
-            if keyword in combined_text:
-                specialty = category
-                break
-        if specialty != "Unknown":
-            break
+    specialty = next(
+        (category for category, info in PHB_CATEGORIES.items()
+         if any(keyword in combined_text for keyword in info["keywords"])),
+        "Unknown"
+    )
     
     return {"type": personnel_type, "specialty": specialty}
 
@@ -458,24 +452,18 @@ def categorize_facility(facility_name):
     facility_name = facility_name.lower()
     
     # Determine facility type
-    facility_type = "Unknown"
-    for type_name, keywords in FACILITY_TYPES.items():
-        for keyword in keywords:
-            if keyword in facility_name:
-                facility_type = type_name
-                break
-        if facility_type != "Unknown":
-            break
+    facility_type = next(
+        (type_name for type_name, keywords in FACILITY_TYPES.items()
+         if any(keyword in facility_name for keyword in keywords)),
+        "Unknown"
+    )
     
     # Determine specialty
-    specialty = "Unknown"
-    for category, info in PHB_CATEGORIES.items():
-        for keyword in info["keywords"]:
-            if keyword in facility_name:
-                specialty = category
-                break
-        if specialty != "Unknown":
-            break
+    specialty = next(
+        (category for category, info in PHB_CATEGORIES.items()
+         if any(keyword in facility_name for keyword in info["keywords"])),
+        "Unknown"
+    )
     
     return {"type": facility_type, "specialty": specialty}
 
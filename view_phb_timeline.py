@@ -10,9 +10,56 @@ import time
 PORT = 8000
 TIMELINE_FILE = "gwendolyn_medical_timeline_phb.html"
 
+# Pre-compressed variants written by create_phb_timeline.py, in order of preference
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+def accepts_encoding(accept_encoding, encoding):
+    """Check whether an Accept-Encoding header allows an encoding, honouring q=0"""
+    weights = {}
+    for token in accept_encoding.split(","):
+        name, _, params = token.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    
+    # An encoding that is not listed falls back to the "*" wildcard, if any
+    return weights.get(encoding, weights.get("*", 0.0)) > 0
+
+class PrecompressedHandler(http.server.SimpleHTTPRequestHandler):
+    """Serve a .br/.gz copy of a file when the browser accepts that encoding"""
+    
+    def send_head(self):
+        path = self.translate_path(self.path)
+        accept_encoding = self.headers.get("Accept-Encoding", "")
+        if os.path.isfile(path):
+            for encoding, suffix in ENCODINGS:
+                compressed = path + suffix
+                # Skip copies left over from an older page
+                if (accepts_encoding(accept_encoding, encoding) and os.path.isfile(compressed)
+                        and os.path.getmtime(compressed) >= os.path.getmtime(path)):
+                    f = open(compressed, "rb")
+                    self.send_response(200)
+                    self.send_header("Content-Type", self.guess_type(path))
+                    self.send_header("Content-Encoding", encoding)
+                    self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+                    self.send_header("Vary", "Accept-Encoding")
+                    self.end_headers()
+                    return f
+        return super().send_head()
+
 def start_server():
     """Start a simple HTTP server in the current directory"""
-    handler = http.server.SimpleHTTPRequestHandler
+    handler = PrecompressedHandler
     httpd = socketserver.TCPServer(("", PORT), handler)
     print(f"Serving at http://localhost:{PORT}")
     httpd.serve_forever()